@@ -26,6 +26,7 @@ from faker import Faker
 from api.common import RH_IDENTITY_HEADER
 from api.iam.serializers import create_schema_name
 from api.models import Customer, Tenant
+from api.tags.cache import invalidate_tag_keys
 from koku.koku_test_runner import KokuTestRunner
 
 
@@ -50,6 +51,12 @@ class IamTestCase(TestCase):
         cls.tenant.save()
         cls.headers = cls.request_context['request'].META
 
+    def setUp(self):
+        """Set up each test case."""
+        super().setUp()
+        # Tag keys cached by an earlier test may be gone with its data
+        invalidate_tag_keys(self.schema_name)
+
     @classmethod
     def tearDownClass(cls):
         """Tear down the class."""
@@ -20,7 +20,10 @@ from django.db.models import CharField, DecimalField, Max, Sum, Value
 from django.db.models.functions import Coalesce
 
 from api.report.provider_map import ProviderMap
-from reporting.models import AWSCostEntryLineItemDailySummary
+from reporting.models import (AWSCostEntryLineItemDailySummary,
+                              AWSCostSummaryByAccount,
+                              AWSCostSummaryByRegion,
+                              AWSCostSummaryByService)
 
 
 class AWSProviderMap(ProviderMap):
@@ -72,6 +75,22 @@ class AWSProviderMap(ProviderMap):
                 'tag_column': 'tags',
                 'report_type': {
                     'costs': {
+                        'tables': {
+                            'rollups': [
+                                {
+                                    'dimensions': ['account'],
+                                    'query': AWSCostSummaryByAccount
+                                },
+                                {
+                                    'dimensions': ['account', 'service', 'product_family'],
+                                    'query': AWSCostSummaryByService
+                                },
+                                {
+                                    'dimensions': ['account', 'region', 'az'],
+                                    'query': AWSCostSummaryByRegion
+                                },
+                            ]
+                        },
                         'aggregates': {
                             'infrastructure_cost': Sum('unblended_cost'),
                             'derived_cost': Sum(Value(0, output_field=DecimalField())),
@@ -91,9 +91,12 @@ class AWSReportQueryHandler(ReportQueryHandler):
             units_fallback = self._mapper.report_type_map.get('usage_units_fallback')
             annotations['usage_units'] = Coalesce(self._mapper.usage_units_key, Value(units_fallback))
         # { query_param: database_field_name }
+        # Only the grouped fields, which any rollup table queried keeps
+        group_by = self._get_cluster_group_by(self._get_group_by())
         fields = self._mapper.provider_map.get('annotations')
         for q_param, db_field in fields.items():
-            annotations[q_param] = Concat(db_field, Value(''))
+            if q_param in group_by:
+                annotations[q_param] = Concat(db_field, Value(''))
         return annotations
 
     def _format_query_response(self):
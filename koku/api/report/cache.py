@@ -0,0 +1,109 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Tenant scoped cache of report responses."""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from prometheus_client import Counter
+
+from api.utils import DateHelper
+
+REPORT_GENERATION_KEY = 'report-generation-{schema}'
+REPORT_CACHE_KEY = 'report-{schema}-{generation}-{digest}'
+
+REPORT_CACHE_HIT_COUNTER = Counter('report_response_cache_hit_count',
+                                   'Report responses served from the cache',
+                                   ['provider', 'report'])
+REPORT_CACHE_MISS_COUNTER = Counter('report_response_cache_miss_count',
+                                    'Report responses computed on a cache miss',
+                                    ['provider', 'report'])
+
+
+def _get_generation(cache, schema_name):
+    """Return the current data generation of a tenant."""
+    generation_key = REPORT_GENERATION_KEY.format(schema=schema_name)
+    generation = cache.get(generation_key)
+    if generation is None:
+        cache.add(generation_key, uuid.uuid4().hex, None)
+        generation = cache.get(generation_key)
+    return generation
+
+
+def _get_digest(provider, report, params, access, accept_type):
+    """Return a digest of everything a report response depends on."""
+    # Time scopes are relative to the current day
+    today = DateHelper().today.date()
+    request_key = json.dumps(
+        [provider, report, params, access, accept_type, today],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(request_key.encode('utf-8')).hexdigest()
+
+
+def get_cached_report(schema_name, provider, report, params, access,
+                      accept_type, load):
+    """Return a tenant's report output.
+
+    Args:
+        schema_name (str): The tenant's schema
+        provider (str): Provider name (e.g. 'aws' or 'ocp')
+        report (str): Report name (e.g. 'costs', 'cpu')
+        params (dict): The validated query parameters
+        access (dict): The user's RBAC access
+        accept_type (str): The requested media type
+        load (callable): Returns the report output on a cache miss
+
+    Returns:
+        The report output returned by load, from the cache when present
+
+    """
+    if not settings.REPORT_RESPONSE_CACHE:
+        return load()
+
+    cache = caches['default']
+    generation = _get_generation(cache, schema_name)
+    if generation is None:
+        # The cache can not be reached
+        return load()
+
+    digest = _get_digest(provider, report, params, access, accept_type)
+    cache_key = REPORT_CACHE_KEY.format(schema=schema_name,
+                                        generation=generation,
+                                        digest=digest)
+    output = cache.get(cache_key)
+    if output is None:
+        REPORT_CACHE_MISS_COUNTER.labels(provider=provider, report=report).inc()
+        output = load()
+        cache.set(cache_key, output, settings.REPORT_RESPONSE_CACHE_TIMEOUT)
+    else:
+        REPORT_CACHE_HIT_COUNTER.labels(provider=provider, report=report).inc()
+    return output
+
+
+def bump_data_generation(schema_name):
+    """Make the report responses cached for a tenant stale.
+
+    Called when the tenant's report data changes. The tenant moves to a
+    new generation, so responses cached under the old one are no longer
+    read and expire on their own.
+    """
+    generation_key = REPORT_GENERATION_KEY.format(schema=schema_name)
+    caches['default'].set(generation_key, uuid.uuid4().hex, None)
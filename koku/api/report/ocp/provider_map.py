@@ -22,6 +22,9 @@ from providers.provider_access import ProviderAccessor
 
 from api.report.provider_map import ProviderMap
 from reporting.models import (CostSummary,
+                              CostSummaryByCluster,
+                              CostSummaryByNode,
+                              CostSummaryByProject,
                               OCPStorageLineItemDailySummary,
                               OCPUsageLineItemDailySummary)
 
@@ -75,7 +78,17 @@ class OCPProviderMap(ProviderMap):
                 'report_type': {
                     'costs': {
                         'tables': {
-                            'query': CostSummary
+                            'query': CostSummary,
+                            'rollups': [
+                                {
+                                    'dimensions': ['cluster', 'infrastructures'],
+                                    'query': CostSummaryByCluster
+                                },
+                                {
+                                    'dimensions': ['cluster', 'infrastructures', 'node'],
+                                    'query': CostSummaryByNode
+                                },
+                            ]
                         },
                         'aggregates': {
                             'infrastructure_cost': Sum(F('infra_cost')),
@@ -135,7 +148,13 @@ class OCPProviderMap(ProviderMap):
                     },
                     'costs_by_project': {
                         'tables': {
-                            'query': CostSummary
+                            'query': CostSummary,
+                            'rollups': [
+                                {
+                                    'dimensions': ['cluster', 'infrastructures', 'project'],
+                                    'query': CostSummaryByProject
+                                },
+                            ]
                         },
                         'aggregates': {
                             'infrastructure_cost': Sum(F('project_infra_cost')),
@@ -16,10 +16,9 @@
 #
 """OCP Query Handling for Reports."""
 import copy
-from collections import defaultdict
 from decimal import Decimal, DivisionByZero, InvalidOperation
 
-from django.db.models import F, Value, Window
+from django.db.models import Count, F, Value, Window
 from django.db.models.functions import Coalesce, Concat, RowNumber
 from tenant_schemas.utils import tenant_context
 
@@ -79,9 +78,12 @@ class OCPReportQueryHandler(ReportQueryHandler):
         """
         annotations = {'date': self.date_trunc('usage_start')}
         # { query_param: database_field_name }
+        # Only the grouped fields, which any rollup table queried keeps
+        group_by = self._get_cluster_group_by(self._get_group_by())
         fields = self._mapper.provider_map.get('annotations')
         for q_param, db_field in fields.items():
-            annotations[q_param] = Concat(db_field, Value(''))
+            if q_param in group_by:
+                annotations[q_param] = Concat(db_field, Value(''))
         return annotations
 
     @property
@@ -156,13 +158,16 @@ class OCPReportQueryHandler(ReportQueryHandler):
                 query_order_by.insert(1, 'rank')
                 query_data = self._ranked_list(query_data)
 
-            # Populate the 'total' section of the API response
-            if query.exists():
-                aggregates = self._mapper.report_type_map.get('aggregates')
-                metric_sum = query.aggregate(**aggregates)
+            # Populate the 'total' section of the API response, planned
+            # in the same query as the cluster capacity
+            aggregates = self._mapper.report_type_map.get('aggregates')
+            capacity_plan = self._execute_capacity_plan(aggregates)
+            metric_sum = capacity_plan[0]
+            if metric_sum.get('row_count'):
                 query_sum = {key: metric_sum.get(key) for key in aggregates}
 
-            query_data, total_capacity = self.get_cluster_capacity(query_data)
+            query_data, total_capacity = self.get_cluster_capacity(query_data,
+                                                                   capacity_plan)
             if total_capacity:
                 query_sum.update(total_capacity)
 
@@ -234,26 +239,71 @@ class OCPReportQueryHandler(ReportQueryHandler):
             order_by=rank_orders
         )
 
-    def get_cluster_capacity(self, query_data):
-        """Calculate cluster capacity for all nodes over the date range."""
-        annotations = self._mapper.report_type_map.get('capacity_aggregate')
-        if not annotations:
-            return query_data, {}
+    def _execute_capacity_plan(self, aggregates=None):
+        """Run the cluster capacity, and any report aggregates, in one query.
 
-        cap_key = list(annotations.keys())[0]
-        total_capacity = Decimal(0)
-        capacity_by_cluster = defaultdict(Decimal)
+        The capacity is the maximum of each day and cluster summed per cluster
+        and in total, so the report aggregates are planned over the same day
+        and cluster groups, counting only the rows the report does not exclude.
+
+        Args:
+            aggregates (dict): The report aggregates to plan with the capacity
+        Returns:
+            (dict, dict) The totals, and the capacity of each cluster
+
+        """
+        capacity = self._mapper.report_type_map.get('capacity_aggregate') or {}
+        planned = {}
+        if aggregates:
+            planned['row_count'] = Count('*')
+            planned.update(aggregates)
+            if self.query_exclusions:
+                for key, aggregate in planned.items():
+                    planned[key] = aggregate.copy()
+                    planned[key].filter = ~self.query_exclusions
+        planned.update(capacity)
 
         q_table = self._mapper.query_table
         query = q_table.objects.filter(self.query_filter)
         query_group_by = ['usage_start', 'cluster_id']
+        grouping_sets = [('cluster_id',), ()] if capacity else [()]
 
         with tenant_context(self.tenant):
-            cap_data = query.values(*query_group_by).annotate(**annotations)
-            for entry in cap_data:
-                cluster_id = entry.get('cluster_id', '')
-                capacity_by_cluster[cluster_id] += entry.get(cap_key, 0)
-                total_capacity += entry.get(cap_key, 0)
+            set_rows = self._execute_grouping_sets(
+                query,
+                query_group_by,
+                planned,
+                grouping_sets=grouping_sets,
+                combine={key: 'sum' for key in capacity}
+            )
+
+        capacity_by_cluster = {}
+        if capacity:
+            cap_key = list(capacity.keys())[0]
+            for row in set_rows[('cluster_id',)]:
+                capacity_by_cluster[row.get('cluster_id')] = row.get(cap_key)
+        return set_rows[()][0], capacity_by_cluster
+
+    def get_cluster_capacity(self, query_data, capacity_plan=None):
+        """Calculate cluster capacity for all nodes over the date range.
+
+        Args:
+            query_data (list) The existing query data from execute_query
+            capacity_plan (tuple) The result of _execute_capacity_plan when
+                the capacity was already planned with the report totals
+        Returns:
+            (list, dict) The query data and the total capacity
+
+        """
+        annotations = self._mapper.report_type_map.get('capacity_aggregate')
+        if not annotations:
+            return query_data, {}
+
+        cap_key = list(annotations.keys())[0]
+        if capacity_plan is None:
+            capacity_plan = self._execute_capacity_plan()
+        totals, capacity_by_cluster = capacity_plan
+        total_capacity = totals.get(cap_key) or Decimal(0)
 
         if self.resolution == 'monthly':
             for row in query_data:
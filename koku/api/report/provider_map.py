@@ -61,6 +61,7 @@ class ProviderMap:
         self._report_type = report_type
         self._provider_map = self.provider_data(provider)
         self._report_type_map = self.report_type_data(report_type, provider)
+        self._query_dimensions = None
 
         # main mapping data structure
         # this data should be considered static and read-only.
@@ -77,10 +78,28 @@ class ProviderMap:
         """Return the provider map property."""
         return self._provider_map
 
+    def route_query(self, dimensions):
+        """Route the report's queries to a rollup table keeping their dimensions.
+
+        Args:
+            dimensions (set): The API parameters the queries group or filter by
+
+        """
+        self._query_dimensions = set(dimensions)
+
     @property
     def query_table(self):
-        """Return the appropriate query table for the report type."""
-        report_table = self._report_type_map.get('tables', {}).get('query')
+        """Return the appropriate query table for the report type.
+
+        Routed queries use the first, and narrowest, rollup table of the
+        report type that keeps all of their dimensions.
+        """
+        tables = self._report_type_map.get('tables', {})
+        if self._query_dimensions is not None:
+            for rollup in tables.get('rollups', []):
+                if self._query_dimensions.issubset(rollup.get('dimensions')):
+                    return rollup.get('query')
+        report_table = tables.get('query')
         default = self._provider_map.get('tables').get('query')
         return report_table if report_table else default
 
@@ -24,14 +24,23 @@ from decimal import Decimal, DivisionByZero, InvalidOperation
 from itertools import groupby
 from urllib.parse import quote_plus
 
+from django.db import connections
 from django.db.models import Q
 from django.db.models.expressions import OrderBy, RawSQL
+from django.db.models.query import QuerySet
 
 from api.query_filter import QueryFilter, QueryFilterCollection
 from api.query_handler import QueryHandler
 
 LOG = logging.getLogger(__name__)
 
+# The SQL functions combining the per group values of an aggregate again
+GROUPING_SET_FUNCTIONS = {'SUM': 'sum', 'COUNT': 'sum', 'MAX': 'max', 'MIN': 'min'}
+
+# Filter parameters that scope a query without filtering on a dimension
+SCOPE_FILTERS = ('resolution', 'time_scope_value', 'time_scope_units',
+                 'resource_scope', 'limit', 'offset')
+
 
 def strip_tag_prefix(tag):
     """Remove the query tag prefix from a tag key."""
@@ -66,6 +75,7 @@ class ReportQueryHandler(QueryHandler):
         self._offset = self.get_query_param_data('filter', 'offset', default=0)
         self.query_delta = {'value': None, 'percent': None}
 
+        self._mapper.route_query(self._get_query_dimensions())
         self.query_filter = self._get_filter()
         self.query_exclusions = self._get_exclusions()
 
@@ -335,6 +345,17 @@ class ReportQueryHandler(QueryHandler):
         LOG.debug(f'_get_exclusions: {composed_exclusions}')
         return composed_exclusions
 
+    def _get_query_dimensions(self):
+        """Return the group by and filter parameters of the query."""
+        dimensions = set()
+        for param in ('group_by', 'filter'):
+            for key in self.query_parameters.get(param, {}):
+                key = key.replace('and:', '').replace('or:', '')
+                if param == 'filter' and key in SCOPE_FILTERS:
+                    continue
+                dimensions.add(key)
+        return dimensions
+
     def _get_group_by(self):
         """Create list for group_by parameters."""
         group_by = []
@@ -589,6 +610,9 @@ class ReportQueryHandler(QueryHandler):
             List(Dict): List of data points meeting the rank criteria
 
         """
+        if isinstance(data_list, QuerySet):
+            return self._ranked_query(data_list)
+
         rank_limited_data = OrderedDict()
         date_grouped_data = self.date_group_data(data_list)
         if data_list:
@@ -603,8 +627,122 @@ class ReportQueryHandler(QueryHandler):
 
         return self.unpack_date_grouped_data(rank_limited_data)
 
-    # needs refactoring, but disabling pylint's complexity check for now.
-    def _perform_rank_summation(self, entry, is_offset):    # noqa: C901
+    def _ranked_query(self, query):
+        """Get the ranked items of a query within the limit from the database.
+
+        The rows ranked outside of the limit are summed per date into an
+        "Others" row in the database as well, unless an offset is requested.
+
+        Args:
+            query (QuerySet): A values query annotated with a per date rank
+        Returns:
+            List(Dict): List of data points meeting the rank criteria
+
+        """
+        connection = connections[query.db]
+        quote_name = connection.ops.quote_name
+        compiler = query.query.get_compiler(using=query.db)
+        sql, params = compiler.as_sql()
+        names = [*query.query.extra_select, *query.query.values_select,
+                 *query.query.annotation_select]
+        is_offset = 'offset' in self.query_parameters.get('filter', {})
+        in_rank = (f'ranked.rank > {int(self._offset)}'
+                   f' AND ranked.rank <= {int(self._limit + self._offset)}')
+        sum_columns = [column for column in self._mapper.sum_columns if column in names]
+        other_sums = ''.join(
+            f', COALESCE(sum(ranked.{quote_name(column)}) FILTER (WHERE NOT ({in_rank})), 0)'
+            for column in sum_columns
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT * FROM ({sql}) AS ranked
+                WHERE {in_rank}
+                ORDER BY ranked.date DESC, ranked.rank
+                """,
+                params
+            )
+            rows = compiler.results_iter(results=[cursor.fetchall()])
+            ranked_list = [dict(zip(names, row)) for row in rows]
+
+            cursor.execute(
+                f"""
+                SELECT ranked.date,
+                    max(ranked.rank),
+                    count(*) FILTER (WHERE NOT ({in_rank})){other_sums}
+                FROM ({sql}) AS ranked
+                GROUP BY ranked.date
+                """,
+                params
+            )
+            # The dates are keyed like the ranked rows, which went through
+            # the compiler's converters
+            expressions = [col for col, _, _ in compiler.select[:compiler.col_count]]
+            date_converters = compiler.get_converters([expressions[names.index('date')]])
+            date_totals = []
+            for row in cursor.fetchall():
+                row = list(row)
+                self._convert_values(row, date_converters, connection)
+                date_totals.append(row)
+
+        if date_totals:
+            self.max_rank = max(row[1] for row in date_totals)
+        if is_offset:
+            return ranked_list
+
+        others = {}
+        for date, _, num_others, *sums in date_totals:
+            if num_others:
+                others[date] = (num_others, dict(zip(sum_columns, sums)))
+
+        data = []
+        for date, date_rows in groupby(ranked_list, key=lambda row: row.get('date')):
+            date_rows = list(date_rows)
+            data.extend(date_rows)
+            if date in others:
+                num_others, sums = others[date]
+                other_sums = {column: 0 for column in self._mapper.sum_columns}
+                for column, value in sums.items():
+                    if isinstance(date_rows[0].get(column), int):
+                        value = int(value)
+                    other_sums[column] = value
+                data.append(self._build_others_row(date_rows[0], num_others, other_sums))
+        return data
+
+    def _build_others_row(self, template, num_others, other_sums):
+        """Build the "Others" row of a date from one of its ranked rows."""
+        other = copy.deepcopy(template)
+        others_label = '{} Others'.format(num_others)
+
+        if num_others == 1:
+            others_label = '{} Other'.format(num_others)
+
+        other.update(other_sums)
+        other['rank'] = self._limit + 1
+        group_by = self._get_group_by()
+
+        for group in group_by:
+            other[group] = others_label
+
+        if 'account' in group_by:
+            other['account_alias'] = others_label
+
+        if 'cluster' in group_by:
+            other['cluster_alias'] = others_label
+            exclusions = []
+        else:
+            # delete these labels from the Others category if we're not
+            # grouping by cluster.
+            exclusions = ['cluster', 'cluster_alias']
+
+        for exclude in exclusions:
+            if exclude in other:
+                del other[exclude]
+
+        return other
+
+    def _perform_rank_summation(self, entry, is_offset):
         """Do the actual rank limiting for rank_list."""
         other = None
         ranked_list = []
@@ -612,7 +750,7 @@ class ReportQueryHandler(QueryHandler):
         other_sums = {column: 0 for column in self._mapper.sum_columns}
         for data in entry:
             if other is None:
-                other = copy.deepcopy(data)
+                other = data
             rank = data.get('rank')
             if rank > self._offset and rank <= self._limit + self._offset:
                 ranked_list.append(data)
@@ -622,35 +760,7 @@ class ReportQueryHandler(QueryHandler):
                     other_sums[column] += data.get(column) if data.get(column) else 0
 
         if other is not None and others_list and not is_offset:
-            num_others = len(others_list)
-            others_label = '{} Others'.format(num_others)
-
-            if num_others == 1:
-                others_label = '{} Other'.format(num_others)
-
-            other.update(other_sums)
-            other['rank'] = self._limit + 1
-            group_by = self._get_group_by()
-
-            for group in group_by:
-                other[group] = others_label
-
-            if 'account' in group_by:
-                other['account_alias'] = others_label
-
-            if 'cluster' in group_by:
-                other['cluster_alias'] = others_label
-                exclusions = []
-            else:
-                # delete these labels from the Others category if we're not
-                # grouping by cluster.
-                exclusions = ['cluster', 'cluster_alias']
-
-            for exclude in exclusions:
-                if exclude in other:
-                    del other[exclude]
-
-            ranked_list.append(other)
+            ranked_list.append(self._build_others_row(other, len(others_list), other_sums))
 
         return ranked_list
 
@@ -671,14 +781,116 @@ class ReportQueryHandler(QueryHandler):
                 return_data.append(value)
         return return_data
 
-    def _create_previous_totals(self, previous_query, query_group_by):
+    def _execute_grouping_sets(self, query, group_by, aggregates,
+                               grouping_sets=None, combine=None):
+        """Aggregate a query per group and over sets of the groups in one query.
+
+        The aggregates are computed for each group of the group by fields and
+        combined again with GROUPING SETS, a Sum or Count by summing, a Max or
+        Min by its own function, unless combine names another SQL function.
+
+        Args:
+            query (QuerySet): The query to aggregate
+            group_by (list): The fields to group the query by
+            aggregates (dict): The Sum, Count, Max or Min aggregates by name
+            grouping_sets (list): Tuples of group by fields to combine the
+                groups by, by default the groups themselves and the total
+            combine (dict): SQL functions combining the groups by aggregate name
+        Returns:
+            (dict) The rows of each grouping set keyed by the grouping set
+
+        """
+        if grouping_sets is None:
+            grouping_sets = [tuple(group_by), ()]
+        combine = combine or {}
+        grouped = query.order_by().values(*group_by).annotate(**aggregates)
+        connection = connections[grouped.db]
+        compiler = grouped.query.get_compiler(using=grouped.db)
+        sql, params = compiler.as_sql()
+        names = [*grouped.query.extra_select, *grouped.query.values_select,
+                 *grouped.query.annotation_select]
+        aliases = [f'c{index}' for index in range(len(names))]
+        columns = {name: f'grouped.{alias}' for name, alias in zip(names, aliases)}
+
+        # Only the fields of some grouping set are grouped on, the other
+        # group by fields are rolled up in every row
+        grouped_fields = [field for field in group_by
+                          if any(field in grouping_set for grouping_set in grouping_sets)]
+        select = []
+        for name in names:
+            if name in aggregates:
+                function = combine.get(name) or \
+                    GROUPING_SET_FUNCTIONS[aggregates[name].function]
+                select.append(f'{function}({columns[name]})')
+            elif name in grouped_fields:
+                select.append(columns[name])
+            else:
+                select.append('NULL')
+        if grouped_fields:
+            select.append('GROUPING({})'.format(', '.join(columns[name] for name in grouped_fields)))
+        else:
+            select.append('0')
+        sets = ', '.join(
+            '({})'.format(', '.join(columns[name] for name in grouping_set))
+            for grouping_set in grouping_sets
+        )
+        # GROUPING() sets the bit of each grouped field left out of a set,
+        # the last field being the lowest bit
+        set_masks = {}
+        rolled_up = {}
+        for grouping_set in grouping_sets:
+            mask = 0
+            for field in grouped_fields:
+                mask = (mask << 1) | (field not in grouping_set)
+            set_masks[mask] = grouping_set
+            rolled_up[mask] = {
+                position for position, name in enumerate(names)
+                if name not in aggregates and name not in grouping_set
+            }
+
+        expressions = [col for col, _, _ in compiler.select[:compiler.col_count]]
+        converters = compiler.get_converters(expressions)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT {', '.join(select)}
+                FROM ({sql}) AS grouped({', '.join(aliases)})
+                GROUP BY GROUPING SETS ({sets})
+                """,
+                params
+            )
+            set_rows = {grouping_set: [] for grouping_set in grouping_sets}
+            for *values, mask in cursor.fetchall():
+                # The rolled up fields are NULL and left unconverted
+                self._convert_values(values, converters, connection, skip=rolled_up[mask])
+                set_rows[set_masks[mask]].append(dict(zip(names, values)))
+        return set_rows
+
+    @staticmethod
+    def _convert_values(values, converters, connection, skip=()):
+        """Apply the query compiler's converters to a row of values in place."""
+        for position, (field_converters, expression) in converters.items():
+            if position in skip:
+                continue
+            value = values[position]
+            for converter in field_converters:
+                value = converter(value, expression, connection)
+            values[position] = value
+
+    def _create_previous_totals(self, previous_query, query_group_by, total_filter=None):
         """Get totals from the time period previous to the current report.
 
+        The totals of each grouping and the total of the whole previous
+        period come back from the same query.
+
         Args:
             previous_query (Query): A Django ORM query
             query_group_by (dict): The group by dict for the current report
+            total_filter (django.db.models.query_utils.Q): Limits the total
+                of the previous period to the matching rows
         Returns:
-            (dict) A dictionary keyed off the grouped values for the report
+            (dict, Decimal) A dictionary keyed off the grouped values for the
+                report, and the total of the previous period
 
         """
         date_delta = self._get_date_delta()
@@ -687,18 +899,25 @@ class ReportQueryHandler(QueryHandler):
         previous_sums = previous_query.annotate(**self.annotations)
         delta_field = self._mapper._report_type_map.get('delta_key').get(self._delta)
         delta_annotation = {self._delta: delta_field}
-        previous_sums = previous_sums\
-            .values(*query_group_by)\
-            .annotate(**delta_annotation)
+        total_key = self._delta
+        if total_filter:
+            total_key = 'previous_total'
+            delta_annotation[total_key] = delta_field.copy()
+            delta_annotation[total_key].filter = total_filter
+
+        grouping_sets = self._execute_grouping_sets(previous_sums,
+                                                    query_group_by,
+                                                    delta_annotation)
         previous_dict = OrderedDict()
-        for row in previous_sums:
+        for row in grouping_sets[tuple(query_group_by)]:
             date = self.string_to_date(row['date'])
             date = date + date_delta
             row['date'] = self.date_to_string(date)
             key = tuple((row[key] for key in query_group_by))
             previous_dict[key] = row[self._delta]
 
-        return previous_dict
+        previous_total = grouping_sets[()][0].get(total_key)
+        return previous_dict, Decimal(previous_total or 0)
 
     def _get_previous_totals_filter(self, filter_dates):
         """Filter previous time range to exlude days from the current range.
@@ -743,8 +962,13 @@ class ReportQueryHandler(QueryHandler):
         delta_filter = self._get_filter(delta=True)
         q_table = self._mapper.query_table
         previous_query = q_table.objects.filter(delta_filter)
-        previous_dict = self._create_previous_totals(previous_query,
-                                                     delta_group_by)
+        prev_total_filters = None
+        if self.resolution == 'daily':
+            dates = [entry.get('date') for entry in query_data]
+            prev_total_filters = self._get_previous_totals_filter(dates)
+        previous_dict, prev_total_sum = self._create_previous_totals(previous_query,
+                                                                     delta_group_by,
+                                                                     prev_total_filters)
         for row in query_data:
             key = tuple((row[key] for key in delta_group_by))
             previous_total = previous_dict.get(key, 0)
@@ -762,17 +986,6 @@ class ReportQueryHandler(QueryHandler):
                 current_total_sum = Decimal(query_sum.get('cost', {}).get('value') or 0)
             else:
                 current_total_sum = Decimal(query_sum.get('cost') or 0)
-        delta_field = self._mapper._report_type_map.get('delta_key').get(self._delta)
-        prev_total_sum = previous_query.aggregate(value=delta_field)
-        if self.resolution == 'daily':
-            dates = [entry.get('date') for entry in query_data]
-            prev_total_filters = self._get_previous_totals_filter(dates)
-            if prev_total_filters:
-                prev_total_sum = previous_query\
-                    .filter(prev_total_filters)\
-                    .aggregate(value=delta_field)
-
-        prev_total_sum = Decimal(prev_total_sum.get('value') or 0)
 
         total_delta = current_total_sum - prev_total_sum
         total_delta_percent = self._percent_delta(current_total_sum,
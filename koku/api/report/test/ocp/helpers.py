@@ -28,6 +28,7 @@ from django.db.models.functions import Coalesce
 from faker import Faker
 from tenant_schemas.utils import tenant_context
 
+from api.tags.cache import invalidate_tag_keys
 from api.utils import DateHelper
 from reporting.models import (CostSummary,
                               OCPStorageLineItem,
@@ -165,11 +166,14 @@ class OCPReportDataGenerator:
             self._populate_storage_daily_table()
             self._populate_storage_daily_summary_table()
             self._populate_cost_summary_table()
+            self._populate_cost_summary_rollups()
             self._populate_charge_info()
             self._populate_storage_charge_info()
             self._populate_pod_label_summary_table()
             self._populate_volume_claim_label_summary_table()
             self._populate_volume_label_summary_table()
+            self._populate_labels_dictionary()
+        invalidate_tag_keys(self.tenant.schema_name)
 
     def remove_data_from_tenant(self):
         """Remove the added data."""
@@ -183,6 +187,7 @@ class OCPReportDataGenerator:
                           OCPUsageReport,
                           OCPUsageReportPeriod):
                 table.objects.all().delete()
+        invalidate_tag_keys(self.tenant.schema_name)
 
     def remove_data_from_reporting_common(self):
         """Remove the public report statistics."""
@@ -463,6 +468,31 @@ class OCPReportDataGenerator:
             summary = CostSummary(**entry)
             summary.save()
 
+    def _populate_cost_summary_rollups(self):
+        """Populate the rollups of the cost summary table."""
+        rollups = {
+            'reporting_ocpcosts_summary_by_cluster': '',
+            'reporting_ocpcosts_summary_by_project': ', namespace',
+            'reporting_ocpcosts_summary_by_node': ', node',
+        }
+        with connection.cursor() as cursor:
+            for table, columns in rollups.items():
+                cursor.execute(f"""
+                    DELETE FROM {table};
+
+                    INSERT INTO {table} (cluster_id, cluster_alias{columns}, usage_start,
+                        usage_end, pod_charge_cpu_core_hours, pod_charge_memory_gigabyte_hours,
+                        persistentvolumeclaim_charge_gb_month, infra_cost, project_infra_cost)
+                    SELECT cluster_id, cluster_alias{columns}, usage_start, usage_end,
+                        sum(pod_charge_cpu_core_hours),
+                        sum(pod_charge_memory_gigabyte_hours),
+                        sum(persistentvolumeclaim_charge_gb_month),
+                        sum(infra_cost),
+                        sum(project_infra_cost)
+                    FROM reporting_ocpcosts_summary
+                    GROUP BY cluster_id, cluster_alias{columns}, usage_start, usage_end
+                """)
+
     def create_storage_line_items(self, report_period, report):
         """Create OCP hourly usage line items."""
         vol_gb = random.randint(4, 32)
@@ -615,3 +645,39 @@ class OCPReportDataGenerator:
 
         with connection.cursor() as cursor:
             cursor.execute(raw_sql)
+
+    def _populate_labels_dictionary(self):
+        """Populate the label keys and values of each report period."""
+        raw_sql = """
+            INSERT INTO reporting_ocplabels_dictionary (report_period_id, usage_month, data_source, key, values)
+            SELECT rp.id,
+                date(rp.report_period_start),
+                l.data_source,
+                l.key,
+                array_agg(DISTINCT l.value)
+            FROM (
+                SELECT li.cluster_id, li.usage_start, 'pod' as data_source, key, value
+                FROM reporting_ocpusagelineitem_daily AS li,
+                    jsonb_each_text(li.pod_labels) labels
+
+                UNION ALL
+
+                SELECT li.cluster_id, li.usage_start, 'volume' as data_source, key, value
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolume_labels) labels
+
+                UNION ALL
+
+                SELECT li.cluster_id, li.usage_start, 'volume_claim' as data_source, key, value
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolumeclaim_labels) labels
+            ) l
+            JOIN reporting_ocpusagereportperiod AS rp
+                ON rp.cluster_id = l.cluster_id
+                    AND date_trunc('month', rp.report_period_start) = date_trunc('month', l.usage_start)
+            GROUP BY rp.id, rp.report_period_start, l.data_source, l.key
+            ON CONFLICT (report_period_id, data_source, key) DO NOTHING
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(raw_sql)
@@ -31,7 +31,11 @@ from api.report.test.ocp.helpers import OCPReportDataGenerator
 from api.report.test.ocp_aws.helpers import OCPAWSReportDataGenerator
 from api.tags.ocp.queries import OCPTagQueryHandler
 from api.utils import DateHelper
-from reporting.models import CostSummary, OCPUsageLineItemDailySummary
+from reporting.models import (CostSummary,
+                              CostSummaryByCluster,
+                              CostSummaryByNode,
+                              CostSummaryByProject,
+                              OCPUsageLineItemDailySummary)
 
 
 class OCPReportQueryHandlerTest(IamTestCase):
@@ -452,6 +456,133 @@ class OCPReportQueryHandlerTest(IamTestCase):
             self.assertIsNotNone(handler.query_delta['value'])
             self.assertIsNone(handler.query_delta['percent'])
 
+    def test_ranked_query_matches_ranked_list(self):
+        """Test that ranking in the database matches ranking the rows in Python."""
+        query_params = {'filter': {'resolution': 'daily',
+                                   'time_scope_value': -10,
+                                   'time_scope_units': 'day',
+                                   'limit': 1},
+                        'group_by': {'project': ['*']}}
+        query_string = '?filter[resolution]=daily&' + \
+                       'filter[time_scope_value]=-10&' + \
+                       'filter[time_scope_units]=day&' + \
+                       'filter[limit]=1&' + \
+                       'group_by[project]=*'
+        handler = OCPReportQueryHandler(
+            query_params,
+            query_string,
+            self.tenant,
+            **{'report_type': 'cpu'}
+        )
+
+        q_table = handler._mapper.query_table
+        with tenant_context(self.tenant):
+            query = q_table.objects.filter(handler.query_filter)
+            query_data = query.annotate(**handler.annotations)
+            group_by_value = handler._get_group_by()
+            query_data = query_data.values('date', *group_by_value)\
+                .annotate(**handler.report_annotations)
+            query_data = query_data.annotate(
+                rank=handler.get_rank_window_function(list(group_by_value))
+            )
+
+            ranked_in_db = handler._ranked_list(query_data)
+            db_max_rank = handler.max_rank
+            ranked_in_python = handler._ranked_list(list(query_data))
+
+        def comparable(data):
+            keys = ['date', 'rank', 'project', *handler._mapper.sum_columns]
+            return sorted([{key: row.get(key) for key in keys} for row in data],
+                          key=lambda row: (row['date'], row['rank']))
+
+        self.assertNotEqual(ranked_in_db, [])
+        self.assertTrue(any(row.get('rank') == 2 for row in ranked_in_db))
+        self.assertEqual(comparable(ranked_in_db), comparable(ranked_in_python))
+        self.assertEqual(db_max_rank, handler.max_rank)
+
+    def test_execute_grouping_sets_matches_aggregates(self):
+        """Test that the grouping sets of one query match separate aggregates."""
+        handler = OCPReportQueryHandler(
+            {},
+            '',
+            self.tenant,
+            **{'report_type': 'cpu'}
+        )
+        aggregates = handler._mapper.report_type_map.get('aggregates')
+
+        q_table = handler._mapper.query_table
+        with tenant_context(self.tenant):
+            query = q_table.objects.filter(handler.query_filter)
+            set_rows = handler._execute_grouping_sets(query, ['namespace'], aggregates)
+            expected_total = query.aggregate(**aggregates)
+            expected_rows = query.values('namespace').annotate(**aggregates)
+            expected_rows = {row['namespace']: row for row in expected_rows}
+
+        self.assertEqual(len(set_rows[()]), 1)
+        total = set_rows[()][0]
+        for key in aggregates:
+            self.assertEqual(total.get(key), expected_total.get(key))
+
+        self.assertEqual(len(set_rows[('namespace',)]), len(expected_rows))
+        for row in set_rows[('namespace',)]:
+            expected = expected_rows[row['namespace']]
+            for key in aggregates:
+                self.assertEqual(row.get(key), expected.get(key))
+
+    def test_execute_grouping_sets_rolls_up_fields_outside_the_sets(self):
+        """Test that group by fields left out of every grouping set are rolled up."""
+        handler = OCPReportQueryHandler(
+            {},
+            '',
+            self.tenant,
+            **{'report_type': 'cpu'}
+        )
+        aggregates = handler._mapper.report_type_map.get('aggregates')
+
+        q_table = handler._mapper.query_table
+        with tenant_context(self.tenant):
+            query = q_table.objects.filter(handler.query_filter)
+            set_rows = handler._execute_grouping_sets(query, ['usage_start', 'namespace'], aggregates,
+                                                      grouping_sets=[('namespace',), ()])
+            expected_total = query.aggregate(**aggregates)
+            namespaces = set(query.values_list('namespace', flat=True))
+
+        self.assertEqual(len(set_rows[()]), 1)
+        for key in aggregates:
+            self.assertEqual(set_rows[()][0].get(key), expected_total.get(key))
+        self.assertEqual({row['namespace'] for row in set_rows[('namespace',)]}, namespaces)
+        for row in set_rows[('namespace',)]:
+            self.assertIsNone(row['usage_start'])
+
+    def test_costs_query_routed_to_rollup(self):
+        """Test that costs queries read the narrowest rollup holding their dimensions."""
+        query_params = {'group_by': {'cluster': ['*']}}
+        handler = OCPReportQueryHandler(
+            query_params,
+            '?group_by[cluster]=*',
+            self.tenant,
+            **{'report_type': 'costs'}
+        )
+        self.assertEqual(handler._mapper.query_table, CostSummaryByCluster)
+
+        query_params = {'group_by': {'node': ['*']}}
+        handler = OCPReportQueryHandler(
+            query_params,
+            '?group_by[node]=*',
+            self.tenant,
+            **{'report_type': 'costs'}
+        )
+        self.assertEqual(handler._mapper.query_table, CostSummaryByNode)
+
+        query_params = {'group_by': {'project': ['*']}}
+        handler = OCPReportQueryHandler(
+            query_params,
+            '?group_by[project]=*',
+            self.tenant,
+            **{'report_type': 'costs'}
+        )
+        self.assertEqual(handler._mapper.query_table, CostSummaryByProject)
+
     def test_strip_label_column_name(self):
         """Test that the tag column name is stripped from results."""
         query_params = {}
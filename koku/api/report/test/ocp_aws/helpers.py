@@ -28,6 +28,7 @@ from tenant_schemas.utils import tenant_context
 from api.models import Provider, ProviderAuthentication, ProviderBillingSource
 from api.report.test.ocp.helpers import OCPReportDataGenerator
 from api.report.test.tests_queries import FakeAWSCostData
+from api.tags.cache import invalidate_tag_keys
 from api.utils import DateHelper
 from reporting.models import (AWSAccountAlias,
                               AWSCostEntry,
@@ -118,6 +119,7 @@ class OCPAWSReportDataGenerator(OCPReportDataGenerator):
                     self._populate_ocp_aws_cost_line_item_daily_summary(report_date)
                     self._populate_ocp_aws_cost_line_item_project_daily_summary(report_date)
             self._populate_aws_tag_summary()
+        invalidate_tag_keys(self.tenant.schema_name)
 
     def add_aws_data_to_tenant(self, product='ec2'):
         """Populate tenant with AWS data."""
@@ -0,0 +1,89 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the report response cache."""
+from unittest.mock import Mock
+
+from django.test import SimpleTestCase, override_settings
+
+from api.report.cache import bump_data_generation, get_cached_report
+
+
+@override_settings(REPORT_RESPONSE_CACHE=True)
+class ReportCacheTest(SimpleTestCase):
+    """Tests for the tenant scoped report response cache."""
+
+    schema_name = 'acct_report_cache'
+    params = {'filter': {'time_scope_value': '-10', 'time_scope_units': 'day'},
+              'group_by': {'account': ['*']}}
+    access = {'aws.account': {'read': ['*']}}
+
+    def setUp(self):
+        """Start each test from a new generation."""
+        bump_data_generation(self.schema_name)
+
+    def get_report(self, load, params=None, access=None):
+        """Return the costs report through the cache."""
+        return get_cached_report(self.schema_name, 'aws', 'costs',
+                                 params or self.params, access or self.access,
+                                 'application/json', load)
+
+    def test_get_cached_report(self):
+        """Test that a report is loaded once per generation."""
+        load = Mock(return_value=({'data': [], 'total': {}}, 0))
+
+        first = self.get_report(load)
+        second = self.get_report(load)
+
+        self.assertEqual(first, load.return_value)
+        self.assertEqual(second, load.return_value)
+        load.assert_called_once()
+
+    def test_bump_data_generation(self):
+        """Test that a report is loaded again after the tenant's data changes."""
+        load = Mock(return_value=({'data': []}, 0))
+        self.get_report(load)
+
+        bump_data_generation(self.schema_name)
+        load.return_value = ({'data': [{'date': '2019-07'}]}, 0)
+        output = self.get_report(load)
+
+        self.assertEqual(output, load.return_value)
+        self.assertEqual(load.call_count, 2)
+
+    def test_params_and_access_cached_apart(self):
+        """Test that each query and access has a report of its own."""
+        self.get_report(Mock(return_value=({'data': ['a']}, 0)))
+
+        params = {'filter': {'time_scope_value': '-1', 'time_scope_units': 'month'}}
+        other_params = self.get_report(Mock(return_value=({'data': ['b']}, 0)),
+                                       params=params)
+        access = {'aws.account': {'read': ['123456789']}}
+        other_access = self.get_report(Mock(return_value=({'data': ['c']}, 0)),
+                                       access=access)
+
+        self.assertEqual(other_params, ({'data': ['b']}, 0))
+        self.assertEqual(other_access, ({'data': ['c']}, 0))
+
+    @override_settings(REPORT_RESPONSE_CACHE=False)
+    def test_cache_disabled(self):
+        """Test that reports are always loaded when the cache is disabled."""
+        load = Mock(return_value=({'data': []}, 0))
+
+        self.get_report(load)
+        self.get_report(load)
+
+        self.assertEqual(load.call_count, 2)
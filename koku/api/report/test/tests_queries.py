@@ -37,6 +37,7 @@ from api.report.ocp.query_handler import OCPReportQueryHandler
 from api.report.queries import strip_tag_prefix
 from api.report.test.ocp.helpers import OCPReportDataGenerator
 from api.tags.aws.queries import AWSTagQueryHandler
+from api.tags.cache import invalidate_tag_keys
 from api.utils import DateHelper
 from reporting.models import (AWSAccountAlias,
                               AWSCostEntry,
@@ -585,6 +586,51 @@ class ReportQueryTest(IamTestCase):
         with connection.cursor() as cursor:
             cursor.execute(raw_sql)
 
+    def _populate_tag_dictionary(self):
+        """Populate the tag keys and values of each bill."""
+        raw_sql = """
+            INSERT INTO reporting_awstags_dictionary (cost_entry_bill_id, usage_month, key, values)
+            SELECT l.cost_entry_bill_id,
+                date(b.billing_period_start),
+                l.key,
+                array_agg(DISTINCT l.value)
+            FROM (
+                SELECT li.cost_entry_bill_id, key, value
+                FROM reporting_awscostentrylineitem_daily AS li,
+                    jsonb_each_text(li.tags) labels
+            ) l
+            JOIN reporting_awscostentrybill AS b
+                ON b.id = l.cost_entry_bill_id
+            GROUP BY l.cost_entry_bill_id, b.billing_period_start, l.key
+            ON CONFLICT (cost_entry_bill_id, key) DO NOTHING
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(raw_sql)
+
+    def _populate_cost_summary_rollups(self):
+        """Populate the rollups of the daily summary."""
+        rollups = {
+            'reporting_aws_cost_summary_by_account': '',
+            'reporting_aws_cost_summary_by_service': ', product_code, product_family',
+            'reporting_aws_cost_summary_by_region': ', region, availability_zone',
+        }
+        with connection.cursor() as cursor:
+            for table, columns in rollups.items():
+                cursor.execute(f"""
+                    DELETE FROM {table};
+
+                    INSERT INTO {table} (cost_entry_bill_id, usage_start, usage_end,
+                        usage_account_id, account_alias_id{columns}, currency_code,
+                        unblended_cost)
+                    SELECT cost_entry_bill_id, usage_start, usage_end,
+                        usage_account_id, account_alias_id{columns}, currency_code,
+                        sum(unblended_cost)
+                    FROM reporting_awscostentrylineitem_daily_summary
+                    GROUP BY cost_entry_bill_id, usage_start, usage_end,
+                        usage_account_id, account_alias_id{columns}, currency_code
+                """)
+
     def add_data_to_tenant(self, data, product='ec2'):
         """Populate tenant with data."""
         self.assertIsInstance(data, FakeAWSCostData)
@@ -639,7 +685,10 @@ class ReportQueryTest(IamTestCase):
 
             self._populate_daily_table()
             self._populate_daily_summary_table()
+            self._populate_cost_summary_rollups()
             self._populate_tag_summary_table()
+            self._populate_tag_dictionary()
+        invalidate_tag_keys(self.tenant.schema_name)
 
     def test_transform_null_group(self):
         """Test transform data with null group value."""
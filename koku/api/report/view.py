@@ -31,12 +31,14 @@ from api.common.pagination import ReportPagination, ReportRankedPagination
 from api.models import Tenant, User
 from api.report.aws.query_handler import AWSReportQueryHandler
 from api.report.aws.serializers import QueryParamSerializer
+from api.report.cache import get_cached_report
 from api.report.ocp.query_handler import OCPReportQueryHandler
 from api.report.ocp.serializers import (OCPCostQueryParamSerializer,
                                         OCPInventoryQueryParamSerializer)
 from api.report.ocp_aws.query_handler import OCPAWSReportQueryHandler
 from api.report.ocp_aws.serializers import OCPAWSQueryParamSerializer
 from api.tags.aws.queries import AWSTagQueryHandler
+from api.tags.cache import get_cached_tag_keys
 from api.tags.ocp.queries import OCPTagQueryHandler
 from api.tags.ocp_aws.queries import OCPAWSTagQueryHandler
 from api.tags.serializers import (AWSTagsQueryParamSerializer,
@@ -181,15 +183,18 @@ class ClassMapper(object):
 
 
 def get_tag_keys(request, summary_model):
-    """Get a list of tag keys to validate filters."""
+    """Get the set of tag keys to validate filters."""
     tenant = get_tenant(request.user)
-    with tenant_context(tenant):
-        tags = summary_model.objects.values('key')
-        tag_list = [':'.join(['tag', tag.get('key')]) for tag in tags]
-        tag_list.extend([':'.join(['and:tag', tag.get('key')]) for tag in tags])
-        tag_list.extend([':'.join(['or:tag', tag.get('key')]) for tag in tags])
 
-    return tag_list
+    def load_tag_keys():
+        with tenant_context(tenant):
+            keys = summary_model.objects.values_list('key', flat=True)
+            return {':'.join([prefix, key])
+                    for key in keys
+                    for prefix in ('tag', 'and:tag', 'or:tag')}
+
+    return get_cached_tag_keys(tenant.schema_name, summary_model._meta.db_table,
+                               load_tag_keys)
 
 
 def process_query_parameters(url_data, provider_serializer, tag_keys=None, **kwargs):
@@ -227,7 +232,7 @@ def process_query_parameters(url_data, provider_serializer, tag_keys=None, **kwa
 
 def process_tag_query_params(query_params, tag_keys):
     """Reduce the set of tag keys based on those being queried."""
-    tag_key_set = set(tag_keys)
+    tag_key_set = tag_keys if isinstance(tag_keys, (set, frozenset)) else set(tag_keys)
     param_tag_keys = set()
     for key, value in query_params.items():
         if isinstance(value, dict) or isinstance(value, list):
@@ -375,11 +380,14 @@ def _generic_report(request, provider, report):
     provider_query_hdlr = cm.query_handler(provider, report)
     provider_parameter_serializer = cm.serializer(provider, report)
 
-    tag_keys = []
+    tag_keys = frozenset()
     if report != 'tags':
         tag_models = cm.tag_handler(provider, report)
-        for tag_model in tag_models:
-            tag_keys.extend(get_tag_keys(request, tag_model))
+        tag_key_sets = [get_tag_keys(request, tag_model) for tag_model in tag_models]
+        if len(tag_key_sets) == 1:
+            tag_keys = tag_key_sets[0]
+        elif tag_key_sets:
+            tag_keys = tag_keys.union(*tag_key_sets)
 
     url_data = request.GET.urlencode()
     validation, params = process_query_parameters(
@@ -395,27 +403,36 @@ def _generic_report(request, provider, report):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    handler = provider_query_hdlr(params,
-                                  url_data,
-                                  tenant,
-                                  accept_type=request.META.get('HTTP_ACCEPT'),
-                                  report_type=report,
-                                  tag_keys=tag_keys,
-                                  access=request.user.access)
-    output = handler.execute_query()
-    max_rank = handler.max_rank
-
-    if 'units' in params:
-        from_unit = _find_unit()(output['data'])
-        if from_unit:
-            try:
-                to_unit = params['units']
-                unit_converter = UnitConverter()
-                output = _fill_in_missing_units(from_unit)(output)
-                output = _convert_units(unit_converter, output, to_unit)
-            except (DimensionalityError, UndefinedUnitError):
-                error = {'details': _('Unit conversion failed.')}
-                raise ValidationError(error)
+    def load_report():
+        handler = provider_query_hdlr(params,
+                                      url_data,
+                                      tenant,
+                                      accept_type=request.META.get('HTTP_ACCEPT'),
+                                      report_type=report,
+                                      tag_keys=tag_keys,
+                                      access=request.user.access)
+        output = handler.execute_query()
+
+        if 'units' in params:
+            from_unit = _find_unit()(output['data'])
+            if from_unit:
+                try:
+                    to_unit = params['units']
+                    unit_converter = UnitConverter()
+                    output = _fill_in_missing_units(from_unit)(output)
+                    output = _convert_units(unit_converter, output, to_unit)
+                except (DimensionalityError, UndefinedUnitError):
+                    error = {'details': _('Unit conversion failed.')}
+                    raise ValidationError(error)
+        return output, handler.max_rank
+
+    output, max_rank = get_cached_report(tenant.schema_name,
+                                         provider,
+                                         report,
+                                         params,
+                                         request.user.access,
+                                         request.META.get('HTTP_ACCEPT'),
+                                         load_report)
 
     paginator = get_paginator(params.get('filter', {}), max_rank)
     paginated_result = paginator.paginate_queryset(output, request)
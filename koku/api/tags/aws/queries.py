@@ -16,11 +16,12 @@
 #
 """AWS Tag Query Handling."""
 from api.tags.queries import TagQueryHandler
-from reporting.models import AWSCostEntryLineItemDailySummary
+from reporting.models import AWSCostEntryLineItemDailySummary, AWSTagsDictionary
 
 
 class AWSTagQueryHandler(TagQueryHandler):
     """Handles tag queries and responses for AWS."""
 
     data_sources = [{'db_table': AWSCostEntryLineItemDailySummary,
-                     'db_column': 'tags'}]
+                     'db_column': 'tags',
+                     'dictionary': {'db_table': AWSTagsDictionary}}]
@@ -0,0 +1,71 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Tenant scoped cache of the tag keys of the tag summary tables."""
+import uuid
+
+from django.core.cache import caches
+
+TAG_KEYS_VERSION_KEY = 'tag-keys-version-{schema}'
+TAG_KEYS_CACHE_KEY = 'tag-keys-{schema}-{version}-{table}'
+TAG_KEYS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _get_version(cache, schema_name):
+    """Return the current tag key version of a tenant."""
+    version_key = TAG_KEYS_VERSION_KEY.format(schema=schema_name)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key)
+    return version
+
+
+def get_cached_tag_keys(schema_name, table_name, load):
+    """Return a tenant's tag keys of a summary table.
+
+    Args:
+        schema_name (str): The tenant's schema
+        table_name (str): The tag summary table
+        load (callable): Returns the tag keys on a cache miss
+
+    Returns:
+        (frozenset): The tag keys returned by load, from the cache when present
+
+    """
+    cache = caches['default']
+    version = _get_version(cache, schema_name)
+    if version is None:
+        # The cache can not be reached
+        return frozenset(load())
+
+    cache_key = TAG_KEYS_CACHE_KEY.format(schema=schema_name, version=version,
+                                          table=table_name)
+    tag_keys = cache.get(cache_key)
+    if tag_keys is None:
+        tag_keys = frozenset(load())
+        cache.set(cache_key, tag_keys, TAG_KEYS_CACHE_TIMEOUT)
+    return tag_keys
+
+
+def invalidate_tag_keys(schema_name):
+    """Make the tag keys cached for a tenant stale.
+
+    The tenant moves to a new version, so keys cached under the old one
+    are no longer read and expire on their own.
+    """
+    version_key = TAG_KEYS_VERSION_KEY.format(schema=schema_name)
+    caches['default'].set(version_key, uuid.uuid4().hex, None)
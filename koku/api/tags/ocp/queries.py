@@ -16,6 +16,7 @@
 #
 """OCP Tag Query Handling."""
 from api.tags.queries import TagQueryHandler
+from reporting.models import OCPLabelsDictionary
 from reporting.models import OCPStorageLineItemDailySummary
 from reporting.models import OCPUsageLineItemDailySummary
 
@@ -25,7 +26,11 @@ class OCPTagQueryHandler(TagQueryHandler):
 
     data_sources = [{'db_table': OCPUsageLineItemDailySummary,
                      'db_column': 'pod_labels',
-                     'type': 'pod'},
+                     'type': 'pod',
+                     'dictionary': {'db_table': OCPLabelsDictionary,
+                                    'filter': {'data_source': 'pod'}}},
                     {'db_table': OCPStorageLineItemDailySummary,
                      'db_column': 'volume_labels',
-                     'type': 'storage'}]
+                     'type': 'storage',
+                     'dictionary': {'db_table': OCPLabelsDictionary,
+                                    'filter': {'data_source__in': ['volume', 'volume_claim']}}}]
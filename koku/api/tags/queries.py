@@ -58,6 +58,9 @@ class TagQueryHandler(QueryHandler):
         db_table = (Object) the model object containing tags
         db_column = (str) the field on the model containing tags
         type = (str) [optional] the type of tagging information, used for filtering
+        dictionary = (dict) [optional] the model object holding the tag keys of
+                     each usage month as 'db_table' and the filter selecting this
+                     source's keys as 'filter', used for tag key queries
 
     Example:
         MyCoolTagHandler(TagQueryHandler):
@@ -182,19 +185,49 @@ class TagQueryHandler(QueryHandler):
 
         return composed_filter
 
+    def _can_use_dictionary(self):
+        """Return whether the tag dictionaries can answer the tag key query.
+
+        The dictionaries hold the keys of whole usage months, so they answer
+        monthly time scopes that are not filtered by project or account.
+        """
+        if self.get_time_scope_units() != 'month':
+            return False
+        for filter_key in SUPPORTED_FILTERS:
+            for prefix in ('', 'and:', 'or:'):
+                filter_value = self.get_query_param_data('filter', prefix + filter_key)
+                if filter_value and not TagQueryHandler.has_wildcard(filter_value):
+                    return False
+        return True
+
+    def _get_dictionary_tag_keys(self, dictionary):
+        """Get the tag keys of a data source from its tag dictionary."""
+        tag_keys_query = dictionary.get('db_table').objects\
+            .filter(**dictionary.get('filter', {}))\
+            .filter(usage_month__gte=self.start_datetime.date(),
+                    usage_month__lte=self.end_datetime.date())\
+            .values_list('key', flat=True)\
+            .distinct()
+        return list(tag_keys_query)
+
     def get_tag_keys(self, filters=True):
         """Get a list of tag keys to validate filters."""
         type_filter = self.parameter_filter.get('type')
+        use_dictionary = filters is True and self._can_use_dictionary()
         tag_keys = []
         with tenant_context(self.tenant):
             for source in self.data_sources:
+                if type_filter and type_filter != source.get('type'):
+                    continue
+
+                if source.get('dictionary') and use_dictionary:
+                    tag_keys.extend(self._get_dictionary_tag_keys(source.get('dictionary')))
+                    continue
+
                 tag_keys_query = source.get('db_table').objects
                 if filters is True:
                     tag_keys_query = tag_keys_query.filter(self.query_filter)
 
-                if type_filter and type_filter != source.get('type'):
-                    continue
-
                 tag_keys_query = tag_keys_query.annotate(tag_keys=JSONBObjectKeys(source.get('db_column')))\
                     .values('tag_keys')\
                     .distinct()\
@@ -0,0 +1,68 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the tag key cache."""
+from unittest import TestCase
+from unittest.mock import Mock
+
+from api.tags.cache import get_cached_tag_keys, invalidate_tag_keys
+
+
+class TagKeyCacheTest(TestCase):
+    """Tests for the tenant scoped tag key cache."""
+
+    schema_name = 'acct_tag_cache'
+    table_name = 'reporting_awstags_summary'
+
+    def setUp(self):
+        """Start each test from a new version."""
+        invalidate_tag_keys(self.schema_name)
+        invalidate_tag_keys('acct_other')
+
+    def test_get_cached_tag_keys(self):
+        """Test that tag keys are loaded once per version."""
+        load = Mock(return_value=['tag:app', 'and:tag:app', 'or:tag:app'])
+
+        first = get_cached_tag_keys(self.schema_name, self.table_name, load)
+        second = get_cached_tag_keys(self.schema_name, self.table_name, load)
+
+        self.assertEqual(first, frozenset(load.return_value))
+        self.assertEqual(second, frozenset(load.return_value))
+        load.assert_called_once()
+
+    def test_invalidate_tag_keys(self):
+        """Test that tag keys are loaded again after invalidation."""
+        load = Mock(return_value=['tag:app'])
+        get_cached_tag_keys(self.schema_name, self.table_name, load)
+
+        invalidate_tag_keys(self.schema_name)
+        load.return_value = ['tag:app', 'tag:env']
+        tag_keys = get_cached_tag_keys(self.schema_name, self.table_name, load)
+
+        self.assertEqual(tag_keys, frozenset(['tag:app', 'tag:env']))
+        self.assertEqual(load.call_count, 2)
+
+    def test_tables_and_tenants_cached_apart(self):
+        """Test that each tenant and table has tag keys of its own."""
+        get_cached_tag_keys(self.schema_name, self.table_name, Mock(return_value=['tag:a']))
+
+        other_table = get_cached_tag_keys(self.schema_name, 'reporting_ocpusagepodlabel_summary',
+                                          Mock(return_value=['tag:b']))
+        other_tenant = get_cached_tag_keys('acct_other', self.table_name,
+                                           Mock(return_value=['tag:c']))
+
+        self.assertEqual(other_table, frozenset(['tag:b']))
+        self.assertEqual(other_tenant, frozenset(['tag:c']))
@@ -21,7 +21,9 @@ import logging
 
 from django.db import transaction
 
+from api.provider.models import Provider
 from cost_models.models import CostModel, CostModelMap
+from koku.celery import CELERY as celery
 
 
 LOG = logging.getLogger(__name__)
@@ -34,6 +36,7 @@ class CostModelManager:
         """Initialize properties for CostModelManager."""
         self._model = None
         self._cost_model_uuid = None
+        self._charge_updates = set()
 
         if cost_model_uuid:
             self._model = CostModel.objects.get(uuid=cost_model_uuid)
@@ -57,6 +60,7 @@ class CostModelManager:
             # it to the new model
             CostModelMap.objects.filter(provider_uuid=uuid).delete()
             CostModelMap.objects.create(cost_model=cost_model_obj, provider_uuid=uuid)
+        self.update_charges(provider_uuids)
         return cost_model_obj
 
     @transaction.atomic
@@ -79,6 +83,7 @@ class CostModelManager:
             CostModelMap.objects.filter(provider_uuid=provider_uuid).delete()
             CostModelMap.objects.create(cost_model=self._model,
                                         provider_uuid=provider_uuid)
+        self.update_charges(providers_to_delete | providers_to_create)
 
     def update(self, **data):
         """Update the cost model object."""
@@ -86,6 +91,38 @@ class CostModelManager:
         self._model.description = data.get('description', self._model.description)
         self._model.rates = data.get('rates', self._model.rates)
         self._model.save()
+        if 'rates' in data:
+            self.update_charges(self.get_provider_uuids())
+
+    def update_charges(self, provider_uuids):
+        """Recompute all charges of providers once the cost model change is committed.
+
+        The rates apply to every date, so the charges are updated with
+        force_full. Each provider is updated once per manager.
+        """
+        provider_uuids = {str(uuid) for uuid in provider_uuids} - self._charge_updates
+        if not provider_uuids:
+            return
+        self._charge_updates.update(provider_uuids)
+        transaction.on_commit(lambda: self._send_charge_updates(provider_uuids))
+
+    @staticmethod
+    def _send_charge_updates(provider_uuids):
+        """Queue the full charge updates of providers.
+
+        The cost summary tables are rebuilt from the new charges once the
+        charge update is done.
+        """
+        providers = Provider.objects.filter(uuid__in=provider_uuids).select_related('customer')
+        for provider in providers:
+            LOG.info('Queueing a full charge update of provider %s.', provider.uuid)
+            args = [provider.customer.schema_name, str(provider.uuid)]
+            celery.send_task('masu.processor.tasks.update_charge_info',
+                             args=args,
+                             kwargs={'force_full': True},
+                             link=celery.signature('masu.processor.tasks.update_cost_summary_table',
+                                                   args=args,
+                                                   immutable=True))
 
     def get_provider_uuids(self):
         """Get a list of provider uuids assoicated with rate."""
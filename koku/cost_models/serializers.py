@@ -18,6 +18,7 @@
 from collections import defaultdict
 from decimal import Decimal
 
+from django.db import transaction
 from rest_framework import serializers
 
 from api.metrics.models import CostModelMetricsMap
@@ -333,6 +334,7 @@ class CostModelSerializer(serializers.Serializer):
         """Create the cost model object in the database."""
         return CostModelManager().create(**validated_data)
 
+    @transaction.atomic
     def update(self, instance, validated_data, *args, **kwargs):
         """Update the rate object in the database."""
         provider_uuids = validated_data.pop('provider_uuids', [])
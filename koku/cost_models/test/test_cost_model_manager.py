@@ -15,6 +15,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Test the Cost Model Manager."""
+from unittest.mock import patch
 
 from tenant_schemas.utils import tenant_context
 
@@ -279,3 +280,48 @@ class CostModelManagerTest(IamTestCase):
 
             cost_model_map = CostModelMap.objects.filter(cost_model=cost_model_obj)
             self.assertEqual(len(cost_model_map), 0)
+
+    @patch('cost_models.cost_model_manager.celery')
+    @patch('cost_models.cost_model_manager.transaction.on_commit', side_effect=lambda func: func())
+    def test_rate_changes_update_all_charges(self, _, mock_celery):
+        """Test that a cost model change queues one full charge update per provider."""
+        provider = Provider.objects.create(name='sample_provider',
+                                           created_by=self.user,
+                                           customer=self.customer)
+        data = {
+            'name': 'Test Cost Model',
+            'description': 'Test',
+            'provider_uuids': [provider.uuid],
+            'rates': [
+                {
+                    'metric': {'name': CostModelMetricsMap.OCP_METRIC_CPU_CORE_USAGE_HOUR},
+                    'source_type': 'OCP',
+                    'tiered_rates': [{'unit': 'USD', 'value': 0.22}]
+                }
+            ]
+        }
+        expected_call = (('masu.processor.tasks.update_charge_info',),
+                         {'args': [self.customer.schema_name, str(provider.uuid)],
+                          'kwargs': {'force_full': True},
+                          'link': mock_celery.signature.return_value})
+
+        with tenant_context(self.tenant):
+            cost_model_obj = CostModelManager().create(**data)
+        self.assertEqual(mock_celery.send_task.call_args_list, [expected_call])
+        mock_celery.signature.assert_called_once_with(
+            'masu.processor.tasks.update_cost_summary_table',
+            args=[self.customer.schema_name, str(provider.uuid)],
+            immutable=True
+        )
+
+        mock_celery.reset_mock()
+        with tenant_context(self.tenant):
+            manager = CostModelManager(cost_model_uuid=cost_model_obj.uuid)
+            manager.update_provider_uuids([str(provider.uuid)])
+            manager.update(rates=data['rates'])
+        self.assertEqual(mock_celery.send_task.call_args_list, [expected_call])
+
+        mock_celery.reset_mock()
+        with tenant_context(self.tenant):
+            CostModelManager(cost_model_uuid=cost_model_obj.uuid).update(name='Renamed')
+        mock_celery.send_task.assert_not_called()
@@ -184,6 +184,11 @@ else:
         }
     }
 
+# Serve report responses from the cache until the tenant's data changes
+REPORT_RESPONSE_CACHE = ENVIRONMENT.bool('REPORT_RESPONSE_CACHE', default=False)
+REPORT_RESPONSE_CACHE_TIMEOUT = ENVIRONMENT.int('REPORT_RESPONSE_CACHE_TIMEOUT',
+                                                default=24 * 60 * 60)
+
 DATABASES = {
     'default': database.config()
 }
@@ -51,6 +51,7 @@ def update_charge(request):
     async_result = update_charge_info.delay(
         schema_name,
         provider_uuid,
+        force_full=True
     )
 
     return Response({'Update Charge Task ID': str(async_result)})
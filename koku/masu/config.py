@@ -95,6 +95,58 @@ class Config:
 
     REPORT_PROCESSING_BATCH_SIZE = 100000
 
+    # Stream line items from the report file straight into a COPY
+    # instead of staging each batch in memory
+    REPORT_PROCESSING_STREAM_COPY = False if os.getenv(
+        'REPORT_PROCESSING_STREAM_COPY', 'False') == 'False' else True
+
+    # Create report dimension rows (products, pricing, etc.) with
+    # set-based inserts per batch instead of one insert per new row
+    REPORT_PROCESSING_BULK_DIMENSIONS = False if os.getenv(
+        'REPORT_PROCESSING_BULK_DIMENSIONS', 'False') == 'False' else True
+
+    # Fan the files of a manifest out as separate processing tasks
+    REPORT_PROCESSING_PARALLEL_FILES = False if os.getenv(
+        'REPORT_PROCESSING_PARALLEL_FILES', 'False') == 'False' else True
+
+    # Transform AWS line items a column at a time over chunks of rows
+    AWS_REPORT_COLUMNAR_TRANSFORM = False if os.getenv(
+        'AWS_REPORT_COLUMNAR_TRANSFORM', 'False') == 'False' else True
+    REPORT_PROCESSING_COLUMNAR_CHUNK_SIZE = 10000
+
+    # The most dimension ids (products, cost entries, ...) a processor holds
+    # in memory, and the rows whose missing ids are fetched in one query
+    REPORT_PROCESSING_DIMENSION_CACHE_SIZE = 100000
+    REPORT_PROCESSING_PREFETCH_SIZE = 1000
+
+    # Load the AWS line items of each bill into a child table of their own,
+    # so reprocessing a billing period drops and recreates the child table
+    # instead of deleting its rows
+    AWS_LINE_ITEM_PARTITION_SWAP = False if os.getenv(
+        'AWS_LINE_ITEM_PARTITION_SWAP', 'False') == 'False' else True
+
+    # Copy all of an OCP file's line items into an unlogged staging table
+    # and merge them into the line item table once per file
+    OCP_PROCESSING_STAGED_MERGE = False if os.getenv(
+        'OCP_PROCESSING_STAGED_MERGE', 'False') == 'False' else True
+
+    # Keep OCP-on-AWS line item matches in a table and only match again
+    # the days whose daily line items changed
+    OCP_AWS_MATCH_INDEX = False if os.getenv(
+        'OCP_AWS_MATCH_INDEX', 'False') == 'False' else True
+
+    # Keep the rows of each usage month of the daily and daily summary
+    # tables in a child table of their own, created during summarization
+    REPORTING_MONTHLY_PARTITIONS = False if os.getenv(
+        'REPORTING_MONTHLY_PARTITIONS', 'False') == 'False' else True
+
+    # Analyze the tables a task changed when it finishes and vacuum them
+    # in a deferred task, queued once per schema and table at a time
+    REPORTING_DEFERRED_VACUUM = False if os.getenv(
+        'REPORTING_DEFERRED_VACUUM', 'False') == 'False' else True
+    REPORTING_VACUUM_DELAY = int(os.getenv('REPORTING_VACUUM_DELAY', '900'))
+    REPORTING_VACUUM_LOCK_TIMEOUT = 7200
+
     AWS_DATETIME_STR_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
     OCP_DATETIME_STR_FORMAT = '%Y-%m-%d %H:%M:%S +0000 UTC'
     AZURE_DATETIME_STR_FORMAT = '%Y-%m-%d'
@@ -132,3 +184,19 @@ class Config:
     # Flag to signal whether or not to connect to upload service
     KAFKA_CONNECT = False if os.getenv(
         'KAFKA_CONNECT', 'False') == 'False' else True
+
+    # Number of OCP payloads downloaded and extracted at the same time
+    KAFKA_PAYLOAD_CONCURRENCY = int(os.getenv('KAFKA_PAYLOAD_CONCURRENCY', '4'))
+
+    # Bytes of an OCP payload read from the download at a time
+    KAFKA_PAYLOAD_CHUNK_SIZE = 1024 * 1024
+
+    # Queue the processing of extracted OCP payloads as Celery tasks instead
+    # of processing them in the Kafka listener
+    OCP_PROCESSING_CELERY_DISPATCH = False if os.getenv(
+        'OCP_PROCESSING_CELERY_DISPATCH', 'False') == 'False' else True
+
+    # Seconds a worker holds a cluster's processing lock at most, and
+    # seconds before a task waiting on the lock is retried
+    OCP_CLUSTER_LOCK_TIMEOUT = 7200
+    OCP_CLUSTER_LOCK_RETRY_DELAY = 60
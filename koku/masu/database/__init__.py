@@ -22,12 +22,18 @@ AWS_CUR_TABLE_MAP = {
     'line_item': 'reporting_awscostentrylineitem',
     'line_item_daily': 'reporting_awscostentrylineitem_daily',
     'line_item_daily_summary': 'reporting_awscostentrylineitem_daily_summary',
+    'cost_summary_by_account': 'reporting_aws_cost_summary_by_account',
+    'cost_summary_by_service': 'reporting_aws_cost_summary_by_service',
+    'cost_summary_by_region': 'reporting_aws_cost_summary_by_region',
     'product': 'reporting_awscostentryproduct',
     'pricing': 'reporting_awscostentrypricing',
     'reservation': 'reporting_awscostentryreservation',
     'tags_summary': 'reporting_awstags_summary',
+    'tags_dictionary': 'reporting_awstags_dictionary',
     'ocp_on_aws_daily_summary': 'reporting_ocpawscostlineitem_daily_summary',
-    'ocp_on_aws_project_daily_summary': 'reporting_ocpawscostlineitem_project_daily_summary'
+    'ocp_on_aws_project_daily_summary': 'reporting_ocpawscostlineitem_project_daily_summary',
+    'ocp_on_aws_match_index': 'reporting_ocpawsmatchindex',
+    'ocp_on_aws_match_state': 'reporting_ocpawsmatchstate'
 }
 
 OCP_REPORT_TABLE_MAP = {
@@ -44,7 +50,11 @@ OCP_REPORT_TABLE_MAP = {
     'storage_line_item_daily_summary': 'reporting_ocpstoragelineitem_daily_summary',
     'volume_claim_label_summary': 'reporting_ocpstoragevolumeclaimlabel_summary',
     'volume_label_summary': 'reporting_ocpstoragevolumelabel_summary',
-    'cost_summary': 'reporting_ocpcosts_summary'
+    'labels_dictionary': 'reporting_ocplabels_dictionary',
+    'cost_summary': 'reporting_ocpcosts_summary',
+    'cost_summary_by_cluster': 'reporting_ocpcosts_summary_by_cluster',
+    'cost_summary_by_project': 'reporting_ocpcosts_summary_by_project',
+    'cost_summary_by_node': 'reporting_ocpcosts_summary_by_node'
 }
 
 AZURE_REPORT_TABLE_MAP = {
@@ -56,3 +66,27 @@ AZURE_REPORT_TABLE_MAP = {
     'line_item_daily_summary': 'reporting_azurecostentrylineitem_daily_summary',
     'tags_summary': 'reporting_azuretags_summary'
 }
+
+# Daily tables split into a child table per usage month
+MONTHLY_PARTITIONED_TABLES = (
+    AWS_CUR_TABLE_MAP['line_item_daily'],
+    AWS_CUR_TABLE_MAP['line_item_daily_summary'],
+    OCP_REPORT_TABLE_MAP['line_item_daily'],
+    OCP_REPORT_TABLE_MAP['line_item_daily_summary'],
+    OCP_REPORT_TABLE_MAP['storage_line_item_daily'],
+    OCP_REPORT_TABLE_MAP['storage_line_item_daily_summary'],
+)
+
+# Rollups of the cost summaries and the columns each keeps besides the
+# usage dates and the account or cluster
+AWS_COST_SUMMARY_ROLLUPS = {
+    AWS_CUR_TABLE_MAP['cost_summary_by_account']: (),
+    AWS_CUR_TABLE_MAP['cost_summary_by_service']: ('product_code', 'product_family'),
+    AWS_CUR_TABLE_MAP['cost_summary_by_region']: ('region', 'availability_zone'),
+}
+
+OCP_COST_SUMMARY_ROLLUPS = {
+    OCP_REPORT_TABLE_MAP['cost_summary_by_cluster']: (),
+    OCP_REPORT_TABLE_MAP['cost_summary_by_project']: ('namespace',),
+    OCP_REPORT_TABLE_MAP['cost_summary_by_node']: ('node',),
+}
@@ -18,12 +18,14 @@
 import logging
 import pkgutil
 import uuid
+from datetime import timedelta
 
 from dateutil.parser import parse
 from tenant_schemas.utils import schema_context
 
+from api.tags.cache import invalidate_tag_keys
 from masu.config import Config
-from masu.database import AWS_CUR_TABLE_MAP
+from masu.database import AWS_COST_SUMMARY_ROLLUPS, AWS_CUR_TABLE_MAP
 from masu.database.report_db_accessor_base import ReportDBAccessorBase
 from masu.external.date_accessor import DateAccessor
 from reporting.provider.aws.models import (AWSCostEntry,
@@ -56,12 +58,15 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
         self._schema_name = schema
         self.date_accessor = DateAccessor()
 
-    def get_cost_entry_bills(self):
-        """Get all cost entry bill objects."""
+    def get_cost_entry_bills(self, provider_id=None):
+        """Get all cost entry bill objects, optionally of one provider."""
         table_name = AWSCostEntryBill
         with schema_context(self.schema):
             columns = ['id', 'bill_type', 'payer_account_id', 'billing_period_start', 'provider_id']
-            bills = self._get_db_obj_query(table_name).values(*columns)
+            bills = self._get_db_obj_query(table_name)
+            if provider_id is not None:
+                bills = bills.filter(provider_id=provider_id)
+            bills = bills.values(*columns)
             return {(bill['bill_type'], bill['payer_account_id'],
                      bill['billing_period_start'], bill['provider_id']): bill['id']
                     for bill in bills}
@@ -121,6 +126,15 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
             summary_item_query = base_query.filter(cost_entry_bill_id=bill_id)
             return summary_item_query
 
+    def get_cost_summary_rollup_queries_for_billid(self, bill_id):
+        """Get queries of the AWS cost summary rollup items for a given bill."""
+        rollup_queries = []
+        with schema_context(self.schema):
+            for table_name in AWS_COST_SUMMARY_ROLLUPS:
+                base_query = self._get_db_obj_query(table_name)
+                rollup_queries.append(base_query.filter(cost_entry_bill_id=bill_id))
+        return rollup_queries
+
     def get_ocp_aws_summary_query_for_billid(self, bill_id):
         """Get the OCP-on-AWS report summary item for a given bill query."""
         table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
@@ -135,6 +149,18 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
         summary_item_query = base_query.filter(cost_entry_bill_id=bill_id)
         return summary_item_query
 
+    def get_ocp_aws_match_index_query_for_billid(self, bill_id):
+        """Get the OCP-on-AWS match index items for a given bill query."""
+        table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_match_index']
+        base_query = self._get_db_obj_query(table_name)
+        return base_query.filter(cost_entry_bill_id=bill_id)
+
+    def get_ocp_aws_match_state_query_for_billid(self, bill_id):
+        """Get the OCP-on-AWS match state items for a given bill query."""
+        table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_match_state']
+        base_query = self._get_db_obj_query(table_name)
+        return base_query.filter(cost_entry_bill_id=bill_id)
+
     def get_cost_entry_query_for_billid(self, bill_id):
         """Get the AWS cost entry data for a given bill query."""
         table_name = AWSCostEntry
@@ -143,15 +169,44 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
             line_item_query = base_query.filter(bill_id=bill_id)
             return line_item_query
 
-    def get_cost_entries(self):
-        """Make a mapping of cost entries by start time."""
+    def get_cost_entries(self, bill_ids=None):
+        """Make a mapping of cost entries by start time, optionally of some bills."""
         table_name = AWSCostEntry
         with schema_context(self.schema):
             cost_entries = self._get_db_obj_query(table_name).all()
+            if bill_ids is not None:
+                cost_entries = cost_entries.filter(bill_id__in=bill_ids)
 
             return {(ce.bill_id, ce.interval_start.strftime(self._datetime_format)): ce.id
                     for ce in cost_entries}
 
+    def get_cost_entries_for_keys(self, keys):
+        """Map (bill id, interval start) keys to the ids of stored cost entries.
+
+        Interval starts are matched as formatted in the report, to the
+        second, so the keys found are the keys asked for.
+        """
+        table_name = AWSCostEntry
+        keys = set(keys)
+        bill_ids = {bill_id for bill_id, _ in keys if bill_id is not None}
+        starts = [parse(start) for _, start in keys if start]
+        if not bill_ids or not starts:
+            return {}
+        with schema_context(self.schema):
+            cost_entries = self._get_db_obj_query(table_name)\
+                .filter(bill_id__in=bill_ids,
+                        interval_start__gte=min(starts),
+                        interval_start__lt=max(starts) + timedelta(seconds=1))\
+                .values('id', 'bill_id', 'interval_start')
+
+            found = {}
+            for cost_entry in cost_entries:
+                key = (cost_entry['bill_id'],
+                       cost_entry['interval_start'].strftime(self._datetime_format))
+                if key in keys:
+                    found[key] = cost_entry['id']
+            return found
+
     def get_products(self):
         """Make a mapping of product sku to product objects."""
         table_name = AWSCostEntryProduct
@@ -162,6 +217,18 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
             return {(product['sku'], product['product_name'], product['region']): product['id']
                     for product in products}
 
+    def get_products_for_keys(self, keys):
+        """Map (sku, product name, region) keys to the ids of stored products."""
+        table_name = AWSCostEntryProduct
+        skus = {key[0] for key in keys}
+        with schema_context(self.schema):
+            columns = ['id', 'sku', 'product_name', 'region']
+            products = self._get_db_obj_query(table_name, columns=columns)\
+                .filter(sku__in=skus)
+
+            return {(product['sku'], product['product_name'], product['region']): product['id']
+                    for product in products}
+
     def get_pricing(self):
         """Make a mapping of pricing values string to pricing objects."""
         table_name = AWSCostEntryPricing
@@ -180,6 +247,16 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
 
             return {res['reservation_arn']: res['id'] for res in reservs}
 
+    def get_reservations_for_keys(self, arns):
+        """Map reservation ARNs to the ids of stored reservations."""
+        table_name = AWSCostEntryReservation
+        with schema_context(self.schema):
+            columns = ['id', 'reservation_arn']
+            reservs = self._get_db_obj_query(table_name, columns=columns)\
+                .filter(reservation_arn__in=arns)
+
+            return {res['reservation_arn']: res['id'] for res in reservs}
+
     def populate_line_item_daily_table(self, start_date, end_date, bill_ids):
         """Populate the daily aggregate of line items table.
 
@@ -231,6 +308,45 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
         )
         self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
 
+    def populate_cost_summary_rollup_tables(self, start_date, end_date, bill_ids):
+        """Populate the rollups of the daily summary from the daily summary.
+
+        Args:
+            start_date (datetime.date) The date to start populating the tables.
+            end_date (datetime.date) The date to end on.
+            bill_ids (list) The bills to populate the tables for.
+
+        Returns
+            (None)
+
+        """
+        daily_summary = self._get_db_obj_query(
+            AWS_CUR_TABLE_MAP['line_item_daily_summary']
+        ).filter(cost_entry_bill_id__in=bill_ids)
+        if start_date is None:
+            start_date_qry = daily_summary.order_by('usage_start').first()
+            start_date = str(start_date_qry.usage_start.date()) if start_date_qry else None
+        if end_date is None:
+            end_date_qry = daily_summary.order_by('-usage_start').first()
+            end_date = str(end_date_qry.usage_start.date()) if end_date_qry else None
+        if not (bill_ids and start_date and end_date):
+            return
+
+        rollup_sql = pkgutil.get_data(
+            'masu.database',
+            'sql/reporting_aws_cost_summary_rollup.sql'
+        ).decode('utf-8')
+        for table_name, dimensions in AWS_COST_SUMMARY_ROLLUPS.items():
+            summary_sql = rollup_sql.format(
+                rollup_table=table_name,
+                dimensions=''.join(f',\n        {column}' for column in dimensions),
+                start_date=start_date,
+                end_date=end_date,
+                cost_entry_bill_ids=','.join(bill_ids),
+                schema=self.schema
+            )
+            self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+
     def mark_bill_as_finalized(self, bill_id):
         """Mark a bill in the database as finalized."""
         table_name = AWSCostEntryBill
@@ -243,16 +359,48 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
                 bill.save()
 
     # pylint: disable=invalid-name
-    def populate_tags_summary_table(self):
-        """Populate the line item aggregated totals data table."""
+    def populate_tags_summary_table(self, start_date=None, end_date=None, bill_ids=None):
+        """Populate the line item aggregated totals data table.
+
+        The tags of the daily line items in the window are added to the
+        tag dictionary, and the summary is built from the dictionary.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            bill_ids (list) A list of bill IDs.
+
+        Returns
+            (None)
+
+        """
         table_name = AWS_CUR_TABLE_MAP['tags_summary']
 
+        conditions = []
+        if start_date and end_date:
+            conditions.append(f"date(li.usage_start) >= '{start_date}'")
+            conditions.append(f"date(li.usage_start) <= '{end_date}'")
+        if bill_ids:
+            ids = ','.join(bill_ids)
+            conditions.append(f'li.cost_entry_bill_id IN ({ids})')
+        where_clause = ''
+        if conditions:
+            where_clause = 'WHERE ' + ' AND '.join(conditions)
+
+        dictionary_sql = pkgutil.get_data(
+            'masu.database',
+            'sql/reporting_awstags_dictionary.sql'
+        )
         agg_sql = pkgutil.get_data(
             'masu.database',
             f'sql/reporting_awstags_summary.sql'
         )
-        agg_sql = agg_sql.decode('utf-8').format(schema=self.schema)
-        self._commit_and_vacuum(table_name, agg_sql)
+        agg_sql = (dictionary_sql + agg_sql).decode('utf-8').format(
+            schema=self.schema,
+            where_clause=where_clause
+        )
+        self._commit_and_vacuum(table_name, agg_sql, start_date, end_date)
+        invalidate_tag_keys(self.schema)
 
     def populate_ocp_on_aws_cost_daily_summary(self, start_date, end_date,
                                                cluster_id, bill_ids):
@@ -275,11 +423,21 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
             ocp_where_clause = f"AND cluster_id = '{cluster_id}'"
 
         table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
+        if Config.OCP_AWS_MATCH_INDEX:
+            match_sql = pkgutil.get_data(
+                'masu.database',
+                'sql/reporting_ocpawsmatchindex.sql'
+            )
+        else:
+            match_sql = pkgutil.get_data(
+                'masu.database',
+                'sql/reporting_ocpawscostlineitem_daily_match.sql'
+            )
         summary_sql = pkgutil.get_data(
             'masu.database',
             'sql/reporting_ocpawscostlineitem_daily_summary.sql'
         )
-        summary_sql = summary_sql.decode('utf-8').format(
+        summary_sql = (match_sql + b'\n' + summary_sql).decode('utf-8').format(
             uuid=str(uuid.uuid4()).replace('-', '_'),
             start_date=start_date, end_date=end_date,
             aws_where_clause=aws_where_clause,
@@ -58,6 +58,21 @@ class OCPRateDBAccessor(ReportDBAccessorBase):
 
         return results[0][0] if len(results) == 1 else None
 
+    def get_cost_model_timestamp(self):
+        """Return when the provider's cost model was last changed, if it has one."""
+        query_sql = f"""
+            SELECT max(cost_model_table.updated_timestamp)
+            FROM {self.schema}.cost_model as cost_model_table
+            JOIN {self.schema}.cost_model_map as map
+                ON cost_model_table.uuid = map.cost_model_id
+            WHERE map.provider_uuid = '{self.provider_uuid}'
+            """
+        with connection.cursor() as cursor:
+            cursor.execute(query_sql)
+            result = cursor.fetchone()
+
+        return result[0] if result else None
+
     def _make_rate_by_metric_map(self):
         """Convert the rates JSON list to a dict keyed on metric."""
         metric_rate_map = {}
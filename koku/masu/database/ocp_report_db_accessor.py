@@ -20,11 +20,15 @@ import pkgutil
 import uuid
 
 from dateutil.parser import parse
-from django.db import connection
+from django.db import connection, transaction
 from tenant_schemas.utils import schema_context
 
+from api.tags.cache import invalidate_tag_keys
 from masu.config import Config
-from masu.database import AWS_CUR_TABLE_MAP, OCP_REPORT_TABLE_MAP
+from masu.database import (AWS_CUR_TABLE_MAP,
+                           OCP_COST_SUMMARY_ROLLUPS,
+                           OCP_REPORT_TABLE_MAP)
+from masu.database.koku_database_access import KokuDBAccess
 from masu.database.report_db_accessor_base import ReportDBAccessorBase
 from reporting.provider.ocp.models import (OCPStorageLineItemDailySummary,
                                            OCPUsageLineItemDailySummary,
@@ -83,6 +87,44 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             delete_sql = f'DELETE FROM {temp_table_name}'
             cursor.execute(delete_sql)
 
+    def merge_staging_table(self, table_name, staging_table_name, columns,
+                            conflict_columns):
+        """Upsert the deduplicated rows of a staging table in one statement.
+
+        Of the staged rows sharing a conflict key the last one copied wins,
+        as it would have had the rows been merged batch by batch. The caller
+        drops the staging table afterwards.
+
+        Args:
+            table_name (str): The main table to insert into
+            staging_table_name (str): The staging table to pull from
+            columns (list): A list of columns to use in the insert logic
+            conflict_columns (list): The columns of the table's unique key
+
+        Returns:
+            (None)
+
+        """
+        column_str = ','.join(columns)
+        conflict_col_str = ','.join(conflict_columns)
+
+        set_clause = ','.join([f'{column} = excluded.{column}'
+                               for column in columns])
+        upsert_sql = f"""
+            INSERT INTO {table_name} ({column_str})
+                SELECT DISTINCT ON ({conflict_col_str}) {column_str}
+                FROM {staging_table_name}
+                ORDER BY {conflict_col_str}, staging_row_seq DESC
+                ON CONFLICT ({conflict_col_str}) DO UPDATE
+                SET {set_clause}
+            """
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(upsert_sql)
+            cursor.db.commit()
+
     def get_current_usage_report(self):
         """Get the most recent usage report object."""
         table_name = OCP_REPORT_TABLE_MAP['report']
@@ -210,6 +252,20 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             summary_item_query = base_query.filter(cluster_id=cluster_identifier)
             return summary_item_query
 
+    def get_ocp_aws_match_index_query_for_cluster_id(self, cluster_identifier):
+        """Get the OCP-on-AWS match index items for a given cluster id query."""
+        table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_match_index']
+        with schema_context(self.schema):
+            base_query = self._get_db_obj_query(table_name)
+            return base_query.filter(cluster_id=cluster_identifier)
+
+    def get_ocp_aws_match_state_query_for_cluster_id(self, cluster_identifier):
+        """Get the OCP-on-AWS match state items for a given cluster id query."""
+        table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_match_state']
+        with schema_context(self.schema):
+            base_query = self._get_db_obj_query(table_name)
+            return base_query.filter(cluster_id=cluster_identifier)
+
     def get_report_query_report_period_id(self, report_period_id):
         """Get the usage report line item for a report id query."""
         table_name = OCP_REPORT_TABLE_MAP['report']
@@ -381,12 +437,28 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         )
         self._commit_and_vacuum(table_name, daily_sql, start_date, end_date)
 
-    def populate_pod_charge(self, cpu_temp_table, mem_temp_table):
+    @staticmethod
+    def _charge_where_clause(start_date=None, end_date=None, cluster_id=None):
+        """Build the WHERE clause limiting a charge update to a window."""
+        conditions = ['1 = 1']
+        if cluster_id:
+            conditions.append(f"cluster_id = '{cluster_id}'")
+        if start_date:
+            conditions.append(f"usage_start >= '{start_date}'::date")
+        if end_date:
+            conditions.append(f"usage_start < '{end_date}'::date + INTERVAL '1 day'")
+        return '\n    AND '.join(conditions)
+
+    def populate_pod_charge(self, cpu_charge, mem_charge, start_date=None,
+                            end_date=None, cluster_id=None):
         """Populate the memory and cpu charge on daily summary table.
 
         Args:
-            cpu_temp_table (String) Name of cpu charge temp table
-            mem_temp_table (String) Name of mem charge temp table
+            cpu_charge (String) SQL expression of a row's cpu charge
+            mem_charge (String) SQL expression of a row's memory charge
+            start_date (datetime.date, Optional) The first usage date to update
+            end_date (datetime.date, Optional) The last usage date to update
+            cluster_id (String, Optional) Cluster Identifier
 
         Returns
             (None)
@@ -399,18 +471,23 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             'sql/reporting_ocpusagelineitem_daily_pod_charge.sql'
         )
         charge_line_sql = daily_charge_sql.decode('utf-8').format(
-            cpu_temp=cpu_temp_table,
-            mem_temp=mem_temp_table,
+            cpu_charge=cpu_charge,
+            mem_charge=mem_charge,
+            where_clause=self._charge_where_clause(start_date, end_date, cluster_id),
             schema=self.schema
         )
 
-        self._commit_and_vacuum(table_name, charge_line_sql)
+        self._commit_and_vacuum(table_name, charge_line_sql, start_date, end_date)
 
-    def populate_storage_charge(self, temp_table_name):
+    def populate_storage_charge(self, storage_charge, start_date=None,
+                                end_date=None, cluster_id=None):
         """Populate the storage charge into the daily summary table.
 
         Args:
-            storage_charge (Float) Storage charge.
+            storage_charge (String) SQL expression of a row's storage charge
+            start_date (datetime.date, Optional) The first usage date to update
+            end_date (datetime.date, Optional) The last usage date to update
+            cluster_id (String, Optional) Cluster Identifier
 
         Returns
             (None)
@@ -423,10 +500,11 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             'sql/reporting_ocp_storage_charge.sql'
         )
         charge_line_sql = daily_charge_sql.decode('utf-8').format(
-            temp_table=temp_table_name,
+            storage_charge=storage_charge,
+            where_clause=self._charge_where_clause(start_date, end_date, cluster_id),
             schema=self.schema
         )
-        self._commit_and_vacuum(table_name, charge_line_sql)
+        self._commit_and_vacuum(table_name, charge_line_sql, start_date, end_date)
 
     def populate_line_item_daily_summary_table(self, start_date, end_date, cluster_id):
         """Populate the daily aggregate of line items table.
@@ -512,6 +590,45 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             )
             self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
 
+    def populate_cost_summary_rollup_tables(self, cluster_id, start_date=None, end_date=None):
+        """Populate the rollups of the cost summary from the cost summary.
+
+        Args:
+            cluster_id (String) Cluster Identifier
+            start_date (datetime.date) The date to start populating the tables.
+            end_date (datetime.date) The date to end on.
+
+        Returns
+            (None)
+
+        """
+        cost_summary = self._get_db_obj_query(
+            OCP_REPORT_TABLE_MAP['cost_summary']
+        ).filter(cluster_id=cluster_id)
+        if start_date is None:
+            start_date_qry = cost_summary.order_by('usage_start').first()
+            start_date = str(start_date_qry.usage_start) if start_date_qry else None
+        if end_date is None:
+            end_date_qry = cost_summary.order_by('-usage_start').first()
+            end_date = str(end_date_qry.usage_start) if end_date_qry else None
+        if not (start_date and end_date):
+            return
+
+        rollup_sql = pkgutil.get_data(
+            'masu.database',
+            'sql/reporting_ocpcosts_summary_rollup.sql'
+        ).decode('utf-8')
+        for table_name, dimensions in OCP_COST_SUMMARY_ROLLUPS.items():
+            summary_sql = rollup_sql.format(
+                rollup_table=table_name,
+                dimensions=''.join(f',\n        {column}' for column in dimensions),
+                start_date=start_date,
+                end_date=end_date,
+                cluster_id=cluster_id,
+                schema=self.schema
+            )
+            self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+
     def get_cost_summary_for_clusterid(self, cluster_identifier):
         """Get the cost summary for a cluster id query."""
         table_name = OCP_REPORT_TABLE_MAP['cost_summary']
@@ -519,41 +636,100 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         cost_summary_query = base_query.filter(cluster_id=cluster_identifier)
         return cost_summary_query
 
-    # pylint: disable=invalid-name
-    def populate_pod_label_summary_table(self):
-        """Populate the line item aggregated totals data table."""
-        table_name = OCP_REPORT_TABLE_MAP['pod_label_summary']
+    def get_cost_summary_rollups_for_clusterid(self, cluster_identifier):
+        """Get queries of the cost summary rollups for a cluster id."""
+        rollup_queries = []
+        for table_name in OCP_COST_SUMMARY_ROLLUPS:
+            base_query = self._get_db_obj_query(table_name)
+            rollup_queries.append(base_query.filter(cluster_id=cluster_identifier))
+        return rollup_queries
 
-        agg_sql = pkgutil.get_data(
-            'masu.database',
-            f'sql/reporting_ocpusagepodlabel_summary.sql'
-        )
-        agg_sql = agg_sql.decode('utf-8').format(schema=self.schema)
+    # pylint: disable=too-many-arguments
+    def _populate_label_summary_table(self, table_name, summary_sql_file,
+                                      line_item_table, labels_column, data_source,
+                                      start_date=None, end_date=None, cluster_id=None):
+        """Populate a label summary table from the label dictionary.
 
-        self._commit_and_vacuum(table_name, agg_sql)
+        The labels of the daily line items in the window are added to the
+        label dictionary first.
 
-    # pylint: disable=invalid-name
-    def populate_volume_claim_label_summary_table(self):
-        """Populate the OCP volume claim label summary table."""
-        table_name = OCP_REPORT_TABLE_MAP['volume_claim_label_summary']
+        Args:
+            table_name (str) The label summary table.
+            summary_sql_file (str) The SQL file populating the summary table.
+            line_item_table (str) The daily line item table with the labels.
+            labels_column (str) The column of the line item table with the labels.
+            data_source (str) The labels' data source in the dictionary.
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (str) The cluster to populate the table for.
+
+        Returns
+            (None)
 
+        """
+        conditions = []
+        if start_date and end_date:
+            conditions.append(f"date(li.usage_start) >= '{start_date}'")
+            conditions.append(f"date(li.usage_start) <= '{end_date}'")
+        if cluster_id:
+            conditions.append(f"li.cluster_id = '{cluster_id}'")
+        where_clause = ''
+        if conditions:
+            where_clause = 'WHERE ' + ' AND '.join(conditions)
+
+        dictionary_sql = pkgutil.get_data(
+            'masu.database',
+            'sql/reporting_ocplabels_dictionary.sql'
+        )
         agg_sql = pkgutil.get_data(
             'masu.database',
-            f'sql/reporting_ocpstoragevolumeclaimlabel_summary.sql'
+            f'sql/{summary_sql_file}'
+        )
+        agg_sql = (dictionary_sql + agg_sql).decode('utf-8').format(
+            schema=self.schema,
+            line_item_table=line_item_table,
+            labels_column=labels_column,
+            data_source=data_source,
+            where_clause=where_clause
         )
-        agg_sql = agg_sql.decode('utf-8').format(schema=self.schema)
 
-        self._commit_and_vacuum(table_name, agg_sql)
+        self._commit_and_vacuum(table_name, agg_sql, start_date, end_date)
+        invalidate_tag_keys(self.schema)
 
     # pylint: disable=invalid-name
-    def populate_volume_label_summary_table(self):
-        """Populate the OCP volume label summary table."""
-        table_name = OCP_REPORT_TABLE_MAP['volume_label_summary']
+    def populate_pod_label_summary_table(self, start_date=None, end_date=None, cluster_id=None):
+        """Populate the line item aggregated totals data table."""
+        self._populate_label_summary_table(
+            OCP_REPORT_TABLE_MAP['pod_label_summary'],
+            'reporting_ocpusagepodlabel_summary.sql',
+            OCP_REPORT_TABLE_MAP['line_item_daily'],
+            'pod_labels',
+            'pod',
+            start_date, end_date, cluster_id
+        )
 
-        agg_sql = pkgutil.get_data(
-            'masu.database',
-            f'sql/reporting_ocpstoragevolumelabel_summary.sql'
+    # pylint: disable=invalid-name
+    def populate_volume_claim_label_summary_table(self, start_date=None, end_date=None,
+                                                  cluster_id=None):
+        """Populate the OCP volume claim label summary table."""
+        self._populate_label_summary_table(
+            OCP_REPORT_TABLE_MAP['volume_claim_label_summary'],
+            'reporting_ocpstoragevolumeclaimlabel_summary.sql',
+            OCP_REPORT_TABLE_MAP['storage_line_item_daily'],
+            'persistentvolumeclaim_labels',
+            'volume_claim',
+            start_date, end_date, cluster_id
         )
-        agg_sql = agg_sql.decode('utf-8').format(schema=self.schema)
 
-        self._commit_and_vacuum(table_name, agg_sql)
+    # pylint: disable=invalid-name
+    def populate_volume_label_summary_table(self, start_date=None, end_date=None,
+                                            cluster_id=None):
+        """Populate the OCP volume label summary table."""
+        self._populate_label_summary_table(
+            OCP_REPORT_TABLE_MAP['volume_label_summary'],
+            'reporting_ocpstoragevolumelabel_summary.sql',
+            OCP_REPORT_TABLE_MAP['storage_line_item_daily'],
+            'persistentvolume_labels',
+            'volume',
+            start_date, end_date, cluster_id
+        )
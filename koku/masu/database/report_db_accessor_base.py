@@ -16,19 +16,87 @@
 #
 """Database accessor for report data."""
 
+import datetime
 import logging
+import re
 import uuid
-from decimal import Decimal, InvalidOperation
+from decimal import Context, Decimal, InvalidOperation
 
 import django.apps
+from dateutil import parser, relativedelta
+from django.core.cache import cache
 from django.db import connection, transaction
 from tenant_schemas.utils import schema_context
 
+from koku.celery import CELERY as celery
 from masu.config import Config
+from masu.database import MONTHLY_PARTITIONED_TABLES
 from masu.database.koku_database_access import KokuDBAccess
+from masu.database.reporting_common_db_accessor import REPORT_METADATA_CACHE
 
 LOG = logging.getLogger(__name__)
 
+# Cache key held while a deferred vacuum of a tenant's table is queued
+VACUUM_CACHE_KEY = 'reporting-vacuum-{schema}-{table}'
+
+
+# Rounding context and quantum for Numeric columns, built once rather
+# than for every value
+DECIMAL_CONTEXT = Context()
+DECIMAL_QUANTUM = Decimal(f'0E-{Config.REPORTING_DECIMAL_PRECISION}')
+
+
+def _to_decimal(value):
+    """Convert a value to a Decimal rounded to the database precision."""
+    try:
+        return Decimal(value).quantize(DECIMAL_QUANTUM, context=DECIMAL_CONTEXT)
+    except InvalidOperation:
+        return None
+
+
+def _to_number(number_type):
+    """Return a converter of values to an int or float."""
+    def convert(value):
+        try:
+            return number_type(value)
+        except ValueError as err:
+            LOG.warning(err)
+            return None
+    return convert
+
+
+# The converter of each Python type clean_data converts to
+TYPE_CONVERTERS = {
+    Decimal: _to_decimal,
+    int: _to_number(int),
+    float: _to_number(float),
+}
+
+# The Python type of each Django internal field type clean_data converts
+FIELD_TYPES = {
+    'DecimalField': Decimal,
+    'FloatField': float,
+    'IntegerField': int,
+    'BigIntegerField': int,
+    'SmallIntegerField': int,
+    'PositiveIntegerField': int,
+    'PositiveSmallIntegerField': int,
+}
+
+
+def _clean_empty_value(value):
+    """Return None for an empty value and the value itself otherwise."""
+    return None if value == '' else value
+
+
+def _cleaning(converter):
+    """Return a function that cleans a value and then converts it."""
+    def clean(value):
+        if value is None or value == '':
+            return None
+        return converter(value)
+    return clean
+
 
 # pylint: disable=too-few-public-methods
 class ReportSchema:
@@ -37,6 +105,7 @@ class ReportSchema:
     def __init__(self, tables, column_map):
         """Initialize the report schema."""
         self.column_types = {}
+        self.column_converters = {}
         self._set_reporting_tables(tables, column_map)
 
     def _set_reporting_tables(self, models, column_map):
@@ -58,6 +127,11 @@ class ReportSchema:
                      for column in columns}
             column_types.update({model._meta.db_table: types})
             self.column_types = column_types
+            self.column_converters[model._meta.db_table] = {
+                column: TYPE_CONVERTERS[FIELD_TYPES[field_type]]
+                for column, field_type in types.items()
+                if field_type in FIELD_TYPES
+            }
 
 
 # pylint: disable=too-many-public-methods
@@ -74,12 +148,17 @@ class ReportDBAccessorBase(KokuDBAccess):
         """
         super().__init__(schema)
         self.column_map = column_map
-        self.report_schema = ReportSchema(django.apps.apps.get_models(),
-                                          self.column_map)
+        self.report_schema = REPORT_METADATA_CACHE.get_report_schema(
+            self.column_map,
+            lambda: ReportSchema(django.apps.apps.get_models(), self.column_map)
+        )
         self._conn = connection
+        self._changed_tables = {}
 
     def __exit__(self, exception_type, exception_value, traceback):
         """Context manager close connections."""
+        if not exception_type:
+            self.maintain_changed_tables()
         super().__exit__(exception_type, exception_value, traceback)
         self.close_connections()
 
@@ -102,6 +181,37 @@ class ReportDBAccessorBase(KokuDBAccess):
                 )
         return temp_table_name
 
+    def create_staging_table(self, table_name, drop_column=None):
+        """Create an unlogged staging table shaped like a table and return its name.
+
+        The staging table has a staging_row_seq column numbering its rows in
+        the order they are inserted. Each staging table has a name of its
+        own and is dropped with drop_staging_table once it is merged.
+        """
+        staging_table_name = table_name + '_staging_' + str(uuid.uuid4()).replace('-', '_')
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(
+                f'CREATE UNLOGGED TABLE {staging_table_name} (LIKE {table_name})'
+            )
+            if drop_column:
+                cursor.execute(
+                    f'ALTER TABLE {staging_table_name} DROP COLUMN {drop_column}'
+                )
+            cursor.execute(
+                f'ALTER TABLE {staging_table_name} ADD COLUMN staging_row_seq bigserial'
+            )
+        return staging_table_name
+
+    def drop_staging_table(self, staging_table_name):
+        """Drop a staging table created by create_staging_table."""
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(f'DROP TABLE IF EXISTS {staging_table_name}')
+            cursor.db.commit()
+
     def create_new_temp_table(self, table_name, columns):
         """Create a temporary table and return the table name."""
         temp_table_name = table_name + '_' + str(uuid.uuid4()).replace('-', '_')
@@ -166,6 +276,255 @@ class ReportDBAccessorBase(KokuDBAccess):
             cursor.execute(delete_sql)
             cursor.db.commit()
 
+    def get_partition_sql(self, table_name, column, value, if_not_exists=False):
+        """Return the SQL creating the child table of a column value.
+
+        The child inherits from table_name, so it is read and deleted from
+        along with it, and copies its indexes.
+        """
+        partition = f'{table_name}_{value}'
+        exists_clause = 'IF NOT EXISTS ' if if_not_exists else ''
+        return f"""
+            CREATE TABLE {exists_clause}{partition} (
+                LIKE {table_name} INCLUDING INDEXES,
+                CHECK ({column} = {int(value)})
+            ) INHERITS ({table_name})
+        """
+
+    def create_partition(self, table_name, column, value):
+        """Create the child table holding the rows of a column value.
+
+        Args:
+            table_name (str): The parent table
+            column (str): The integer column the child is split on
+            value (int): The value of the column the child holds
+
+        Returns:
+            (str): The name of the child table
+
+        """
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(self.get_partition_sql(table_name, column, value,
+                                                  if_not_exists=True))
+            cursor.db.commit()
+        return f'{table_name}_{value}'
+
+    def create_staged_partition(self, table_name, column, value):
+        """Create an unattached table to load the rows of a column value into.
+
+        The table is shaped like the child table of the value but is not
+        read along with table_name until swap_partition attaches it. A
+        table left over from a failed load is replaced.
+
+        Args:
+            table_name (str): The parent table
+            column (str): The integer column the child is split on
+            value (int): The value of the column the child holds
+
+        Returns:
+            (str): The name of the staged table
+
+        """
+        staged = f'{table_name}_{value}_staged'
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(f'DROP TABLE IF EXISTS {staged}')
+            cursor.execute(f"""
+                CREATE TABLE {staged} (
+                    LIKE {table_name}
+                        INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES,
+                    CHECK ({column} = {int(value)})
+                )
+            """)
+            cursor.db.commit()
+        return staged
+
+    def swap_partition(self, table_name, column, value, staged_table):
+        """Replace the child table of a column value with a staged table.
+
+        Rows of the value stored in the parent itself are deleted, the old
+        child is dropped and the staged table attached in its place in a
+        single transaction, so readers see either the old or the new rows.
+
+        Args:
+            table_name (str): The parent table
+            column (str): The integer column the child is split on
+            value (int): The value of the column the child holds
+            staged_table (str): The table made by create_staged_partition
+
+        Returns:
+            (str): The name of the child table
+
+        """
+        partition = f'{table_name}_{value}'
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(f'DELETE FROM ONLY {table_name} WHERE {column} = %s', [value])
+            cursor.execute(f'DROP TABLE IF EXISTS {partition}')
+            cursor.execute(f'ALTER TABLE {staged_table} RENAME TO {partition}')
+            cursor.execute(f'ALTER TABLE {partition} INHERIT {table_name}')
+            cursor.db.commit()
+        return partition
+
+    def drop_partition(self, table_name, column, value):
+        """Remove the rows of a column value by dropping its child table.
+
+        Rows of the value stored in the parent itself are deleted in the
+        same transaction.
+
+        Args:
+            table_name (str): The parent table
+            column (str): The integer column the child is split on
+            value (int): The value of the column the child holds
+
+        Returns:
+            (None)
+
+        """
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(f'DELETE FROM ONLY {table_name} WHERE {column} = %s', [value])
+            cursor.execute(f'DROP TABLE IF EXISTS {table_name}_{value}')
+            cursor.db.commit()
+
+    @staticmethod
+    def _get_month_starts(start_date, end_date):
+        """Return the first day of each month from start_date to end_date."""
+        if isinstance(start_date, str):
+            start_date = parser.parse(start_date)
+        if isinstance(end_date, str):
+            end_date = parser.parse(end_date)
+        month = datetime.date(start_date.year, start_date.month, 1)
+        last_month = datetime.date(end_date.year, end_date.month, 1)
+        months = []
+        while month <= last_month:
+            months.append(month)
+            month += relativedelta.relativedelta(months=1)
+        return months
+
+    def create_month_partitions(self, table_name, start_date, end_date):
+        """Create the usage month child tables of a date range.
+
+        Each child inherits from table_name and holds the rows whose
+        usage_start falls in its month. Rows inserted into table_name with
+        usage month routing on are routed to the child of their month by a
+        trigger, and queries with a usage_start range only scan the children
+        of the range's months.
+
+        The trigger skips the insert into the parent, so a routed insert
+        returns no rows. Routing is only turned on around the summarization
+        SQL, see _commit_and_vacuum; other inserts, like the
+        INSERT ... RETURNING of Model.objects.create(), stay in the parent.
+
+        Args:
+            table_name (str): The parent table
+            start_date (datetime.date): The start of the range
+            end_date (datetime.date): The end of the range
+
+        Returns:
+            (list): The names of the child tables of the range
+
+        """
+        partitions = []
+        parent = f'{self.schema}.{table_name}'
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            for month in self._get_month_starts(start_date, end_date):
+                next_month = month + relativedelta.relativedelta(months=1)
+                partition = f'{table_name}_{month:%Y_%m}'
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema}.{partition} (
+                        LIKE {parent} INCLUDING INDEXES,
+                        CHECK (usage_start >= '{month} 00:00:00+00'
+                            AND usage_start < '{next_month} 00:00:00+00')
+                    ) INHERITS ({parent})
+                """)
+                partitions.append(partition)
+            cursor.execute(f"""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgrelid = '{parent}'::regclass
+                            AND tgname = 'usage_month_insert'
+                    ) THEN
+                        CREATE TRIGGER usage_month_insert
+                            BEFORE INSERT ON {parent}
+                            FOR EACH ROW EXECUTE PROCEDURE {self.schema}.reporting_usage_month_insert();
+                    END IF;
+                END $$
+            """)
+            cursor.db.commit()
+        return partitions
+
+    def get_month_partitions(self, table_name):
+        """Return the usage month child tables of a table by their month.
+
+        Args:
+            table_name (str): The parent table
+
+        Returns:
+            (dict): The names of the child tables keyed by the first day of their month
+
+        """
+        pattern = re.compile(rf'^{table_name}_(\d{{4}})_(\d{{2}})$')
+        partitions = {}
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(
+                """
+                SELECT c.relname
+                FROM pg_inherits AS i
+                JOIN pg_class AS c
+                    ON c.oid = i.inhrelid
+                WHERE i.inhparent = %s::regclass
+                """,
+                [f'{self.schema}.{table_name}']
+            )
+            for (partition,) in cursor.fetchall():
+                match = pattern.match(partition)
+                if match:
+                    month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+                    partitions[month] = partition
+        return partitions
+
+    def drop_month_partitions(self, table_name, before_date):
+        """Drop the usage month child tables of months starting on or before a date.
+
+        Args:
+            table_name (str): The parent table
+            before_date (datetime.date): The last month start to drop
+
+        Returns:
+            (list): The names of the dropped child tables
+
+        """
+        if isinstance(before_date, datetime.datetime):
+            before_date = before_date.date()
+        dropped = []
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        partitions = self.get_month_partitions(table_name)
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            for month, partition in sorted(partitions.items()):
+                if month <= before_date:
+                    cursor.execute(f'DROP TABLE {self.schema}.{partition}')
+                    dropped.append(partition)
+            cursor.db.commit()
+        return dropped
+
     def vacuum_table(self, table_name):
         """Vacuum a table outside of a transaction."""
         with schema_context(self.schema):
@@ -177,6 +536,75 @@ class ReportDBAccessorBase(KokuDBAccess):
                 cursor.execute(vacuum)
             connection.connection.set_isolation_level(old_isolation_level)
 
+    def analyze_table(self, table_name):
+        """Update the planner statistics of a table."""
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.execute(f'ANALYZE {table_name}')
+            cursor.db.commit()
+
+    @staticmethod
+    def _uses_month_partitions(table_name, start=None, end=None):
+        """Return whether the rows of a table in a date range are kept in usage month children."""
+        return bool(Config.REPORTING_MONTHLY_PARTITIONS and start and end
+                    and table_name in MONTHLY_PARTITIONED_TABLES)
+
+    def table_changed(self, table_name, start=None, end=None):
+        """Vacuum the tables holding a table's changed rows, or record them for deferred maintenance.
+
+        The changed rows of a table split into usage month children are held
+        by the children of the months from start to end, which are
+        maintained in place of the table.
+
+        Args:
+            table_name (str): The table whose rows changed
+            start (datetime.date): The start of the changed usage range
+            end (datetime.date): The end of the changed usage range
+
+        """
+        changed_tables = [table_name]
+        if self._uses_month_partitions(table_name, start, end):
+            changed_tables = [f'{table_name}_{month:%Y_%m}'
+                              for month in self._get_month_starts(start, end)]
+        for changed_table in changed_tables:
+            if Config.REPORTING_DEFERRED_VACUUM:
+                self._changed_tables.setdefault(changed_table, []).append((start, end))
+            else:
+                self.vacuum_table(changed_table)
+
+    def queue_vacuum(self, table_name):
+        """Queue a deferred vacuum of a table unless one is queued already.
+
+        Args:
+            table_name (str): The table to vacuum
+
+        Returns:
+            (bool): Whether a vacuum was queued
+
+        """
+        cache_key = VACUUM_CACHE_KEY.format(schema=self.schema, table=table_name)
+        # add returns None rather than False when the cache can not be reached,
+        # in which case the vacuum is queued regardless
+        if cache.add(cache_key, True, Config.REPORTING_VACUUM_LOCK_TIMEOUT) is False:
+            return False
+        celery.send_task('masu.processor.tasks.vacuum_schema_table',
+                         args=[self.schema, table_name],
+                         countdown=Config.REPORTING_VACUUM_DELAY)
+        return True
+
+    def maintain_changed_tables(self):
+        """Analyze the tables changed through this accessor and queue their vacuums."""
+        for table_name, ranges in self._changed_tables.items():
+            LOG.info('Analyzing %s changed over %s.', table_name,
+                     ', '.join(f'{start} to {end}' if start and end else 'all dates'
+                               for start, end in ranges))
+            self.analyze_table(table_name)
+            if self.queue_vacuum(table_name):
+                LOG.info('Queued a vacuum of %s.', table_name)
+        self._changed_tables = {}
+
     # pylint: disable=too-many-arguments
     def bulk_insert_rows(self, file_obj, table, columns, sep='\t', null=''):
         r"""Insert many rows using Postgres copy functionality.
@@ -202,6 +630,33 @@ class ReportDBAccessorBase(KokuDBAccess):
             )
             cursor.db.commit()
 
+    # pylint: disable=too-many-arguments
+    def copy_rows_from_stream(self, file_obj, table, columns, sep='\t', null=''):
+        r"""Insert rows from a streaming file-like object using COPY.
+
+        Unlike bulk_insert_rows the file object is only read as Postgres
+        consumes it, so it may produce its rows lazily.
+
+        Args:
+            file_obj (file): A file-like object exposing read(size)
+            table (str): The table name in the databse to copy to
+            columns (list): A list of columns in the order of the rows
+            sep (str): The separator in the file. Default: '\t'
+            null (str): How null is represented in the rows. Default: ''
+
+        """
+        column_str = ','.join(columns)
+        copy_sql = f"""
+            COPY {table} ({column_str}) FROM STDIN
+            WITH DELIMITER '{sep}' NULL '{null}'
+        """
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            cursor.copy_expert(copy_sql, file_obj)
+            cursor.db.commit()
+
     def close_connections(self, conn=None):
         """Close the low level database connection.
 
@@ -348,6 +803,77 @@ class ReportDBAccessorBase(KokuDBAccess):
 
         return self._get_primary_key(table_name, data)
 
+    # pylint: disable=too-many-locals
+    def bulk_insert_on_conflict(self,
+                                table,
+                                rows,
+                                conflict_columns=None,
+                                set_columns=None,
+                                key_columns=None,
+                                chunk_size=1000):
+        """Write multi-row INSERT statements returning the row ids.
+
+        Conflicting rows are updated with set_columns. Without set_columns
+        the first conflict column is rewritten with its own value so that
+        existing rows still return their id, avoiding a lookup per row.
+        Postgres does not return rows in VALUES order, so each id is
+        matched to its row on the key columns returned with it.
+
+        Args:
+            table (DjangoModel): The table to insert into
+            rows (list): Dictionaries of data sharing the same keys
+            conflict_columns (list): Columns to check conflict on
+            set_columns (list): Columns to update on conflict
+            key_columns (list): Columns identifying a row, defaults to
+                conflict_columns
+            chunk_size (int): The maximum number of rows per statement
+
+        Returns:
+            (list): The id of each row, in the order of rows
+
+        """
+        if not rows:
+            return []
+
+        table_name = table()._meta.db_table
+        rows = [self.clean_data(dict(row), table_name) for row in rows]
+        columns = list(rows[0].keys())
+        columns_formatted = ', '.join(columns)
+        key_columns = key_columns or conflict_columns or columns
+        key_columns_formatted = ', '.join(key_columns)
+        row_str = '({})'.format(','.join(['%s' for _ in columns]))
+
+        conflict_clause = ''
+        if conflict_columns:
+            set_columns = set_columns or conflict_columns[:1]
+            set_clause = ','.join([f'{column} = excluded.{column}'
+                                   for column in set_columns])
+            conflict_columns_formatted = ', '.join(conflict_columns)
+            conflict_clause = f"""
+                ON CONFLICT ({conflict_columns_formatted}) DO UPDATE SET
+                {set_clause}
+            """
+
+        if KokuDBAccess._savepoints:
+            transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
+        key_ids = {}
+        with connection.cursor() as cursor:
+            cursor.db.set_schema(self.schema)
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i:i + chunk_size]
+                val_str = ','.join([row_str for _ in chunk])
+                values = [row[column] for row in chunk for column in columns]
+                insert_sql = f"""
+                    INSERT INTO {self.schema}.{table_name}({columns_formatted}) VALUES {val_str}
+                    {conflict_clause}
+                    RETURNING id, {key_columns_formatted}
+                """
+                cursor.execute(insert_sql, values)
+                key_ids.update((tuple(row[1:]), row[0]) for row in cursor.fetchall())
+            cursor.db.commit()
+
+        return [key_ids[tuple(row[column] for column in key_columns)] for row in rows]
+
     def _get_primary_key(self, table_name, data):
         """Return the row id for a specific object."""
         with schema_context(self.schema):
@@ -373,21 +899,39 @@ class ReportDBAccessorBase(KokuDBAccess):
             (dict): The data with values converted to required types
 
         """
-        column_types = self.report_schema.column_types[table_name]
+        converters = self.report_schema.column_converters[table_name]
 
         for key, value in data.items():
             if value is None or value == '':
                 data[key] = None
                 continue
-            if column_types.get(key) == int:
-                data[key] = self._convert_value(value, int)
-            elif column_types.get(key) == float:
-                data[key] = self._convert_value(value, float)
-            elif column_types.get(key) == Decimal:
-                data[key] = self._convert_value(value, Decimal)
+            converter = converters.get(key)
+            if converter is not None:
+                data[key] = converter(value)
 
         return data
 
+    def get_column_converters(self, table_name, columns):
+        """Return a function per column that cleans one value like clean_data.
+
+        Args:
+            table_name (str): The table name the columns belong to
+            columns (list): The column names to get converters for
+
+        Returns:
+            (list): A callable for each column, in the order of columns
+
+        """
+        column_converters = self.report_schema.column_converters[table_name]
+        converters = []
+        for column in columns:
+            converter = column_converters.get(column)
+            if converter is not None:
+                converters.append(_cleaning(converter))
+            else:
+                converters.append(_clean_empty_value)
+        return converters
+
     def _convert_value(self, value, column_type):
         """Convert a single value to the specified column type.
 
@@ -399,32 +943,26 @@ class ReportDBAccessorBase(KokuDBAccess):
             (var): The variable converted to type or None if conversion fails.
 
         """
-        if column_type == Decimal:
-            try:
-                value = Decimal(value).quantize(Decimal(self.decimal_precision))
-            except InvalidOperation:
-                value = None
-        else:
-            try:
-                value = column_type(value)
-            except ValueError as err:
-                LOG.warning(err)
-                value = None
-        return value
+        return TYPE_CONVERTERS[column_type](value)
 
     def _commit_and_vacuum(self, table, sql, start=None, end=None):
-        """Commit query to a table and vacuum."""
+        """Commit query to a table and vacuum it or record it as changed."""
         if start and end:
             LOG.info('Updating %s from %s to %s.',
                      table, start, end)
         else:
             LOG.info('Updating %s', table)
 
+        # The rows of the range go to the usage month children
+        if self._uses_month_partitions(table, start, end):
+            self.create_month_partitions(table, start, end)
+            sql = f"SET LOCAL koku.usage_month_routing = 'on';\n{sql}"
+
         if KokuDBAccess._savepoints:
             transaction.savepoint_commit(KokuDBAccess._savepoints.pop())
         with connection.cursor() as cursor:
             cursor.db.set_schema(self.schema)
             cursor.execute(sql)
             cursor.db.commit()
-            self.vacuum_table(table)
+            self.table_changed(table, start, end)
         LOG.info('Finished updating %s.', table)
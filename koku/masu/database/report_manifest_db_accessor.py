@@ -44,6 +44,27 @@ class ReportManifestDBAccessor(KokuDBAccess):
             query = self._get_db_obj_query()
             return query.filter(id=manifest_id).first()
 
+    def increment_num_processed_files(self, manifest_id):
+        """Count one more processed file on the manifest.
+
+        The manifest row stays locked until the accessor's transaction
+        commits, so concurrent workers each see a distinct count.
+
+        Args:
+            manifest_id (int): The manifest to update
+
+        Returns:
+            (CostUsageReportManifest): The updated manifest, or None if not found
+
+        """
+        with schema_context(self._schema):
+            manifest = self._get_db_obj_query(id=manifest_id)\
+                .select_for_update().first()
+            if manifest:
+                manifest.num_processed_files += 1
+                manifest.save()
+            return manifest
+
     def mark_manifest_as_updated(self, manifest):
         """Update the updated timestamp."""
         manifest.manifest_updated_datetime = \
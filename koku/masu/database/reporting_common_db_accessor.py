@@ -16,13 +16,114 @@
 #
 """Downloader for cost usage reports."""
 
+import threading
+import uuid
 from collections import defaultdict
 
 import django.apps
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 from masu.database.koku_database_access import KokuDBAccess
 from reporting_common.models import ReportColumnMap
 
+REPORT_METADATA_VERSION_KEY = 'report-metadata-version'
+
+
+class ReportMetadataCache:
+    """A process-wide, versioned cache of the report column map.
+
+    The report schema built from the column map is cached alongside it.
+    The version is kept in the shared cache, so every process sees it
+    change when mapping rows are saved or deleted, or migrations run,
+    and drops its cached metadata on the next read.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.Lock()
+        self.version = None
+        self._column_map = None
+        self._report_schema = None
+
+    @staticmethod
+    def get_shared_version():
+        """Return the current metadata version of all processes."""
+        cache = caches['default']
+        version = cache.get(REPORT_METADATA_VERSION_KEY)
+        if version is None:
+            cache.add(REPORT_METADATA_VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(REPORT_METADATA_VERSION_KEY)
+        return version
+
+    # pylint: disable=unused-argument
+    def invalidate(self, *args, **kwargs):
+        """Move all processes to a new version; usable as a signal receiver."""
+        caches['default'].set(REPORT_METADATA_VERSION_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self.version = None
+            self._column_map = None
+            self._report_schema = None
+
+    def get_column_map(self, loader):
+        """Return the cached column map, loading it on a miss.
+
+        Args:
+            loader (function): Returns the column map from the database
+
+        Returns:
+            (dict): A mapping of report columns to database columns
+
+        """
+        version = self.get_shared_version()
+        if version is None:
+            # The shared cache can not be reached
+            return loader()
+
+        with self._lock:
+            if self.version == version and self._column_map is not None:
+                return self._column_map
+
+        column_map = loader()
+        with self._lock:
+            # Don't cache a map loaded while the rows were changing
+            if self.get_shared_version() == version:
+                self.version = version
+                self._column_map = column_map
+                self._report_schema = None
+        return column_map
+
+    def get_report_schema(self, column_map, builder):
+        """Return the report schema of a column map, building it on a miss.
+
+        Only the schema of the cached column map is kept.
+
+        Args:
+            column_map (dict): A mapping of report columns to database columns
+            builder (function): Returns a new schema for the column map
+
+        Returns:
+            (ReportSchema): The report schema
+
+        """
+        cached = self._report_schema
+        if cached is not None and cached[0] is column_map:
+            return cached[1]
+        report_schema = builder()
+        with self._lock:
+            if column_map is self._column_map:
+                self._report_schema = (column_map, report_schema)
+        return report_schema
+
+
+REPORT_METADATA_CACHE = ReportMetadataCache()
+post_save.connect(REPORT_METADATA_CACHE.invalidate, sender=ReportColumnMap,
+                  dispatch_uid='report_metadata_cache_save')
+post_delete.connect(REPORT_METADATA_CACHE.invalidate, sender=ReportColumnMap,
+                    dispatch_uid='report_metadata_cache_delete')
+post_migrate.connect(REPORT_METADATA_CACHE.invalidate,
+                     dispatch_uid='report_metadata_cache_migrate')
+
 
 class ReportingCommonDBAccessor(KokuDBAccess):
     """Class to interact with customer reporting tables."""
@@ -36,7 +137,7 @@ class ReportingCommonDBAccessor(KokuDBAccess):
         super().__init__(schema)
         self.report_common_schema = self.ReportingCommonSchema()
         self._get_reporting_tables()
-        self.column_map = self.generate_column_map()
+        self.column_map = REPORT_METADATA_CACHE.get_column_map(self.generate_column_map)
 
     def _get_reporting_tables(self):
         """Load table objects for reference and creation."""
@@ -0,0 +1,35 @@
+-- Clear out old entries first
+DELETE FROM {schema}.{rollup_table}
+WHERE usage_start >= '{start_date}'
+    AND usage_start <= '{end_date}'
+    AND cost_entry_bill_id IN ({cost_entry_bill_ids})
+;
+
+-- Roll the daily summary up to the columns of the rollup
+INSERT INTO {schema}.{rollup_table} (
+    cost_entry_bill_id,
+    usage_start,
+    usage_end,
+    usage_account_id,
+    account_alias_id{dimensions},
+    currency_code,
+    unblended_cost
+)
+    SELECT cost_entry_bill_id,
+        usage_start,
+        usage_end,
+        usage_account_id,
+        account_alias_id{dimensions},
+        currency_code,
+        sum(unblended_cost)
+    FROM {schema}.reporting_awscostentrylineitem_daily_summary
+    WHERE usage_start >= '{start_date}'
+        AND usage_start <= '{end_date}'
+        AND cost_entry_bill_id IN ({cost_entry_bill_ids})
+    GROUP BY cost_entry_bill_id,
+        usage_start,
+        usage_end,
+        usage_account_id,
+        account_alias_id{dimensions},
+        currency_code
+;
@@ -0,0 +1,29 @@
+-- Add the tag keys and values of the daily line items in the window
+-- to the tag dictionary of their bill
+INSERT INTO {schema}.reporting_awstags_dictionary AS d (
+    cost_entry_bill_id,
+    usage_month,
+    key,
+    values
+)
+SELECT l.cost_entry_bill_id,
+    date(b.billing_period_start) as usage_month,
+    l.key,
+    array_agg(DISTINCT l.value) as values
+FROM (
+    SELECT li.cost_entry_bill_id,
+        key,
+        value
+    FROM {schema}.reporting_awscostentrylineitem_daily AS li,
+        jsonb_each_text(li.tags) labels
+    {where_clause}
+) l
+JOIN {schema}.reporting_awscostentrybill AS b
+    ON b.id = l.cost_entry_bill_id
+GROUP BY l.cost_entry_bill_id, b.billing_period_start, l.key
+ON CONFLICT (cost_entry_bill_id, key) DO UPDATE
+SET values = ARRAY(
+    SELECT DISTINCT unnest(d.values || EXCLUDED.values)
+    ORDER BY 1
+)
+;
@@ -3,9 +3,8 @@ SELECT l.key,
     array_agg(DISTINCT l.value) as values
 FROM (
     SELECT key,
-        value
-    FROM {schema}.reporting_awscostentrylineitem_daily AS li,
-        jsonb_each_text(li.tags) labels
+        unnest(values) as value
+    FROM {schema}.reporting_awstags_dictionary
 ) l
 GROUP BY l.key
 ON CONFLICT (key) DO UPDATE
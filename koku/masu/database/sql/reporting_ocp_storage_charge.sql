@@ -1,2 +1,4 @@
 -- Calculate and update the OCP Storage usage charge
-UPDATE {schema}.reporting_ocpstoragelineitem_daily_summary SET persistentvolumeclaim_charge_gb_month = charge FROM {temp_table} WHERE id = {temp_table}.lineid;
+UPDATE {schema}.reporting_ocpstoragelineitem_daily_summary
+    SET persistentvolumeclaim_charge_gb_month = {storage_charge}
+WHERE {where_clause}
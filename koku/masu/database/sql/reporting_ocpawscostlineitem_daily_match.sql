@@ -0,0 +1,870 @@
+-- The Python string variable subsitutions {aws_where_clause} and
+-- {ocp_where_clause} optionally filter AWS and OCP data by provider/source
+-- Ex aws_where_clause: 'AND cost_entry_bill_id IN (1, 2, 3)'
+-- Ex ocp_where_clause: "AND cluster_id = 'abcd-1234`"
+
+-- We use a LATERAL JOIN here to get the JSON tags split out into key, value
+-- columns. We reference this split multiple times so we put it in a
+-- TEMPORARY TABLE for re-use
+CREATE TEMPORARY TABLE reporting_aws_tags AS (
+    SELECT aws.*,
+        LOWER(key) as key,
+        LOWER(value) as value
+        FROM {schema}.reporting_awscostentrylineitem_daily as aws,
+            jsonb_each_text(aws.tags) labels
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            {aws_where_clause}
+)
+;
+
+-- We use a LATERAL JOIN here to get the JSON tags split out into key, value
+-- columns. We reference this split multiple times so we put it in a
+-- TEMPORARY TABLE for re-use
+CREATE TEMPORARY TABLE reporting_ocp_storage_tags AS (
+    SELECT ocp.*,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM {schema}.reporting_ocpstoragelineitem_daily as ocp,
+        jsonb_each_text(ocp.persistentvolume_labels) labels
+    WHERE date(ocp.usage_start) >= '{start_date}'
+        AND date(ocp.usage_start) <= '{end_date}'
+        {ocp_where_clause}
+
+    UNION ALL
+
+    SELECT ocp.*,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM {schema}.reporting_ocpstoragelineitem_daily as ocp,
+        jsonb_each_text(ocp.persistentvolumeclaim_labels) labels
+    WHERE date(ocp.usage_start) >= '{start_date}'
+        AND date(ocp.usage_start) <= '{end_date}'
+        {ocp_where_clause}
+)
+;
+
+-- We use a LATERAL JOIN here to get the JSON tags split out into key, value
+-- columns. We reference this split multiple times so we put it in a
+-- TEMPORARY TABLE for re-use
+CREATE TEMPORARY TABLE reporting_ocp_pod_tags AS (
+    SELECT ocp.*,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM {schema}.reporting_ocpusagelineitem_daily as ocp,
+        jsonb_each_text(ocp.pod_labels) labels
+    WHERE date(ocp.usage_start) >= '{start_date}'
+        AND date(ocp.usage_start) <= '{end_date}'
+        {ocp_where_clause}
+)
+;
+
+-- First we match OCP pod data to AWS data using a direct
+-- resource id match. This usually means OCP node -> AWS EC2 instance ID.
+CREATE TEMPORARY TABLE reporting_ocp_aws_resource_id_matched AS (
+    WITH cte_resource_id_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.pod_labels,
+            ocp.pod_usage_cpu_core_seconds,
+            ocp.pod_request_cpu_core_seconds,
+            ocp.pod_limit_cpu_core_seconds,
+            ocp.pod_usage_memory_byte_seconds,
+            ocp.pod_request_memory_byte_seconds,
+            ocp.node_capacity_cpu_cores,
+            ocp.node_capacity_cpu_core_seconds,
+            ocp.node_capacity_memory_bytes,
+            ocp.node_capacity_memory_byte_seconds,
+            ocp.cluster_capacity_cpu_core_seconds,
+            ocp.cluster_capacity_memory_byte_seconds,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM {schema}.reporting_awscostentrylineitem_daily as aws
+        JOIN {schema}.reporting_ocpusagelineitem_daily as ocp
+            ON aws.resource_id = ocp.resource_id
+                AND aws.usage_start::date = ocp.usage_start::date
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            {aws_where_clause}
+            {ocp_where_clause}
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_resource_id_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_resource_id_matched
+        GROUP BY aws_id
+    )
+    SELECT rm.*,
+        (rm.pod_usage_cpu_core_seconds / rm.node_capacity_cpu_core_seconds) * rm.unblended_cost as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_resource_id_matched AS rm
+    JOIN cte_number_of_shared_projects AS sp
+        ON rm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON rm.aws_id = spod.aws_id
+
+)
+;
+
+-- Next we match where the pod label key and value
+-- and AWS tag key and value match directly
+CREATE TEMPORARY TABLE reporting_ocp_aws_direct_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.pod_labels,
+            ocp.pod_usage_cpu_core_seconds,
+            ocp.pod_request_cpu_core_seconds,
+            ocp.pod_limit_cpu_core_seconds,
+            ocp.pod_usage_memory_byte_seconds,
+            ocp.pod_request_memory_byte_seconds,
+            ocp.node_capacity_cpu_cores,
+            ocp.node_capacity_cpu_core_seconds,
+            ocp.node_capacity_memory_bytes,
+            ocp.node_capacity_memory_byte_seconds,
+            ocp.cluster_capacity_cpu_core_seconds,
+            ocp.cluster_capacity_memory_byte_seconds,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_pod_tags as ocp
+            ON aws.key = ocp.key
+                AND aws.value = ocp.value
+                AND aws.usage_start::date = ocp.usage_start::date
+        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
+            ON rm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND rm.aws_id IS NULL
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- Next we match where the AWS tag is the special openshift_project key
+-- and the value matches an OpenShift project name
+CREATE TEMPORARY TABLE reporting_ocp_aws_openshift_project_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.pod_labels,
+            ocp.pod_usage_cpu_core_seconds,
+            ocp.pod_request_cpu_core_seconds,
+            ocp.pod_limit_cpu_core_seconds,
+            ocp.pod_usage_memory_byte_seconds,
+            ocp.pod_request_memory_byte_seconds,
+            ocp.node_capacity_cpu_cores,
+            ocp.node_capacity_cpu_core_seconds,
+            ocp.node_capacity_memory_bytes,
+            ocp.node_capacity_memory_byte_seconds,
+            ocp.cluster_capacity_cpu_core_seconds,
+            ocp.cluster_capacity_memory_byte_seconds,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_pod_tags as ocp
+            ON aws.key = 'openshift_project' AND aws.value = ocp.namespace
+                AND aws.usage_start::date = ocp.usage_start::date
+        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
+            ON rm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_direct_tag_matched AS dtm
+            ON dtm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND rm.aws_id IS NULL
+            AND dtm.aws_id IS NULL
+
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- Next we match where the AWS tag is the special openshift_node key
+-- and the value matches an OpenShift node name
+CREATE TEMPORARY TABLE reporting_ocp_aws_openshift_node_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.pod_labels,
+            ocp.pod_usage_cpu_core_seconds,
+            ocp.pod_request_cpu_core_seconds,
+            ocp.pod_limit_cpu_core_seconds,
+            ocp.pod_usage_memory_byte_seconds,
+            ocp.pod_request_memory_byte_seconds,
+            ocp.node_capacity_cpu_cores,
+            ocp.node_capacity_cpu_core_seconds,
+            ocp.node_capacity_memory_bytes,
+            ocp.node_capacity_memory_byte_seconds,
+            ocp.cluster_capacity_cpu_core_seconds,
+            ocp.cluster_capacity_memory_byte_seconds,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_pod_tags as ocp
+            ON aws.key = 'openshift_node' AND aws.value = ocp.node
+                AND aws.usage_start::date = ocp.usage_start::date
+        -- ANTI JOIN to remove rows that already matched
+        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
+            ON rm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_direct_tag_matched AS dtm
+            ON dtm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_openshift_project_tag_matched as ptm
+            ON ptm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND rm.aws_id IS NULL
+            AND dtm.aws_id IS NULL
+            AND ptm.aws_id IS NULL
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- Next we match where the AWS tag is the special openshift_cluster key
+-- and the value matches an OpenShift cluster name
+CREATE TEMPORARY TABLE reporting_ocp_aws_openshift_cluster_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.pod_labels,
+            ocp.pod_usage_cpu_core_seconds,
+            ocp.pod_request_cpu_core_seconds,
+            ocp.pod_limit_cpu_core_seconds,
+            ocp.pod_usage_memory_byte_seconds,
+            ocp.pod_request_memory_byte_seconds,
+            ocp.node_capacity_cpu_cores,
+            ocp.node_capacity_cpu_core_seconds,
+            ocp.node_capacity_memory_bytes,
+            ocp.node_capacity_memory_byte_seconds,
+            ocp.cluster_capacity_cpu_core_seconds,
+            ocp.cluster_capacity_memory_byte_seconds,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_pod_tags as ocp
+            ON (aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
+                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias)
+                AND aws.usage_start::date = ocp.usage_start::date
+        -- ANTI JOIN to remove rows that already matched
+        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
+            ON rm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_direct_tag_matched AS dtm
+            ON dtm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_openshift_project_tag_matched as ptm
+            ON ptm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_openshift_node_tag_matched as ntm
+            ON ntm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND rm.aws_id IS NULL
+            AND dtm.aws_id IS NULL
+            AND ptm.aws_id IS NULL
+            AND ntm.aws_id IS NULL
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- We UNION the various matches into a table holding all of the
+-- OpenShift pod data matches for easier use.
+CREATE TEMPORARY TABLE reporting_ocpawsusagelineitem_daily_{uuid} AS (
+    SELECT *
+    FROM reporting_ocp_aws_resource_id_matched
+
+    UNION
+
+    SELECT *
+    FROM reporting_ocp_aws_direct_tag_matched
+
+    UNION
+
+    SELECT *
+    FROM reporting_ocp_aws_openshift_project_tag_matched
+
+    UNION
+
+    SELECT *
+    FROM reporting_ocp_aws_openshift_node_tag_matched
+
+    UNION
+
+    SELECT *
+    FROM reporting_ocp_aws_openshift_cluster_tag_matched
+);
+
+-- Then we match for OpenShift volume data where the volume label key and value
+-- and AWS tag key and value match directly
+CREATE TEMPORARY TABLE reporting_ocp_aws_storage_direct_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.persistentvolumeclaim,
+            ocp.persistentvolume,
+            ocp.storageclass,
+            ocp.persistentvolumeclaim_capacity_bytes,
+            ocp.persistentvolumeclaim_capacity_byte_seconds,
+            ocp.volume_request_storage_byte_seconds,
+            ocp.persistentvolumeclaim_usage_byte_seconds,
+            ocp.persistentvolume_labels,
+            ocp.persistentvolumeclaim_labels,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_storage_tags as ocp
+            ON aws.key = ocp.key
+                AND aws.value = ocp.value
+                AND aws.usage_start::date = ocp.usage_start::date
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- Then we match where the AWS tag is the special openshift_project key
+-- and the value matches an OpenShift project name
+CREATE TEMPORARY TABLE reporting_ocp_aws_storage_openshift_project_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.persistentvolumeclaim,
+            ocp.persistentvolume,
+            ocp.storageclass,
+            ocp.persistentvolumeclaim_capacity_bytes,
+            ocp.persistentvolumeclaim_capacity_byte_seconds,
+            ocp.volume_request_storage_byte_seconds,
+            ocp.persistentvolumeclaim_usage_byte_seconds,
+            ocp.persistentvolume_labels,
+            ocp.persistentvolumeclaim_labels,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_storage_tags as ocp
+            ON aws.key = 'openshift_project' AND aws.value = ocp.namespace
+                AND aws.usage_start::date = ocp.usage_start::date
+        LEFT JOIN reporting_ocp_aws_storage_direct_tag_matched AS dtm
+            ON dtm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND dtm.aws_id IS NULL
+
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- Next we match where the AWS tag is the special openshift_node key
+-- and the value matches an OpenShift node name
+CREATE TEMPORARY TABLE reporting_ocp_aws_storage_openshift_node_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.persistentvolumeclaim,
+            ocp.persistentvolume,
+            ocp.storageclass,
+            ocp.persistentvolumeclaim_capacity_bytes,
+            ocp.persistentvolumeclaim_capacity_byte_seconds,
+            ocp.volume_request_storage_byte_seconds,
+            ocp.persistentvolumeclaim_usage_byte_seconds,
+            ocp.persistentvolume_labels,
+            ocp.persistentvolumeclaim_labels,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_storage_tags as ocp
+            ON aws.key = 'openshift_node' AND aws.value = ocp.node
+                AND aws.usage_start::date = ocp.usage_start::date
+        -- ANTI JOIN to remove rows that already matched
+        LEFT JOIN reporting_ocp_aws_storage_direct_tag_matched AS dtm
+            ON dtm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_storage_openshift_project_tag_matched as ptm
+            ON ptm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND dtm.aws_id IS NULL
+            AND ptm.aws_id IS NULL
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- Next we match where the AWS tag is the special openshift_cluster key
+-- and the value matches an OpenShift cluster name
+CREATE TEMPORARY TABLE reporting_ocp_aws_storage_openshift_cluster_tag_matched AS (
+    WITH cte_tag_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.persistentvolumeclaim,
+            ocp.persistentvolume,
+            ocp.storageclass,
+            ocp.persistentvolumeclaim_capacity_bytes,
+            ocp.persistentvolumeclaim_capacity_byte_seconds,
+            ocp.volume_request_storage_byte_seconds,
+            ocp.persistentvolumeclaim_usage_byte_seconds,
+            ocp.persistentvolume_labels,
+            ocp.persistentvolumeclaim_labels,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_aws_tags as aws
+        JOIN reporting_ocp_storage_tags as ocp
+            ON (aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
+                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias)
+                AND aws.usage_start::date = ocp.usage_start::date
+        -- ANTI JOIN to remove rows that already matched
+        LEFT JOIN reporting_ocp_aws_storage_direct_tag_matched AS dtm
+            ON dtm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_storage_openshift_project_tag_matched as ptm
+            ON ptm.aws_id = aws.id
+        LEFT JOIN reporting_ocp_aws_storage_openshift_node_tag_matched as ntm
+            ON ntm.aws_id = aws.id
+        WHERE date(aws.usage_start) >= '{start_date}'
+            AND date(aws.usage_start) <= '{end_date}'
+            AND dtm.aws_id IS NULL
+            AND ptm.aws_id IS NULL
+            AND ntm.aws_id IS NULL
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_tag_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_tag_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- We UNION the various matches into a table holding all of the
+-- OpenShift volume data matches for easier use.
+CREATE TEMPORARY TABLE reporting_ocpawsstoragelineitem_daily_{uuid} AS (
+    SELECT *
+    FROM reporting_ocp_aws_storage_direct_tag_matched
+
+    UNION
+
+
+    SELECT *
+    FROM reporting_ocp_aws_storage_openshift_project_tag_matched
+
+    UNION
+
+    SELECT *
+    FROM reporting_ocp_aws_storage_openshift_node_tag_matched
+
+    UNION
+
+    SELECT *
+    FROM reporting_ocp_aws_storage_openshift_cluster_tag_matched
+);
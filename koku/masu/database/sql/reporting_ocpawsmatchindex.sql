@@ -0,0 +1,593 @@
+-- The Python string variable subsitutions {aws_where_clause} and
+-- {ocp_where_clause} optionally filter AWS and OCP data by provider/source
+-- Ex aws_where_clause: 'AND cost_entry_bill_id IN (1, 2, 3)'
+-- Ex ocp_where_clause: "AND cluster_id = 'abcd-1234`"
+
+-- Matches between AWS and OpenShift daily line items are kept in
+-- reporting_ocpawsmatchindex for each usage day, AWS bill and OpenShift
+-- cluster. Whether two line items match only depends on a few of their
+-- columns: the AWS resource id and tags, and the OpenShift resource id,
+-- project, node, cluster alias and labels. The matches are stored between
+-- match keys, a hash of those columns, so they stay valid when the daily
+-- line items are rebuilt with new ids.
+CREATE TEMPORARY TABLE reporting_ocp_aws_match_aws_keys_{uuid} AS (
+    SELECT id,
+        date(usage_start) as usage_start,
+        cost_entry_bill_id,
+        resource_id,
+        tags,
+        md5(ROW(resource_id, tags)::text) as aws_key
+    FROM {schema}.reporting_awscostentrylineitem_daily
+    WHERE date(usage_start) >= '{start_date}'
+        AND date(usage_start) <= '{end_date}'
+        {aws_where_clause}
+)
+;
+
+CREATE TEMPORARY TABLE reporting_ocp_aws_match_pod_keys_{uuid} AS (
+    SELECT id,
+        date(usage_start) as usage_start,
+        cluster_id,
+        cluster_alias,
+        resource_id,
+        namespace,
+        node,
+        pod_labels,
+        md5(ROW(resource_id, namespace, node, cluster_alias, pod_labels)::text) as ocp_key
+    FROM {schema}.reporting_ocpusagelineitem_daily
+    WHERE date(usage_start) >= '{start_date}'
+        AND date(usage_start) <= '{end_date}'
+        {ocp_where_clause}
+)
+;
+
+CREATE TEMPORARY TABLE reporting_ocp_aws_match_storage_keys_{uuid} AS (
+    SELECT id,
+        date(usage_start) as usage_start,
+        cluster_id,
+        cluster_alias,
+        namespace,
+        node,
+        persistentvolume_labels,
+        persistentvolumeclaim_labels,
+        md5(ROW(namespace, node, cluster_alias, persistentvolume_labels,
+                persistentvolumeclaim_labels)::text) as ocp_key
+    FROM {schema}.reporting_ocpstoragelineitem_daily
+    WHERE date(usage_start) >= '{start_date}'
+        AND date(usage_start) <= '{end_date}'
+        {ocp_where_clause}
+)
+;
+
+-- The matches of a day, bill and cluster only change when the set of
+-- match keys on either side changes, so each day is fingerprinted by a
+-- hash of its distinct match keys and only the days whose fingerprint
+-- changed are matched again
+CREATE TEMPORARY TABLE reporting_ocp_aws_match_fingerprint_{uuid} AS (
+    WITH cte_aws AS (
+        SELECT usage_start,
+            cost_entry_bill_id,
+            md5(string_agg(DISTINCT aws_key, ',' ORDER BY aws_key)) as fingerprint
+        FROM reporting_ocp_aws_match_aws_keys_{uuid}
+        GROUP BY usage_start, cost_entry_bill_id
+    ),
+    cte_ocp_pod AS (
+        SELECT usage_start,
+            cluster_id,
+            md5(string_agg(DISTINCT ocp_key, ',' ORDER BY ocp_key)) as fingerprint
+        FROM reporting_ocp_aws_match_pod_keys_{uuid}
+        GROUP BY usage_start, cluster_id
+    ),
+    cte_ocp_storage AS (
+        SELECT usage_start,
+            cluster_id,
+            md5(string_agg(DISTINCT ocp_key, ',' ORDER BY ocp_key)) as fingerprint
+        FROM reporting_ocp_aws_match_storage_keys_{uuid}
+        GROUP BY usage_start, cluster_id
+    ),
+    cte_ocp AS (
+        SELECT coalesce(pod.usage_start, storage.usage_start) as usage_start,
+            coalesce(pod.cluster_id, storage.cluster_id) as cluster_id,
+            concat_ws(':',
+                coalesce(pod.fingerprint, ''),
+                coalesce(storage.fingerprint, '')
+            ) as fingerprint
+        FROM cte_ocp_pod AS pod
+        FULL OUTER JOIN cte_ocp_storage AS storage
+            ON pod.usage_start = storage.usage_start
+                AND pod.cluster_id = storage.cluster_id
+    )
+    SELECT aws.usage_start,
+        aws.cost_entry_bill_id,
+        ocp.cluster_id,
+        concat_ws(':', aws.fingerprint, ocp.fingerprint) as fingerprint
+    FROM cte_aws AS aws
+    JOIN cte_ocp AS ocp
+        ON aws.usage_start = ocp.usage_start
+)
+;
+
+-- A day, bill and cluster is stale when its fingerprint changed or when
+-- its daily data is gone altogether
+CREATE TEMPORARY TABLE reporting_ocp_aws_match_stale_{uuid} AS (
+    SELECT fp.usage_start,
+        fp.cost_entry_bill_id,
+        fp.cluster_id
+    FROM reporting_ocp_aws_match_fingerprint_{uuid} AS fp
+    LEFT JOIN {schema}.reporting_ocpawsmatchstate AS ms
+        ON ms.usage_start = fp.usage_start
+            AND ms.cost_entry_bill_id = fp.cost_entry_bill_id
+            AND ms.cluster_id = fp.cluster_id
+    WHERE ms.fingerprint IS DISTINCT FROM fp.fingerprint
+
+    UNION
+
+    SELECT usage_start,
+        cost_entry_bill_id,
+        cluster_id
+    FROM {schema}.reporting_ocpawsmatchstate AS ms
+    WHERE usage_start >= '{start_date}'
+        AND usage_start <= '{end_date}'
+        {aws_where_clause}
+        {ocp_where_clause}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM reporting_ocp_aws_match_fingerprint_{uuid} AS fp
+            WHERE fp.usage_start = ms.usage_start
+                AND fp.cost_entry_bill_id = ms.cost_entry_bill_id
+                AND fp.cluster_id = ms.cluster_id
+        )
+)
+;
+
+DELETE FROM {schema}.reporting_ocpawsmatchindex AS mi
+    USING reporting_ocp_aws_match_stale_{uuid} AS st
+WHERE mi.usage_start = st.usage_start
+    AND mi.cost_entry_bill_id = st.cost_entry_bill_id
+    AND mi.cluster_id = st.cluster_id
+;
+
+-- We use a LATERAL JOIN here to get the JSON tags split out into key, value
+-- columns, once per match key of the stale days
+CREATE TEMPORARY TABLE reporting_aws_tags_{uuid} AS (
+    SELECT DISTINCT aws.usage_start,
+        aws.cost_entry_bill_id,
+        aws.aws_key,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM reporting_ocp_aws_match_aws_keys_{uuid} as aws,
+        jsonb_each_text(aws.tags) labels
+    WHERE EXISTS (
+        SELECT 1
+        FROM reporting_ocp_aws_match_stale_{uuid} AS st
+        WHERE st.usage_start = aws.usage_start
+            AND st.cost_entry_bill_id = aws.cost_entry_bill_id
+    )
+)
+;
+
+CREATE TEMPORARY TABLE reporting_ocp_pod_tags_{uuid} AS (
+    SELECT DISTINCT ocp.usage_start,
+        ocp.cluster_id,
+        ocp.cluster_alias,
+        ocp.namespace,
+        ocp.node,
+        ocp.ocp_key,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM reporting_ocp_aws_match_pod_keys_{uuid} as ocp,
+        jsonb_each_text(ocp.pod_labels) labels
+    WHERE EXISTS (
+        SELECT 1
+        FROM reporting_ocp_aws_match_stale_{uuid} AS st
+        WHERE st.usage_start = ocp.usage_start
+            AND st.cluster_id = ocp.cluster_id
+    )
+)
+;
+
+CREATE TEMPORARY TABLE reporting_ocp_storage_tags_{uuid} AS (
+    SELECT ocp.usage_start,
+        ocp.cluster_id,
+        ocp.cluster_alias,
+        ocp.namespace,
+        ocp.node,
+        ocp.ocp_key,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM reporting_ocp_aws_match_storage_keys_{uuid} as ocp,
+        jsonb_each_text(ocp.persistentvolume_labels) labels
+    WHERE EXISTS (
+        SELECT 1
+        FROM reporting_ocp_aws_match_stale_{uuid} AS st
+        WHERE st.usage_start = ocp.usage_start
+            AND st.cluster_id = ocp.cluster_id
+    )
+
+    UNION
+
+    SELECT ocp.usage_start,
+        ocp.cluster_id,
+        ocp.cluster_alias,
+        ocp.namespace,
+        ocp.node,
+        ocp.ocp_key,
+        LOWER(key) as key,
+        LOWER(value) as value
+    FROM reporting_ocp_aws_match_storage_keys_{uuid} as ocp,
+        jsonb_each_text(ocp.persistentvolumeclaim_labels) labels
+    WHERE EXISTS (
+        SELECT 1
+        FROM reporting_ocp_aws_match_stale_{uuid} AS st
+        WHERE st.usage_start = ocp.usage_start
+            AND st.cluster_id = ocp.cluster_id
+    )
+)
+;
+
+-- Every way an AWS match key matches is stored with its match type, the
+-- summary keeps the lowest type per AWS line item just like the cascading
+-- match passes in reporting_ocpawscostlineitem_daily_match.sql
+INSERT INTO {schema}.reporting_ocpawsmatchindex (
+    usage_start,
+    cost_entry_bill_id,
+    cluster_id,
+    aws_key,
+    ocp_key,
+    data_source,
+    match_type
+)
+    -- Direct resource id match, usually OCP node -> AWS EC2 instance ID
+    SELECT st.usage_start,
+        st.cost_entry_bill_id,
+        st.cluster_id,
+        aws.aws_key,
+        ocp.ocp_key,
+        'Pod',
+        1
+    FROM reporting_ocp_aws_match_stale_{uuid} AS st
+    JOIN reporting_ocp_aws_match_aws_keys_{uuid} AS aws
+        ON aws.usage_start = st.usage_start
+            AND aws.cost_entry_bill_id = st.cost_entry_bill_id
+    JOIN reporting_ocp_aws_match_pod_keys_{uuid} AS ocp
+        ON ocp.usage_start = st.usage_start
+            AND ocp.cluster_id = st.cluster_id
+            AND ocp.resource_id = aws.resource_id
+
+    UNION
+
+    -- Pod label key and value match the AWS tag key and value directly
+    SELECT st.usage_start,
+        st.cost_entry_bill_id,
+        st.cluster_id,
+        aws.aws_key,
+        ocp.ocp_key,
+        'Pod',
+        2
+    FROM reporting_ocp_aws_match_stale_{uuid} AS st
+    JOIN reporting_aws_tags_{uuid} AS aws
+        ON aws.usage_start = st.usage_start
+            AND aws.cost_entry_bill_id = st.cost_entry_bill_id
+    JOIN reporting_ocp_pod_tags_{uuid} AS ocp
+        ON ocp.usage_start = st.usage_start
+            AND ocp.cluster_id = st.cluster_id
+            AND aws.key = ocp.key
+            AND aws.value = ocp.value
+
+    UNION
+
+    -- The special openshift_project, openshift_node and openshift_cluster
+    -- AWS tags match the pod's project, node and cluster
+    SELECT st.usage_start,
+        st.cost_entry_bill_id,
+        st.cluster_id,
+        aws.aws_key,
+        ocp.ocp_key,
+        'Pod',
+        CASE aws.key
+            WHEN 'openshift_project' THEN 3
+            WHEN 'openshift_node' THEN 4
+            ELSE 5
+        END
+    FROM reporting_ocp_aws_match_stale_{uuid} AS st
+    JOIN reporting_aws_tags_{uuid} AS aws
+        ON aws.usage_start = st.usage_start
+            AND aws.cost_entry_bill_id = st.cost_entry_bill_id
+    JOIN reporting_ocp_pod_tags_{uuid} AS ocp
+        ON ocp.usage_start = st.usage_start
+            AND ocp.cluster_id = st.cluster_id
+            AND (aws.key = 'openshift_project' AND aws.value = ocp.namespace
+                OR aws.key = 'openshift_node' AND aws.value = ocp.node
+                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
+                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias)
+
+    UNION
+
+    -- Volume label key and value match the AWS tag key and value directly
+    SELECT st.usage_start,
+        st.cost_entry_bill_id,
+        st.cluster_id,
+        aws.aws_key,
+        ocp.ocp_key,
+        'Storage',
+        2
+    FROM reporting_ocp_aws_match_stale_{uuid} AS st
+    JOIN reporting_aws_tags_{uuid} AS aws
+        ON aws.usage_start = st.usage_start
+            AND aws.cost_entry_bill_id = st.cost_entry_bill_id
+    JOIN reporting_ocp_storage_tags_{uuid} AS ocp
+        ON ocp.usage_start = st.usage_start
+            AND ocp.cluster_id = st.cluster_id
+            AND aws.key = ocp.key
+            AND aws.value = ocp.value
+
+    UNION
+
+    SELECT st.usage_start,
+        st.cost_entry_bill_id,
+        st.cluster_id,
+        aws.aws_key,
+        ocp.ocp_key,
+        'Storage',
+        CASE aws.key
+            WHEN 'openshift_project' THEN 3
+            WHEN 'openshift_node' THEN 4
+            ELSE 5
+        END
+    FROM reporting_ocp_aws_match_stale_{uuid} AS st
+    JOIN reporting_aws_tags_{uuid} AS aws
+        ON aws.usage_start = st.usage_start
+            AND aws.cost_entry_bill_id = st.cost_entry_bill_id
+    JOIN reporting_ocp_storage_tags_{uuid} AS ocp
+        ON ocp.usage_start = st.usage_start
+            AND ocp.cluster_id = st.cluster_id
+            AND (aws.key = 'openshift_project' AND aws.value = ocp.namespace
+                OR aws.key = 'openshift_node' AND aws.value = ocp.node
+                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
+                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias)
+;
+
+DELETE FROM {schema}.reporting_ocpawsmatchstate AS ms
+    USING reporting_ocp_aws_match_stale_{uuid} AS st
+WHERE ms.usage_start = st.usage_start
+    AND ms.cost_entry_bill_id = st.cost_entry_bill_id
+    AND ms.cluster_id = st.cluster_id
+;
+
+INSERT INTO {schema}.reporting_ocpawsmatchstate (
+    usage_start,
+    cost_entry_bill_id,
+    cluster_id,
+    fingerprint
+)
+    SELECT fp.usage_start,
+        fp.cost_entry_bill_id,
+        fp.cluster_id,
+        fp.fingerprint
+    FROM reporting_ocp_aws_match_fingerprint_{uuid} AS fp
+    JOIN reporting_ocp_aws_match_stale_{uuid} AS st
+        ON st.usage_start = fp.usage_start
+            AND st.cost_entry_bill_id = fp.cost_entry_bill_id
+            AND st.cluster_id = fp.cluster_id
+;
+
+-- The matches of the lowest match type for each AWS match key in the
+-- window, joined back to the daily line items holding the match keys
+CREATE TEMPORARY TABLE reporting_ocp_aws_pod_matches_{uuid} AS (
+    SELECT aws.id as aws_id,
+        ocp.id as ocp_id,
+        mi.match_type
+    FROM (
+        SELECT usage_start,
+            cost_entry_bill_id,
+            cluster_id,
+            aws_key,
+            ocp_key,
+            match_type,
+            rank() OVER (PARTITION BY usage_start, cost_entry_bill_id, aws_key
+                         ORDER BY match_type) as match_rank
+        FROM {schema}.reporting_ocpawsmatchindex
+        WHERE usage_start >= '{start_date}'
+            AND usage_start <= '{end_date}'
+            AND data_source = 'Pod'
+            {aws_where_clause}
+            {ocp_where_clause}
+    ) AS mi
+    JOIN reporting_ocp_aws_match_aws_keys_{uuid} AS aws
+        ON aws.usage_start = mi.usage_start
+            AND aws.cost_entry_bill_id = mi.cost_entry_bill_id
+            AND aws.aws_key = mi.aws_key
+    JOIN reporting_ocp_aws_match_pod_keys_{uuid} AS ocp
+        ON ocp.usage_start = mi.usage_start
+            AND ocp.cluster_id = mi.cluster_id
+            AND ocp.ocp_key = mi.ocp_key
+    WHERE mi.match_rank = 1
+)
+;
+
+CREATE TEMPORARY TABLE reporting_ocp_aws_storage_matches_{uuid} AS (
+    SELECT aws.id as aws_id,
+        ocp.id as ocp_id,
+        mi.match_type
+    FROM (
+        SELECT usage_start,
+            cost_entry_bill_id,
+            cluster_id,
+            aws_key,
+            ocp_key,
+            match_type,
+            rank() OVER (PARTITION BY usage_start, cost_entry_bill_id, aws_key
+                         ORDER BY match_type) as match_rank
+        FROM {schema}.reporting_ocpawsmatchindex
+        WHERE usage_start >= '{start_date}'
+            AND usage_start <= '{end_date}'
+            AND data_source = 'Storage'
+            {aws_where_clause}
+            {ocp_where_clause}
+    ) AS mi
+    JOIN reporting_ocp_aws_match_aws_keys_{uuid} AS aws
+        ON aws.usage_start = mi.usage_start
+            AND aws.cost_entry_bill_id = mi.cost_entry_bill_id
+            AND aws.aws_key = mi.aws_key
+    JOIN reporting_ocp_aws_match_storage_keys_{uuid} AS ocp
+        ON ocp.usage_start = mi.usage_start
+            AND ocp.cluster_id = mi.cluster_id
+            AND ocp.ocp_key = mi.ocp_key
+    WHERE mi.match_rank = 1
+)
+;
+
+-- The matched OpenShift pod data, joined on the line item ids
+CREATE TEMPORARY TABLE reporting_ocpawsusagelineitem_daily_{uuid} AS (
+    WITH cte_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.pod_labels,
+            ocp.pod_usage_cpu_core_seconds,
+            ocp.pod_request_cpu_core_seconds,
+            ocp.pod_limit_cpu_core_seconds,
+            ocp.pod_usage_memory_byte_seconds,
+            ocp.pod_request_memory_byte_seconds,
+            ocp.node_capacity_cpu_cores,
+            ocp.node_capacity_cpu_core_seconds,
+            ocp.node_capacity_memory_bytes,
+            ocp.node_capacity_memory_byte_seconds,
+            ocp.cluster_capacity_cpu_core_seconds,
+            ocp.cluster_capacity_memory_byte_seconds,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags,
+            m.match_type
+        FROM reporting_ocp_aws_pod_matches_{uuid} AS m
+        JOIN {schema}.reporting_awscostentrylineitem_daily AS aws
+            ON aws.id = m.aws_id
+        JOIN {schema}.reporting_ocpusagelineitem_daily AS ocp
+            ON ocp.id = m.ocp_id
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        CASE WHEN tm.match_type = 1
+            THEN (tm.pod_usage_cpu_core_seconds / tm.node_capacity_cpu_core_seconds) * tm.unblended_cost
+            ELSE tm.unblended_cost / spod.shared_pods
+        END as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
+
+-- The matched OpenShift volume data, joined on the line item ids
+CREATE TEMPORARY TABLE reporting_ocpawsstoragelineitem_daily_{uuid} AS (
+    WITH cte_matched AS (
+        SELECT ocp.id AS ocp_id,
+            ocp.cluster_id,
+            ocp.cluster_alias,
+            ocp.namespace,
+            ocp.pod,
+            ocp.node,
+            ocp.persistentvolumeclaim,
+            ocp.persistentvolume,
+            ocp.storageclass,
+            ocp.persistentvolumeclaim_capacity_bytes,
+            ocp.persistentvolumeclaim_capacity_byte_seconds,
+            ocp.volume_request_storage_byte_seconds,
+            ocp.persistentvolumeclaim_usage_byte_seconds,
+            ocp.persistentvolume_labels,
+            ocp.persistentvolumeclaim_labels,
+            aws.id AS aws_id,
+            aws.cost_entry_bill_id,
+            aws.cost_entry_product_id,
+            aws.cost_entry_pricing_id,
+            aws.cost_entry_reservation_id,
+            aws.line_item_type,
+            aws.usage_account_id,
+            aws.usage_start,
+            aws.usage_end,
+            aws.product_code,
+            aws.usage_type,
+            aws.operation,
+            aws.availability_zone,
+            aws.resource_id,
+            aws.usage_amount,
+            aws.normalization_factor,
+            aws.normalized_usage_amount,
+            aws.currency_code,
+            aws.unblended_rate,
+            aws.unblended_cost,
+            aws.blended_rate,
+            aws.blended_cost,
+            aws.public_on_demand_cost,
+            aws.public_on_demand_rate,
+            aws.tax_type,
+            aws.tags
+        FROM reporting_ocp_aws_storage_matches_{uuid} AS m
+        JOIN {schema}.reporting_awscostentrylineitem_daily AS aws
+            ON aws.id = m.aws_id
+        JOIN {schema}.reporting_ocpstoragelineitem_daily AS ocp
+            ON ocp.id = m.ocp_id
+    ),
+    cte_number_of_shared_projects AS (
+        SELECT aws_id,
+            count(DISTINCT namespace) as shared_projects
+        FROM cte_matched
+        GROUP BY aws_id
+    ),
+    cte_number_of_shared_pods AS (
+        SELECT aws_id,
+            count(DISTINCT pod) as shared_pods
+        FROM cte_matched
+        GROUP BY aws_id
+    )
+    SELECT tm.*,
+        tm.unblended_cost / spod.shared_pods as pod_cost,
+        sp.shared_projects,
+        spod.shared_pods
+    FROM cte_matched AS tm
+    JOIN cte_number_of_shared_projects AS sp
+        ON tm.aws_id = sp.aws_id
+    JOIN cte_number_of_shared_pods AS spod
+        ON tm.aws_id = spod.aws_id
+)
+;
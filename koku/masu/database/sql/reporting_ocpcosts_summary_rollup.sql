@@ -0,0 +1,37 @@
+-- Clear out old entries first
+DELETE FROM {schema}.{rollup_table}
+WHERE date(usage_start) >= '{start_date}'
+    AND date(usage_start) <= '{end_date}'
+    AND cluster_id = '{cluster_id}'
+;
+
+-- Roll the cost summary up to the columns of the rollup
+INSERT INTO {schema}.{rollup_table} (
+    cluster_id,
+    cluster_alias{dimensions},
+    usage_start,
+    usage_end,
+    pod_charge_cpu_core_hours,
+    pod_charge_memory_gigabyte_hours,
+    persistentvolumeclaim_charge_gb_month,
+    infra_cost,
+    project_infra_cost
+)
+    SELECT cluster_id,
+        cluster_alias{dimensions},
+        usage_start,
+        usage_end,
+        sum(pod_charge_cpu_core_hours),
+        sum(pod_charge_memory_gigabyte_hours),
+        sum(persistentvolumeclaim_charge_gb_month),
+        sum(infra_cost),
+        sum(project_infra_cost)
+    FROM {schema}.reporting_ocpcosts_summary
+    WHERE date(usage_start) >= '{start_date}'
+        AND date(usage_start) <= '{end_date}'
+        AND cluster_id = '{cluster_id}'
+    GROUP BY cluster_id,
+        cluster_alias{dimensions},
+        usage_start,
+        usage_end
+;
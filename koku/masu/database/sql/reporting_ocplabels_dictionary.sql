@@ -0,0 +1,33 @@
+-- Add the label keys and values of the daily line items in the window
+-- to the label dictionary of their report period
+INSERT INTO {schema}.reporting_ocplabels_dictionary AS d (
+    report_period_id,
+    usage_month,
+    data_source,
+    key,
+    values
+)
+SELECT rp.id,
+    date(rp.report_period_start) as usage_month,
+    '{data_source}' as data_source,
+    l.key,
+    array_agg(DISTINCT l.value) as values
+FROM (
+    SELECT li.cluster_id,
+        li.usage_start,
+        key,
+        value
+    FROM {schema}.{line_item_table} AS li,
+        jsonb_each_text(li.{labels_column}) labels
+    {where_clause}
+) l
+JOIN {schema}.reporting_ocpusagereportperiod AS rp
+    ON rp.cluster_id = l.cluster_id
+        AND date_trunc('month', rp.report_period_start) = date_trunc('month', l.usage_start)
+GROUP BY rp.id, rp.report_period_start, l.key
+ON CONFLICT (report_period_id, data_source, key) DO UPDATE
+SET values = ARRAY(
+    SELECT DISTINCT unnest(d.values || EXCLUDED.values)
+    ORDER BY 1
+)
+;
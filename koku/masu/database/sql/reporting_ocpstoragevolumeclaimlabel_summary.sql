@@ -3,9 +3,9 @@ SELECT l.key,
     array_agg(DISTINCT l.value) as values
 FROM (
     SELECT key,
-        value
-    FROM {schema}.reporting_ocpstoragelineitem_daily AS li,
-        jsonb_each_text(li.persistentvolumeclaim_labels) labels
+        unnest(values) as value
+    FROM {schema}.reporting_ocplabels_dictionary
+    WHERE data_source = 'volume_claim'
 ) l
 GROUP BY l.key
 ON CONFLICT (key) DO UPDATE
@@ -25,7 +25,7 @@ import shutil
 import tempfile
 import threading
 import time
-from tarfile import ReadError, TarFile
+from tarfile import CompressionError, ReadError, TarFile
 
 import requests
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
@@ -33,7 +33,7 @@ from kafka.errors import KafkaError
 
 from masu.config import Config
 from masu.external.accounts_accessor import (AccountsAccessor, AccountsAccessorError)
-from masu.processor.tasks import get_report_files, summarize_reports
+from masu.processor.tasks import get_report_files, process_cluster_reports, summarize_reports
 from masu.prometheus_stats import KAFKA_CONNECTION_ERRORS_COUNTER
 from masu.util.ocp import common as utils
 
@@ -41,6 +41,9 @@ LOG = logging.getLogger(__name__)
 
 EVENT_LOOP = asyncio.get_event_loop()
 MSG_PENDING_QUEUE = asyncio.Queue()
+PAYLOAD_SEMAPHORE = asyncio.Semaphore(Config.KAFKA_PAYLOAD_CONCURRENCY)
+PAYLOAD_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=Config.KAFKA_PAYLOAD_CONCURRENCY)
+PAYLOAD_SLOTS = []
 
 HCCM_TOPIC = 'platform.upload.hccm'
 VALIDATION_TOPIC = 'platform.upload.validation'
@@ -52,8 +55,71 @@ class KafkaMsgHandlerError(Exception):
     """Kafka mmsg handler error."""
 
 
-# pylint: disable=too-many-locals
-def extract_payload(url):
+class PayloadSlot:
+    """The place of a payload in the order its message arrived in."""
+
+    def __init__(self, earlier):
+        """Initialize the slot after the slots of earlier pending payloads.
+
+        Args:
+            earlier (list): The slots of the payloads still pending
+
+        """
+        self.earlier = earlier
+        # Set to the payload's cluster id, or None, once it is extracted
+        self.cluster_id = EVENT_LOOP.create_future()
+        self.processed = EVENT_LOOP.create_future()
+
+    async def wait_for_cluster(self, cluster_id):
+        """Wait until the earlier payloads of a cluster are processed.
+
+        The cluster of a payload is only known once it is extracted, so
+        the earlier payloads are waited on from the latest back until one
+        of the same cluster is found. That payload waited on its own
+        earlier payloads in turn.
+        """
+        for slot in reversed(self.earlier):
+            if await slot.cluster_id == cluster_id:
+                await slot.processed
+                return
+
+    def release(self):
+        """Let the later payloads go ahead of this one."""
+        if not self.cluster_id.done():
+            self.cluster_id.set_result(None)
+        if not self.processed.done():
+            self.processed.set_result(None)
+        if self in PAYLOAD_SLOTS:
+            PAYLOAD_SLOTS.remove(self)
+
+
+def _extract_members(tar_stream, temp_dir):
+    """Write the regular files of a streamed tarball into a directory.
+
+    Member names are reduced to their base names so a payload can not
+    write outside of the directory.
+
+    Args:
+        tar_stream (TarFile): A tarball opened for stream reading
+        temp_dir (String): The directory to write the files to
+
+    Returns:
+        (list): The names of the extracted files
+
+    """
+    files = []
+    for member in tar_stream:
+        if not member.isfile():
+            continue
+        file_name = os.path.basename(member.name)
+        member_file = tar_stream.extractfile(member)
+        with open('{}/{}'.format(temp_dir, file_name), 'wb') as file_hdl:
+            shutil.copyfileobj(member_file, file_hdl, Config.KAFKA_PAYLOAD_CHUNK_SIZE)
+        files.append(file_name)
+    return files
+
+
+def extract_payload(url, publish=True):
     """
     Extract OCP usage report payload into local directory structure.
 
@@ -68,13 +134,17 @@ def extract_payload(url):
     2. *.csv - Actual usage report for the cluster.  Format is:
         Format is: <uuid>_report_name.csv
 
-    On successful completion the report and manifest will be in a directory
-    structure that the OCPReportDownloader is expecting.
+    The download is streamed through the tar extraction a chunk at a time
+    into a staging directory of its own, and the extracted files are moved
+    (not copied) into the directory structure that the OCPReportDownloader
+    is expecting.
 
     Ex: /var/tmp/insights_local/my-ocp-cluster-1/20181001-20181101
 
     Args:
         url (String): URL path to payload in the Insights upload service..
+        publish (Boolean): When False the files are left in the staging
+            directory, named by the staging_dir key, for publish_payload
 
     Returns:
         (Dict): keys: value
@@ -91,67 +161,94 @@ def extract_payload(url):
     # the pod goes down.
     os.makedirs(Config.TMP_DIR, exist_ok=True)
     temp_dir = tempfile.mkdtemp(dir=Config.TMP_DIR)
+    try:
+        report_meta = _stage_payload(url, temp_dir)
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    report_meta['staging_dir'] = temp_dir
+    if publish:
+        publish_payload(report_meta)
+    return report_meta
+
 
+def _stage_payload(url, temp_dir):
+    """Stream a payload into a staging directory and verify its files."""
     # Download file from quarntine bucket as tar.gz
     try:
-        download_response = requests.get(url)
+        download_response = requests.get(url, stream=True)
         download_response.raise_for_status()
     except requests.exceptions.HTTPError as err:
-        shutil.rmtree(temp_dir)
         raise KafkaMsgHandlerError('Unable to download file. Error: ', str(err))
 
-    temp_file = '{}/{}'.format(temp_dir, 'usage.tar.gz')
-    try:
-        temp_file_hdl = open('{}/{}'.format(temp_dir, 'usage.tar.gz'), 'wb')
-        temp_file_hdl.write(download_response.content)
-        temp_file_hdl.close()
-    except (OSError, IOError) as error:
-        shutil.rmtree(temp_dir)
-        raise KafkaMsgHandlerError('Unable to write file. Error: ', str(error))
-
-    # Extract tarball into temp directory
-    try:
-        mytar = TarFile.open(temp_file)
-        mytar.extractall(path=temp_dir)
-        files = mytar.getnames()
-        manifest_path = [manifest for manifest in files if 'manifest.json' in manifest]
-    except ReadError as error:
-        LOG.error('Unable to untar file. Reason: %s', str(error))
-        shutil.rmtree(temp_dir)
-        raise KafkaMsgHandlerError('Extraction failure.')
+    # Extract tarball into temp directory as it downloads
+    with download_response:
+        download_response.raw.decode_content = True
+        try:
+            with TarFile.open(fileobj=download_response.raw, mode='r|gz',
+                              bufsize=Config.KAFKA_PAYLOAD_CHUNK_SIZE) as tar_stream:
+                files = _extract_members(tar_stream, temp_dir)
+        except (ReadError, CompressionError, EOFError) as error:
+            LOG.error('Unable to untar file. Reason: %s', str(error))
+            raise KafkaMsgHandlerError('Extraction failure.')
+        except (OSError, IOError) as error:
+            raise KafkaMsgHandlerError('Unable to write file. Error: ', str(error))
+
+    if 'manifest.json' not in files:
+        raise KafkaMsgHandlerError('Missing manifest in payload')
 
     # Open manifest.json file and build the payload dictionary.
-    full_manifest_path = '{}/{}'.format(temp_dir, manifest_path[0])
-    report_meta = utils.get_report_details(os.path.dirname(full_manifest_path))
-
-    # Create directory tree for report.
-    usage_month = utils.month_date_range(report_meta.get('date'))
-    destination_dir = '{}/{}/{}'.format(Config.INSIGHTS_LOCAL_REPORT_DIR,
-                                        report_meta.get('cluster_id'),
-                                        usage_month)
-    os.makedirs(destination_dir, exist_ok=True)
-
-    # Copy manifest
-    manifest_destination_path = '{}/{}'.format(destination_dir,
-                                               os.path.basename(report_meta.get('manifest_path')))
-    shutil.copy(report_meta.get('manifest_path'), manifest_destination_path)
-
-    # Copy report payload
+    report_meta = utils.get_report_details(temp_dir)
+
     for report_file in report_meta.get('files'):
-        subdirectory = os.path.dirname(full_manifest_path)
-        payload_source_path = '{}/{}'.format(subdirectory, report_file)
-        payload_destination_path = '{}/{}'.format(destination_dir, report_file)
-        try:
-            shutil.copy(payload_source_path, payload_destination_path)
-        except FileNotFoundError as error:
-            LOG.error('Unable to find file in payload. %s', str(error))
+        if report_file not in files:
+            LOG.error('Unable to find file in payload. %s', report_file)
             raise KafkaMsgHandlerError('Missing file in payload')
-    LOG.info('Successfully extracted OCP for %s/%s', report_meta.get('cluster_id'), usage_month)
-    # Remove temporary directory and files
-    shutil.rmtree(temp_dir)
     return report_meta
 
 
+def publish_payload(report_meta):
+    """
+    Move a staged payload into the local report directory structure.
+
+    The payloads of a cluster share a directory per usage month, so this
+    is called only once the earlier payloads of the cluster are processed
+    when payloads are handled concurrently.
+
+    Args:
+        report_meta (dict): The report details returned by extract_payload
+
+    Returns:
+        None
+
+    """
+    temp_dir = report_meta.pop('staging_dir')
+    try:
+        # Create directory tree for report.
+        usage_month = utils.month_date_range(report_meta.get('date'))
+        destination_dir = '{}/{}/{}'.format(Config.INSIGHTS_LOCAL_REPORT_DIR,
+                                            report_meta.get('cluster_id'),
+                                            usage_month)
+        os.makedirs(destination_dir, exist_ok=True)
+
+        # Move report payload
+        for report_file in report_meta.get('files'):
+            shutil.move('{}/{}'.format(temp_dir, report_file),
+                        '{}/{}'.format(destination_dir, report_file))
+
+        # Move manifest
+        manifest_destination_path = '{}/{}'.format(destination_dir,
+                                                   os.path.basename(report_meta.get('manifest_path')))
+        shutil.move(report_meta.get('manifest_path'), manifest_destination_path)
+        report_meta['manifest_path'] = manifest_destination_path
+    finally:
+        # Remove temporary directory and files
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    LOG.info('Successfully extracted OCP for %s/%s', report_meta.get('cluster_id'), usage_month)
+
+
 async def send_confirmation(request_id, status):  # pragma: no cover
     """
     Send kafka validation message to Insights Upload service.
@@ -192,7 +289,7 @@ async def send_confirmation(request_id, status):  # pragma: no cover
         await producer.stop()
 
 
-def handle_message(msg):
+def handle_message(msg, publish=True):
     """
     Handle messages from message pending queue.
 
@@ -216,6 +313,7 @@ def handle_message(msg):
 
     Args:
         msg - Upload Service message containing usage payload information.
+        publish (Boolean) - Whether to move the payload into place, see extract_payload
 
     Returns:
         (String, dict) - String: Upload Service confirmation status
@@ -231,7 +329,7 @@ def handle_message(msg):
     if msg.topic == HCCM_TOPIC:
         value = json.loads(msg.value.decode('utf-8'))
         try:
-            report_meta = extract_payload(value['url'])
+            report_meta = extract_payload(value['url'], publish=publish)
             return SUCCESS_CONFIRM_STATUS, report_meta
         except KafkaMsgHandlerError as error:
             LOG.error('Unable to extract payload. Error: %s', str(error))
@@ -272,6 +370,9 @@ def process_report(report):
     """
     Process line item report and kick off summarization celery task.
 
+    With OCP_PROCESSING_CELERY_DISPATCH set the processing is queued as a
+    process_cluster_reports task instead.
+
     Args:
         report (Dict) - keys: value
                         file: String,
@@ -285,6 +386,11 @@ def process_report(report):
 
     """
     cluster_id = report.get('cluster_id')
+    if Config.OCP_PROCESSING_CELERY_DISPATCH:
+        async_id = process_cluster_reports.delay(cluster_id)
+        LOG.info('Processing celery uuid: %s for cluster_id: %s', str(async_id), str(cluster_id))
+        return
+
     provider_uuid = utils.get_provider_uuid_from_cluster_id(cluster_id)
     if provider_uuid:
         LOG.info('Found provider_uuid: %s for cluster_id: %s', str(provider_uuid), str(cluster_id))
@@ -301,10 +407,83 @@ def process_report(report):
 
 
 # pylint: disable=broad-except
+async def process_report_for_cluster(report_meta):
+    """
+    Move an extracted report into place and process it.
+
+    The caller waits for the earlier reports of the cluster to be processed
+    first, see PayloadSlot.
+
+    Args:
+        report_meta (dict): The report details returned by extract_payload
+
+    Returns:
+        None
+
+    """
+    try:
+        if 'staging_dir' in report_meta:
+            await EVENT_LOOP.run_in_executor(None, publish_payload, report_meta)
+        await EVENT_LOOP.run_in_executor(None, process_report, report_meta)
+        LOG.info('Processing: %s complete.', str(report_meta))
+    except Exception as error:
+        # The reason for catching all exceptions is to ensure that the event
+        # loop does not block if process_report fails.
+        # Since this is a critical path for the listener it's not worth the
+        # risk of missing an exception in the download->process sequence.
+        LOG.error('Line item processing exception: %s', str(error))
+
+
+async def handle_payload(msg):
+    """
+    Download, extract, confirm and process the payload of one message.
+
+    The download and extraction run in the payload executor so the event
+    loop keeps consuming messages while payloads are in flight. Each
+    payload takes a slot when its message arrives, and its extracted files
+    stay in their staging directory until the payloads of the same cluster
+    that arrived before it are processed, so the reports of a cluster are
+    processed in message order whichever finishes extracting first.
+
+    Args:
+        msg - Upload Service message containing usage payload information.
+
+    Returns:
+        None
+
+    """
+    slot = PayloadSlot(list(PAYLOAD_SLOTS))
+    PAYLOAD_SLOTS.append(slot)
+    try:
+        try:
+            status, report_meta = await EVENT_LOOP.run_in_executor(PAYLOAD_EXECUTOR, handle_message, msg, False)
+            if status:
+                value = json.loads(msg.value.decode('utf-8'))
+                await send_confirmation(value['request_id'], status)
+        finally:
+            PAYLOAD_SEMAPHORE.release()
+        if report_meta:
+            cluster_id = report_meta.get('cluster_id')
+            slot.cluster_id.set_result(cluster_id)
+            await slot.wait_for_cluster(cluster_id)
+            await process_report_for_cluster(report_meta)
+    finally:
+        slot.release()
+
+
+def _log_payload_failure(task):
+    """Log a payload task that ended with an exception."""
+    if not task.cancelled() and task.exception():
+        LOG.error('Payload handling exception: %s', str(task.exception()))
+
+
 async def process_messages():  # pragma: no cover
     """
     Process asyncio MSG_PENDING_QUEUE and send validation status.
 
+    Up to KAFKA_PAYLOAD_CONCURRENCY payloads are downloaded and extracted
+    at the same time.
+
     Args:
         None
 
@@ -314,21 +493,9 @@ async def process_messages():  # pragma: no cover
     """
     while True:
         msg = await MSG_PENDING_QUEUE.get()
-        status, report_meta = handle_message(msg)
-        if status:
-            value = json.loads(msg.value.decode('utf-8'))
-            await send_confirmation(value['request_id'], status)
-        if report_meta:
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-                try:
-                    await EVENT_LOOP.run_in_executor(pool, process_report, report_meta)
-                    LOG.info('Processing: %s complete.', str(report_meta))
-                except Exception as error:
-                    # The reason for catching all exceptions is to ensure that the event
-                    # loop does not block if process_report fails.
-                    # Since this is a critical path for the listener it's not worth the
-                    # risk of missing an exception in the download->process sequence.
-                    LOG.error('Line item processing exception: %s', str(error))
+        await PAYLOAD_SEMAPHORE.acquire()
+        task = asyncio.ensure_future(handle_payload(msg), loop=EVENT_LOOP)
+        task.add_done_callback(_log_payload_failure)
 
 
 async def listen_for_messages(consumer):  # pragma: no cover
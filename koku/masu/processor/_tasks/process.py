@@ -41,7 +41,7 @@ def _process_report_file(schema_name, provider, provider_uuid, report_dict):
         report_dict   (dict) The report data dict from previous task
 
     Returns:
-        None
+        (Boolean): Whether this was the last file of the manifest to be processed
 
     """
     start_date = report_dict.get('start_date')
@@ -78,17 +78,36 @@ def _process_report_file(schema_name, provider, provider_uuid, report_dict):
     with ReportStatsDBAccessor(file_name, manifest_id) as stats_recorder:
         stats_recorder.log_last_completed_datetime()
 
-    with ReportManifestDBAccessor() as manifest_accesor:
-        manifest = manifest_accesor.get_manifest_by_id(manifest_id)
-        if manifest:
-            manifest.num_processed_files += 1
-            manifest.save()
-            manifest_accesor.mark_manifest_as_updated(manifest)
-        else:
-            LOG.error('Unable to find manifest for ID: %s, file %s', manifest_id, file_name)
+    manifest_complete = _count_processed_file(manifest_id, file_name)
 
     with ProviderDBAccessor(provider_uuid=provider_uuid) as provider_accessor:
         provider_accessor.setup_complete()
 
     files = processor.remove_processed_files(path.dirname(report_path))
     LOG.info('Temporary files removed: %s', str(files))
+
+    return manifest_complete
+
+
+def _count_processed_file(manifest_id, file_name):
+    """
+    Count a file of a manifest as done, whether it was processed or failed.
+
+    Args:
+        manifest_id (int) The manifest of the file
+        file_name   (String) The name of the file
+
+    Returns:
+        (Boolean): Whether every file of the manifest is done
+
+    """
+    manifest_complete = False
+    with ReportManifestDBAccessor() as manifest_accesor:
+        manifest = manifest_accesor.increment_num_processed_files(manifest_id)
+        if manifest:
+            # A file processed again after a failure is counted again
+            manifest_complete = manifest.num_processed_files >= manifest.num_total_files
+            manifest_accesor.mark_manifest_as_updated(manifest)
+        else:
+            LOG.error('Unable to find manifest for ID: %s, file %s', manifest_id, file_name)
+    return manifest_complete
@@ -20,6 +20,7 @@ import logging
 
 from tenant_schemas.utils import schema_context
 
+from masu.database import AWS_CUR_TABLE_MAP
 from masu.database.aws_report_db_accessor import AWSReportDBAccessor
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
 
@@ -66,6 +67,12 @@ class AWSReportDBCleaner():
                 raise AWSReportDBCleanerError(err)
             removed_items = []
 
+            if expired_date is not None and not simulate:
+                for table_name in (AWS_CUR_TABLE_MAP['line_item_daily'],
+                                   AWS_CUR_TABLE_MAP['line_item_daily_summary']):
+                    for partition in accessor.drop_month_partitions(table_name, expired_date):
+                        LOG.info('Dropped usage month table %s', partition)
+
             if expired_date is not None:
                 bill_objects = accessor.get_bill_query_before_date(expired_date)
             else:
@@ -86,9 +93,17 @@ class AWSReportDBCleaner():
                         LOG.info('Removing %s OCP-on-AWS project summary items for bill id %s',
                                  del_count, bill_id)
 
-                        del_count = accessor.get_lineitem_query_for_billid(bill_id).delete()
-                        LOG.info('Removing %s cost entry line items for bill id %s',
+                        del_count = accessor.get_ocp_aws_match_index_query_for_billid(bill_id).\
+                            delete()
+                        LOG.info('Removing %s OCP-on-AWS match index items for bill id %s',
                                  del_count, bill_id)
+                        accessor.get_ocp_aws_match_state_query_for_billid(bill_id).delete()
+
+                        # The bill's line item child table is dropped whole
+                        accessor.drop_partition(AWS_CUR_TABLE_MAP['line_item'],
+                                                'cost_entry_bill_id',
+                                                bill_id)
+                        LOG.info('Removing cost entry line items for bill id %s', bill_id)
 
                         del_count = accessor.get_daily_query_for_billid(bill_id).delete()
                         LOG.info('Removing %s cost entry daily items for bill id %s',
@@ -98,6 +113,12 @@ class AWSReportDBCleaner():
                         LOG.info('Removing %s cost entry summary items for bill id %s',
                                  del_count, bill_id)
 
+                        for rollup_query in \
+                                accessor.get_cost_summary_rollup_queries_for_billid(bill_id):
+                            del_count = rollup_query.delete()
+                            LOG.info('Removing %s cost summary rollup items for bill id %s',
+                                     del_count, bill_id)
+
                         del_count = accessor.get_cost_entry_query_for_billid(bill_id).delete()
                         LOG.info('Removing %s cost entry items for bill id %s',
                                  del_count, bill_id)
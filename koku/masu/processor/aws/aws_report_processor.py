@@ -17,11 +17,13 @@
 
 """Processor for Cost Usage Reports."""
 
-import csv
 import json
 import logging
+from contextlib import contextmanager
+from itertools import islice
 from os import path
 
+from dateutil.parser import parse
 from tenant_schemas.utils import schema_context
 
 from masu.config import Config
@@ -29,7 +31,10 @@ from masu.database import AWS_CUR_TABLE_MAP
 from masu.database.aws_report_db_accessor import AWSReportDBAccessor
 from masu.database.report_manifest_db_accessor import ReportManifestDBAccessor
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
-from masu.processor.report_processor_base import ReportProcessorBase
+from masu.processor.report_processor_base import (ColumnarTransform,
+                                                  LookupCache,
+                                                  ReportProcessorBase,
+                                                  ReportRow)
 from reporting.provider.aws.models import (AWSCostEntry,
                                            AWSCostEntryBill,
                                            AWSCostEntryLineItem,
@@ -39,6 +44,20 @@ from reporting.provider.aws.models import (AWSCostEntry,
 
 LOG = logging.getLogger(__name__)
 
+AWS_TAG_PREFIX = 'resourceTags'
+
+# The report columns that identify the objects a line item refers to
+DIMENSION_KEY_COLUMNS = ('bill/BillType',
+                         'bill/PayerAccountId',
+                         'bill/BillingPeriodStartDate',
+                         'identity/TimeInterval',
+                         'product/sku',
+                         'product/ProductName',
+                         'product/region',
+                         'pricing/term',
+                         'pricing/unit',
+                         'reservation/ReservationARN')
+
 
 # pylint: disable=too-few-public-methods
 class ProcessedReport:
@@ -93,24 +112,99 @@ class AWSReportProcessor(ReportProcessorBase):
         self._report_name = path.basename(report_path)
         self._datetime_format = Config.AWS_DATETIME_STR_FORMAT
         self._batch_size = Config.REPORT_PROCESSING_BATCH_SIZE
+        self._stream_copy = Config.REPORT_PROCESSING_STREAM_COPY
+        self._bulk_dimensions = Config.REPORT_PROCESSING_BULK_DIMENSIONS
+        self._columnar_transform = Config.AWS_REPORT_COLUMNAR_TRANSFORM
+        self._partition_swap = Config.AWS_LINE_ITEM_PARTITION_SWAP
+        self._line_item_table = AWS_CUR_TABLE_MAP['line_item']
+        self._is_finalized_data = False
+        self._billing_period_starts = {}
+        self._file_bill_ids = set()
+        self._stale_bill_ids = set()
+        self._staged_bill_id = None
 
         # Gather database accessors
         with ReportingCommonDBAccessor() as report_common_db:
             self.column_map = report_common_db.column_map
 
+        # Only the bills and cost entries of this provider and billing
+        # period are preloaded; other objects are fetched as rows need them
+        # while the file is processed, see _set_lookup_loaders.
+        cache_size = Config.REPORT_PROCESSING_DIMENSION_CACHE_SIZE
+        self._prefetch_size = Config.REPORT_PROCESSING_PREFETCH_SIZE
         with AWSReportDBAccessor(self._schema_name, self.column_map) as report_db:
             self.report_schema = report_db.report_schema
-            self.existing_bill_map = report_db.get_cost_entry_bills()
-            self.existing_cost_entry_map = report_db.get_cost_entries()
-            self.existing_product_map = report_db.get_products()
+            self.existing_bill_map = report_db.get_cost_entry_bills(provider_id=provider_id)
+            bill_ids = self._get_billing_period_bill_ids(report_db)
+            self.existing_cost_entry_map = LookupCache(
+                None,
+                cache_size,
+                initial=report_db.get_cost_entries(bill_ids=bill_ids) if bill_ids else None
+            )
+            self.existing_product_map = LookupCache(None, cache_size)
             self.existing_pricing_map = report_db.get_pricing()
-            self.existing_reservation_map = report_db.get_reservations()
+            self.existing_reservation_map = LookupCache(None, cache_size)
 
         self.line_item_columns = None
 
         LOG.info('Initialized report processor for file: %s and schema: %s',
                  self._report_name, self._schema_name)
 
+    def _get_billing_period_bill_ids(self, report_db):
+        """Return the ids of the provider's bills for the manifest's billing period.
+
+        Args:
+            report_db (AWSReportDBAccessor): The accessor to query with
+
+        Returns:
+            (list): The bill ids, or None without a manifest
+
+        """
+        if not self.manifest_id:
+            return None
+        with ReportManifestDBAccessor() as manifest_accessor:
+            manifest = manifest_accessor.get_manifest_by_id(self.manifest_id)
+            if manifest is None:
+                return None
+            billing_period_start = manifest.billing_period_start_datetime
+        bills = report_db.get_cost_entry_bills_query_by_provider(self._provider_id)\
+            .filter(billing_period_start=billing_period_start)
+        return list(bills.values_list('id', flat=True))
+
+    def _prefetch_dimensions(self, rows):
+        """Yield rows after fetching the stored objects they refer to in sets.
+
+        The products, reservations and cost entries of each chunk of rows
+        that are not yet held are fetched with one query per table.
+
+        Args:
+            rows (iterable): The rows of the report file
+
+        Returns:
+            (generator): The rows
+
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self._prefetch_size))
+            if not chunk:
+                return
+            self.existing_product_map.prefetch(
+                self._get_cost_entry_product_key(row) for row in chunk
+            )
+            self.existing_reservation_map.prefetch(
+                row.get('reservation/ReservationARN') for row in chunk
+            )
+            cost_entry_keys = []
+            for row in chunk:
+                bill_key = self._get_cost_entry_bill_key(row)
+                bill_id = self.processed_report.bills.get(bill_key,
+                                                          self.existing_bill_map.get(bill_key))
+                if bill_id is not None:
+                    cost_entry_keys.append(self._get_cost_entry_key(row, bill_id))
+            self.existing_cost_entry_map.prefetch(cost_entry_keys)
+            yield from chunk
+
     def process(self):
         """Process CUR file.
 
@@ -118,44 +212,397 @@ class AWSReportProcessor(ReportProcessorBase):
             (None)
 
         """
-        row_count = 0
         self._delete_line_items()
-        opener, mode = self._get_file_opener(self._compression)
-        is_finalized_data = self._check_for_finalized_bill()
-        # pylint: disable=invalid-name
-        with opener(self._report_path, mode) as f:
-            with AWSReportDBAccessor(self._schema_name, self.column_map) as report_db:
-                LOG.info('File %s opened for processing', str(f))
-                reader = csv.DictReader(f)
-                for row in reader:
-                    bill_id = self.create_cost_entry_objects(row, report_db)
-                    if len(self.processed_report.line_items) >= self._batch_size:
-                        LOG.debug('Saving report rows %d to %d for %s', row_count,
-                                  row_count + len(self.processed_report.line_items),
-                                  self._report_name)
-                        self._save_to_db(AWS_CUR_TABLE_MAP['line_item'], report_db)
+        with AWSReportDBAccessor(self._schema_name, self.column_map) as lookup_db:
+            self._set_lookup_loaders(lookup_db)
+            try:
+                self._process_file()
+            finally:
+                # The lookup caches are not read once the file is processed
+                self._set_lookup_loaders(None)
+
+        LOG.info('Completed report processing for file: %s and schema: %s',
+                 self._report_name, self._schema_name)
 
-                        row_count += len(self.processed_report.line_items)
-                        self._update_mappings()
+        return self._is_finalized_data
+
+    def _set_lookup_loaders(self, lookup_db):
+        """Fetch the keys missing from the lookup caches through an accessor.
+
+        Args:
+            lookup_db (AWSReportDBAccessor): The accessor to fetch with, or
+                None to stop fetching
+
+        """
+        if lookup_db is None:
+            self.existing_cost_entry_map.loader = None
+            self.existing_product_map.loader = None
+            self.existing_reservation_map.loader = None
+            return
+        self.existing_cost_entry_map.loader = lookup_db.get_cost_entries_for_keys
+        self.existing_product_map.loader = lookup_db.get_products_for_keys
+        self.existing_reservation_map.loader = lookup_db.get_reservations_for_keys
+
+    def _process_file(self):
+        """Load the line items of the file and record the bill's state."""
+        with AWSReportDBAccessor(self._schema_name, self.column_map) as report_db:
+            try:
+                if self._stream_copy:
+                    bill_id = self._process_stream(report_db)
+                else:
+                    bill_id = self._process_batches(report_db)
+            except Exception:
+                if self._staged_bill_id is not None:
+                    # The bill keeps the line items it had
+                    report_db.drop_staging_table(self._line_item_table)
+                raise
+            if self._staged_bill_id is not None:
+                self._line_item_table = report_db.swap_partition(
+                    AWS_CUR_TABLE_MAP['line_item'],
+                    'cost_entry_bill_id',
+                    self._staged_bill_id,
+                    self._line_item_table
+                )
+                self._drop_stale_bills(report_db)
+
+            # Sniffed from the first row while the file was read
+            if self._is_finalized_data:
+                report_db.mark_bill_as_finalized(bill_id)
+                report_db.commit()
+            report_db.table_changed(self._line_item_table)
+            report_db.commit()
 
-                if self.processed_report.line_items:
+    def _process_batches(self, report_db):
+        """Process the CUR file, saving line items in batches.
+
+        Args:
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (str): The id of the last processed bill
+
+        """
+        row_count = 0
+        bill_id = None
+        dimensions_first = (self._bulk_dimensions or self._columnar_transform
+                            or self._partition_swap)
+        if dimensions_first:
+            bill_id = self._create_cost_entry_dimensions_for_file(report_db)
+
+        with self._open_report_scan() as scan:
+            if dimensions_first:
+                rows = self._iter_line_item_data(scan, report_db)
+            else:
+                rows = self._prefetch_dimensions(
+                    self._read_report_rows(scan, tag_prefix=AWS_TAG_PREFIX)
+                )
+            for row in rows:
+                if dimensions_first:
+                    self._append_line_item_data(row)
+                else:
+                    bill_id = self.create_cost_entry_objects(row, report_db)
+                if len(self.processed_report.line_items) >= self._batch_size:
                     LOG.debug('Saving report rows %d to %d for %s', row_count,
                               row_count + len(self.processed_report.line_items),
                               self._report_name)
-                    self._save_to_db(AWS_CUR_TABLE_MAP['line_item'], report_db)
+                    self._save_to_db(self._line_item_table, report_db)
 
                     row_count += len(self.processed_report.line_items)
+                    self._update_mappings()
 
-                if is_finalized_data:
-                    report_db.mark_bill_as_finalized(bill_id)
-                    report_db.commit()
-                report_db.vacuum_table(AWS_CUR_TABLE_MAP['line_item'])
-                report_db.commit()
+            if self.processed_report.line_items:
+                LOG.debug('Saving report rows %d to %d for %s', row_count,
+                          row_count + len(self.processed_report.line_items),
+                          self._report_name)
+                self._save_to_db(self._line_item_table, report_db)
 
-        LOG.info('Completed report processing for file: %s and schema: %s',
-                 self._report_name, self._schema_name)
+                row_count += len(self.processed_report.line_items)
+
+        return bill_id
+
+    def _process_stream(self, report_db):
+        """Process the CUR file, streaming line items into a single COPY.
+
+        The COPY occupies the database connection while it reads, so the
+        cost entry objects are created in a first pass over the file and
+        the second pass only looks their ids up in memory.
+
+        Args:
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (str): The id of the last processed bill
+
+        """
+        bill_id = self._create_cost_entry_dimensions_for_file(report_db)
+
+        with self._open_report_scan() as scan:
+            row_count = self._save_stream_to_db(self._line_item_table,
+                                                report_db,
+                                                self._iter_line_item_data(scan, report_db))
+        LOG.debug('Streamed %d report rows for %s', row_count, self._report_name)
+
+        self._update_mappings()
+        return bill_id
+
+    def _iter_line_item_data(self, scan, report_db):
+        """Yield the line item data of each row of an open report file.
+
+        The objects the rows refer to must already have been created.
+
+        Args:
+            scan (ReportFileScan): The scan of the open report file
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (generator): The line item data keyed on the DB table's column names
+
+        """
+        if self._columnar_transform:
+            yield from self._iter_columnar_line_item_data(scan, report_db)
+            return
+        for row in self._read_report_rows(scan, tag_prefix=AWS_TAG_PREFIX):
+            yield self._get_line_item_data(row,
+                                           *self._lookup_cost_entry_dimensions(row),
+                                           report_db)
+
+    def _iter_columnar_line_item_data(self, scan, report_db):
+        """Yield line item data transformed a chunk of rows at a time.
+
+        The data is identical to that of _get_line_item_data, but the
+        values of a chunk are converted one column at a time.
+
+        Args:
+            scan (ReportFileScan): The scan of the open report file
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (generator): The line item data keyed on the DB table's column names
+
+        """
+        header = scan.header
+        if header is None:
+            return
+        table_name = AWSCostEntryLineItem._meta.db_table
+        plan = self._compile_projection_plan(header, tag_prefix=AWS_TAG_PREFIX)
+        transform = ColumnarTransform(plan, table_name)
+        transform.set_converters(report_db.get_column_converters(table_name,
+                                                                 transform.columns))
+        columns = transform.columns + ['tags']
+        key_names = [name for name in DIMENSION_KEY_COLUMNS if name in plan.positions]
+        key_indexes = [plan.positions[name] for name in key_names]
+
+        for chunk in transform.read_chunks(scan.rows(),
+                                           Config.REPORT_PROCESSING_COLUMNAR_CHUNK_SIZE):
+            rows, source_columns = transform.transform(chunk)
+            key_rows = zip(*[source_columns[index] for index in key_indexes]) \
+                if key_indexes else [()] * len(rows)
+            for values, key_values in zip(rows, key_rows):
+                bill_id, cost_entry_id, product_id, pricing_id, reservation_id = \
+                    self._lookup_cost_entry_dimensions(dict(zip(key_names, key_values)))
+                data = dict(zip(columns, values))
+                data['cost_entry_id'] = cost_entry_id
+                data['cost_entry_bill_id'] = bill_id
+                data['cost_entry_product_id'] = product_id
+                data['cost_entry_pricing_id'] = pricing_id
+                data['cost_entry_reservation_id'] = reservation_id
+                yield data
+
+    def _create_cost_entry_dimensions_for_file(self, report_db):
+        """Create the objects every row of the file refers to.
+
+        Args:
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (str): The id of the last processed bill
+
+        """
+        bill_id = None
+        with self._open_report_scan() as scan:
+            reader = self._prefetch_dimensions(
+                self._read_report_rows(scan, tag_prefix=AWS_TAG_PREFIX)
+            )
+            if self._bulk_dimensions:
+                bill_id = self._bulk_create_cost_entry_dimensions(reader, report_db)
+            else:
+                for row in reader:
+                    bill_id, *_ = self._create_cost_entry_dimensions(row, report_db)
+        report_db.commit()
+        if self._partition_swap:
+            self._line_item_table = self._get_line_item_table(bill_id, report_db)
+        return bill_id
+
+    def _get_line_item_table(self, bill_id, report_db):
+        """Return the table to load the file's line items into.
+
+        The line items of a file with a single bill go to the bill's child
+        table, created if needed. When the file replaces the bill's line
+        items they are loaded into a staged table instead, which is swapped
+        in for the child once the whole file is loaded. Any other file
+        loads into the parent, after the stale line items are dropped.
+
+        Args:
+            bill_id (int): The id of the file's last bill
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (str): The table name
+
+        """
+        table_name = AWS_CUR_TABLE_MAP['line_item']
+        if bill_id is None or self._file_bill_ids != {bill_id}:
+            self._drop_stale_bills(report_db)
+            return table_name
+        if bill_id in self._stale_bill_ids:
+            staged_table = report_db.create_staged_partition(table_name,
+                                                             'cost_entry_bill_id',
+                                                             bill_id)
+            self._staged_bill_id = bill_id
+            return staged_table
+        self._drop_stale_bills(report_db)
+        return report_db.create_partition(table_name, 'cost_entry_bill_id', bill_id)
+
+    def _drop_stale_bills(self, report_db):
+        """Drop the line items of the stale bills not swapped for staged ones."""
+        for bill_id in sorted(self._stale_bill_ids - {self._staged_bill_id}):
+            report_db.drop_partition(AWS_CUR_TABLE_MAP['line_item'],
+                                     'cost_entry_bill_id',
+                                     bill_id)
+        self._stale_bill_ids = set()
+
+    def _bulk_create_cost_entry_dimensions(self, reader, report_db):
+        """Collect the new objects rows refer to and insert them in sets.
+
+        The distinct keys not yet in memory are buffered and written with
+        one multi-row statement per table whenever a buffer reaches the
+        batch size, and the returned ids are added to the processed maps.
+
+        Args:
+            reader (generator): The rows of the report file
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (str): The id of the last processed bill
+
+        """
+        pending = {
+            'cost_entries': {},
+            'products': {},
+            'pricing': {},
+            'reservations': {},
+            'reservation_updates': {}
+        }
+        bill_id = None
+        for row in reader:
+            bill_id = self._create_cost_entry_bill(row, report_db)
+            self._collect_cost_entry_dimensions(row, bill_id, pending)
+            if max(len(value) for value in pending.values()) >= self._batch_size:
+                self._flush_cost_entry_dimensions(pending, report_db)
+
+        self._flush_cost_entry_dimensions(pending, report_db)
+        return bill_id
+
+    def _collect_cost_entry_dimensions(self, row, bill_id, pending):
+        """Buffer the data of a row's objects that do not exist yet.
+
+        Args:
+            row (dict): A dictionary representation of a CSV file row
+            bill_id (str): The current cost entry bill id
+            pending (dict): Buffered data keyed on object key, per object type
+
+        Returns:
+            (None)
+
+        """
+        report = self.processed_report
+
+        def is_new(key, processed_map, existing_map, pending_map):
+            return not (key in processed_map or key in existing_map or key in pending_map)
+
+        def get_data(table):
+            data = self._get_data_for_table(row, table._meta.db_table)
+            return None if set(data.values()) == {''} else data
+
+        key = self._get_cost_entry_key(row, bill_id)
+        if is_new(key, report.cost_entries, self.existing_cost_entry_map,
+                  pending['cost_entries']):
+            start, end = self._get_cost_entry_time_interval(row.get('identity/TimeInterval'))
+            pending['cost_entries'][key] = {
+                'bill_id': bill_id,
+                'interval_start': parse(start),
+                'interval_end': parse(end)
+            }
 
-        return is_finalized_data
+        key = self._get_cost_entry_product_key(row)
+        if is_new(key, report.products, self.existing_product_map, pending['products']):
+            pending['products'][key] = get_data(AWSCostEntryProduct)
+
+        key = self._get_cost_entry_pricing_key(row)
+        if is_new(key, report.pricing, self.existing_pricing_map, pending['pricing']):
+            pending['pricing'][key] = get_data(AWSCostEntryPricing)
+
+        arn = row.get('reservation/ReservationARN')
+        if row.get('lineItem/LineItemType', '').lower() == 'rifee':
+            # Special rows with additional reservation information
+            pending['reservation_updates'][arn] = get_data(AWSCostEntryReservation)
+        elif is_new(arn, report.reservations, self.existing_reservation_map,
+                    pending['reservations']):
+            pending['reservations'][arn] = get_data(AWSCostEntryReservation)
+
+    def _flush_cost_entry_dimensions(self, pending, report_db):
+        """Insert buffered objects and record their ids in memory.
+
+        Keys whose columns were all empty were buffered as None; they get
+        no object, just as when the objects are created one at a time.
+
+        Args:
+            pending (dict): Buffered data keyed on object key, per object type
+            report_db (AWSReportDBAccessor): The accessor to process with
+
+        Returns:
+            (None)
+
+        """
+        report = self.processed_report
+        inserts = (
+            ('cost_entries', report.cost_entries, AWSCostEntry,
+             None, ['bill_id', 'interval_start'], False),
+            ('products', report.products, AWSCostEntryProduct,
+             ['sku', 'product_name', 'region'], None, False),
+            ('pricing', report.pricing, AWSCostEntryPricing, ['term', 'unit'], None, False),
+            ('reservations', report.reservations, AWSCostEntryReservation,
+             ['reservation_arn'], None, False),
+            ('reservation_updates', report.reservations, AWSCostEntryReservation,
+             ['reservation_arn'], None, True),
+        )
+        for name, processed_map, table, conflict_columns, key_columns, update in inserts:
+            buffered = {key: data for key, data in pending[name].items() if data}
+            pending[name].clear()
+            if not buffered:
+                continue
+            rows = list(buffered.values())
+            row_ids = report_db.bulk_insert_on_conflict(
+                table,
+                rows,
+                conflict_columns=conflict_columns,
+                set_columns=list(rows[0].keys()) if update else None,
+                key_columns=key_columns
+            )
+            processed_map.update(zip(buffered.keys(), row_ids))
+
+    @contextmanager
+    def _open_report_scan(self, **kwargs):
+        """Open the report file, noting whether its bill is finalized."""
+        with super()._open_report_scan(**kwargs) as scan:
+            self._is_finalized_data = self._is_finalized_scan(scan)
+            yield scan
+
+    # pylint: disable=no-self-use
+    def _is_finalized_scan(self, scan):
+        """Return whether the first row of a report file has an invoice id."""
+        invoice_id = scan.get_first('bill/InvoiceId')
+        return invoice_id is not None and invoice_id != ''
 
     def _check_for_finalized_bill(self):
         """Read one line of the report file to check for finalization.
@@ -164,13 +611,8 @@ class AWSReportProcessor(ReportProcessorBase):
             (Boolean): Whether the bill is finalized
 
         """
-        opener, mode = self._get_file_opener(self._compression)
-        # pylint: disable=invalid-name
-        with opener(self._report_path, mode) as f:
-            reader = csv.DictReader(f)
-            row = reader.__next__()
-            invoice_id = row.get('bill/InvoiceId')
-            return invoice_id is not None and invoice_id != ''
+        with self._open_report_scan():
+            return self._is_finalized_data
 
     def _delete_line_items(self):
         """Delete stale data for the report being processed, if necessary."""
@@ -192,6 +634,10 @@ class AWSReportProcessor(ReportProcessorBase):
             bills = accessor.get_cost_entry_bills_query_by_provider(provider_id)
             bills = bills.filter(billing_period_start=bill_date).all()
             with schema_context(self._schema_name):
+                if self._partition_swap:
+                    # The line items are replaced once the file is loaded
+                    self._stale_bill_ids = {bill.id for bill in bills}
+                    return True
                 for bill in bills:
                     line_item_query = accessor.get_lineitem_query_for_billid(bill.id)
                     line_item_query.delete()
@@ -200,6 +646,7 @@ class AWSReportProcessor(ReportProcessorBase):
 
     def _update_mappings(self):
         """Update cache of database objects for reference."""
+        self.existing_bill_map.update(self.processed_report.bills)
         self.existing_cost_entry_map.update(self.processed_report.cost_entries)
         self.existing_product_map.update(self.processed_report.products)
         self.existing_pricing_map.update(self.processed_report.pricing)
@@ -218,6 +665,10 @@ class AWSReportProcessor(ReportProcessorBase):
             (dict): The data from the row keyed on the DB table's column names
 
         """
+        if isinstance(row, ReportRow):
+            self._split_memory_unit(row)
+            return row.plan.project(row, table_name)
+
         # Memory can come as a single number or a number with a unit
         # e.g. "1" vs. "1 Gb" so it gets special cased.
         if 'product/memory' in row and row['product/memory'] is not None:
@@ -237,7 +688,33 @@ class AWSReportProcessor(ReportProcessorBase):
                 if key in column_map}
 
     # pylint: disable=no-self-use
-    def _process_tags(self, row, tag_prefix='resourceTags'):
+    def _split_memory_unit(self, row):
+        """Split the unit out of the memory value of a ReportRow in place."""
+        positions = row.plan.positions
+        memory_index = positions.get('product/memory')
+        if memory_index is None or row[memory_index] is None:
+            return
+        memory_list = row[memory_index].split(' ')
+        if len(memory_list) > 1:
+            memory, unit = memory_list
+        else:
+            memory = memory_list[0]
+            unit = None
+        row[memory_index] = memory
+        row[positions['product/memory_unit']] = unit
+
+    def _compile_projection_plan(self, header, tag_prefix=None):
+        """Compile the plan with a position for the memory unit.
+
+        The unit is split out of product/memory, so it needs a column
+        of its own in rows read as lists.
+        """
+        if 'product/memory' in header and 'product/memory_unit' not in header:
+            header = header + ['product/memory_unit']
+        return super()._compile_projection_plan(header, tag_prefix=tag_prefix)
+
+    # pylint: disable=no-self-use
+    def _process_tags(self, row, tag_prefix=AWS_TAG_PREFIX):
         """Return a JSON string of AWS resource tags.
 
         Args:
@@ -248,6 +725,9 @@ class AWSReportProcessor(ReportProcessorBase):
             (str): A JSON string of AWS resource tags
 
         """
+        if isinstance(row, ReportRow) and row.plan.tag_prefix == tag_prefix:
+            return json.dumps(row.plan.tags(row))
+
         tag_dict = {}
         for key, value in row.items():
             if tag_prefix in key and row[key]:
@@ -270,6 +750,39 @@ class AWSReportProcessor(ReportProcessorBase):
         start, end = interval.split('/')
         return start, end
 
+    def _get_cost_entry_bill_key(self, row):
+        """Return the key identifying the bill of a row.
+
+        The billing period start is parsed, so the key matches those of
+        the bills read from the database.
+        """
+        start = row.get('bill/BillingPeriodStartDate')
+        if start not in self._billing_period_starts:
+            self._billing_period_starts[start] = parse(start) if start else start
+        return (row.get('bill/BillType'),
+                row.get('bill/PayerAccountId'),
+                self._billing_period_starts[start],
+                self._provider_id)
+
+    def _get_cost_entry_key(self, row, bill_id):
+        """Return the key identifying the cost entry of a row."""
+        start, _ = self._get_cost_entry_time_interval(row.get('identity/TimeInterval'))
+        return (bill_id, start)
+
+    # pylint: disable=no-self-use
+    def _get_cost_entry_product_key(self, row):
+        """Return the key identifying the product of a row."""
+        return (row.get('product/sku'),
+                row.get('product/ProductName'),
+                row.get('product/region'))
+
+    # pylint: disable=no-self-use
+    def _get_cost_entry_pricing_key(self, row):
+        """Return the key identifying the pricing of a row."""
+        term = row.get('pricing/term') if row.get('pricing/term') else 'None'
+        unit = row.get('pricing/unit') if row.get('pricing/unit') else 'None'
+        return '{term}-{unit}'.format(term=term, unit=unit)
+
     def _create_cost_entry_bill(self, row, report_db_accessor):
         """Create a cost entry bill object.
 
@@ -281,16 +794,14 @@ class AWSReportProcessor(ReportProcessorBase):
 
         """
         table_name = AWSCostEntryBill
-        start_date = row.get('bill/BillingPeriodStartDate')
-        bill_type = row.get('bill/BillType')
-        payer_account_id = row.get('bill/PayerAccountId')
-
-        key = (bill_type, payer_account_id, start_date, self._provider_id)
+        key = self._get_cost_entry_bill_key(row)
         if key in self.processed_report.bills:
             return self.processed_report.bills[key]
 
         if key in self.existing_bill_map:
-            return self.existing_bill_map[key]
+            bill_id = self.existing_bill_map[key]
+            self._file_bill_ids.add(bill_id)
+            return bill_id
 
         data = self._get_data_for_table(row, table_name._meta.db_table)
 
@@ -304,6 +815,7 @@ class AWSReportProcessor(ReportProcessorBase):
         )
 
         self.processed_report.bills[key] = bill_id
+        self._file_bill_ids.add(bill_id)
 
         return bill_id
 
@@ -322,7 +834,7 @@ class AWSReportProcessor(ReportProcessorBase):
         interval = row.get('identity/TimeInterval')
         start, end = self._get_cost_entry_time_interval(interval)
 
-        key = (bill_id, start)
+        key = self._get_cost_entry_key(row, bill_id)
         if key in self.processed_report.cost_entries:
             return self.processed_report.cost_entries[key]
 
@@ -365,13 +877,51 @@ class AWSReportProcessor(ReportProcessorBase):
         Returns:
             (None)
 
+        """
+        data = self._get_line_item_data(row,
+                                        bill_id,
+                                        cost_entry_id,
+                                        product_id,
+                                        pricing_id,
+                                        reservation_id,
+                                        report_db_accesor)
+
+        self._append_line_item_data(data)
+
+    def _append_line_item_data(self, data):
+        """Add the data of a line item to the current batch."""
+        self.processed_report.line_items.append(data)
+
+        if self.line_item_columns is None:
+            self.line_item_columns = list(data.keys())
+
+    # pylint: disable=too-many-arguments
+    def _get_line_item_data(self,
+                            row,
+                            bill_id,
+                            cost_entry_id,
+                            product_id,
+                            pricing_id,
+                            reservation_id,
+                            report_db_accesor):
+        """Build the database representation of a cost entry line item.
+
+        Args:
+            row (dict): A dictionary representation of a CSV file row
+            bill_id (str): A processed cost entry bill object id
+            cost_entry_id (str): A processed cost entry object id
+            product_id (str): A processed product object id
+            pricing_id (str): A processed pricing object id
+            reservation_id (str): A processed reservation object id
+
+        Returns:
+            (dict): The line item data keyed on the DB table's column names
+
         """
         table_name = AWSCostEntryLineItem
-        data = self._get_data_for_table(row, table_name._meta.db_table)
-        data = report_db_accesor.clean_data(
-            data,
-            table_name._meta.db_table
-        )
+        data = self._get_clean_data_for_table(row,
+                                              table_name._meta.db_table,
+                                              report_db_accesor)
 
         data['tags'] = self._process_tags(row)
         data['cost_entry_id'] = cost_entry_id
@@ -380,10 +930,7 @@ class AWSReportProcessor(ReportProcessorBase):
         data['cost_entry_pricing_id'] = pricing_id
         data['cost_entry_reservation_id'] = reservation_id
 
-        self.processed_report.line_items.append(data)
-
-        if self.line_item_columns is None:
-            self.line_item_columns = list(data.keys())
+        return data
 
     def _create_cost_entry_pricing(self, row, report_db_accessor):
         """Create a cost entry pricing object.
@@ -396,11 +943,7 @@ class AWSReportProcessor(ReportProcessorBase):
 
         """
         table_name = AWSCostEntryPricing
-
-        term = row.get('pricing/term') if row.get('pricing/term') else 'None'
-        unit = row.get('pricing/unit') if row.get('pricing/unit') else 'None'
-
-        key = '{term}-{unit}'.format(term=term, unit=unit)
+        key = self._get_cost_entry_pricing_key(row)
         if key in self.processed_report.pricing:
             return self.processed_report.pricing[key]
 
@@ -434,10 +977,7 @@ class AWSReportProcessor(ReportProcessorBase):
 
         """
         table_name = AWSCostEntryProduct
-        sku = row.get('product/sku')
-        product_name = row.get('product/ProductName')
-        region = row.get('product/region')
-        key = (sku, product_name, region)
+        key = self._get_cost_entry_product_key(row)
 
         if key in self.processed_report.products:
             return self.processed_report.products[key]
@@ -509,14 +1049,52 @@ class AWSReportProcessor(ReportProcessorBase):
 
         return reservation_id
 
-    def create_cost_entry_objects(self, row, report_db_accesor):
-        """Create the set of objects required for a row of data."""
+    def _create_cost_entry_dimensions(self, row, report_db_accesor):
+        """Create the objects a row's line item refers to.
+
+        Returns:
+            (tuple): The bill, cost entry, product, pricing and reservation ids
+
+        """
         bill_id = self._create_cost_entry_bill(row, report_db_accesor)
         cost_entry_id = self._create_cost_entry(row, bill_id, report_db_accesor)
         product_id = self._create_cost_entry_product(row, report_db_accesor)
         pricing_id = self._create_cost_entry_pricing(row, report_db_accesor)
         reservation_id = self._create_cost_entry_reservation(row, report_db_accesor)
 
+        return bill_id, cost_entry_id, product_id, pricing_id, reservation_id
+
+    def _lookup_cost_entry_dimensions(self, row):
+        """Look up the ids of a row's already created objects in memory.
+
+        Returns:
+            (tuple): The bill, cost entry, product, pricing and reservation ids
+
+        """
+        def lookup(key, processed_map, existing_map):
+            if key in processed_map:
+                return processed_map[key]
+            return existing_map.get(key)
+
+        report = self.processed_report
+        bill_id = lookup(self._get_cost_entry_bill_key(row),
+                         report.bills, self.existing_bill_map)
+        cost_entry_id = lookup(self._get_cost_entry_key(row, bill_id),
+                               report.cost_entries, self.existing_cost_entry_map)
+        product_id = lookup(self._get_cost_entry_product_key(row),
+                            report.products, self.existing_product_map)
+        pricing_id = lookup(self._get_cost_entry_pricing_key(row),
+                            report.pricing, self.existing_pricing_map)
+        reservation_id = lookup(row.get('reservation/ReservationARN'),
+                                report.reservations, self.existing_reservation_map)
+
+        return bill_id, cost_entry_id, product_id, pricing_id, reservation_id
+
+    def create_cost_entry_objects(self, row, report_db_accesor):
+        """Create the set of objects required for a row of data."""
+        bill_id, cost_entry_id, product_id, pricing_id, reservation_id = \
+            self._create_cost_entry_dimensions(row, report_db_accesor)
+
         self._create_cost_entry_line_item(
             row,
             cost_entry_id,
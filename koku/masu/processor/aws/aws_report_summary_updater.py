@@ -106,7 +106,8 @@ class AWSReportSummaryUpdater:
                      '\n\tProvider: %s \n\tDates: %s - %s',
                      self._schema_name, self._provider.uuid, start_date, end_date)
             accessor.populate_line_item_daily_summary_table(start_date, end_date, bill_ids)
-            accessor.populate_tags_summary_table()
+            accessor.populate_cost_summary_rollup_tables(start_date, end_date, bill_ids)
+            accessor.populate_tags_summary_table(start_date, end_date, bill_ids)
             for bill in bills:
                 if bill.summary_data_creation_datetime is None:
                     bill.summary_data_creation_datetime = \
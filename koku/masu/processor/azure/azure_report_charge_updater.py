@@ -47,6 +47,11 @@ class AzureReportChargeUpdater:
         with ReportingCommonDBAccessor() as reporting_common:
             self._column_map = reporting_common.column_map
 
+    # pylint: disable=no-self-use
+    def get_charge_window(self, start_date=None, end_date=None):
+        """Return the dates to update charges for; Azure charges follow the usage window."""
+        return start_date, end_date
+
     def update_summary_charge_info(self, start_date=None, end_date=None):
         """Update the Azure summary table with the charge information.
 
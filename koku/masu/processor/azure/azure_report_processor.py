@@ -16,7 +16,6 @@
 #
 
 """Processor for Azure Cost Usage Reports."""
-import csv
 import logging
 from datetime import datetime
 
@@ -278,17 +277,15 @@ class AzureReportProcessor(ReportProcessorBase):
 
         """
         table_name = AzureCostEntryLineItemDaily
-        data = self._get_data_for_table(row, table_name._meta.db_table)
+        data = self._get_clean_data_for_table(row,
+                                              table_name._meta.db_table,
+                                              report_db_accesor,
+                                              raw_columns=('tags',))
         tag_str = ''
 
         if 'tags' in data:
             tag_str = data.pop('tags')
 
-        data = report_db_accesor.clean_data(
-            data,
-            table_name._meta.db_table
-        )
-
         data['tags'] = tag_str
         data['cost_entry_bill_id'] = bill_id
         data['cost_entry_product_id'] = product_id
@@ -326,13 +323,9 @@ class AzureReportProcessor(ReportProcessorBase):
 
         """
         row_count = 0
-        # pylint: disable=invalid-name
-        opener, mode = self._get_file_opener(self._compression)
-        with opener(self._report_path, mode, encoding='utf-8-sig') as f:
+        with self._open_report_scan(encoding='utf-8-sig') as scan:
             with AzureReportDBAccessor(self._schema_name, self.column_map) as report_db:
-                LOG.info('File %s opened for processing', str(f))
-                reader = csv.DictReader(f)
-                for row in reader:
+                for row in self._read_report_rows(scan):
                     _ = self.create_cost_entry_objects(row, report_db)
                 if len(self.processed_report.line_items) >= self._batch_size:
                     LOG.debug('Saving report rows %d to %d for %s', row_count,
@@ -350,7 +343,7 @@ class AzureReportProcessor(ReportProcessorBase):
                     self._save_to_db(AZURE_REPORT_TABLE_MAP['line_item'], report_db)
                     row_count += len(self.processed_report.line_items)
 
-                report_db.vacuum_table(AZURE_REPORT_TABLE_MAP['line_item'])
+                report_db.table_changed(AZURE_REPORT_TABLE_MAP['line_item'])
                 report_db.commit()
                 LOG.info('Completed report processing for file: %s and schema: %s',
                          self._report_name, self._schema_name)
@@ -192,3 +192,4 @@ class OCPCloudReportSummaryUpdater:
                      '\n\tSchema: %s \n\tProvider: %s \n\tDates: %s - %s',
                      self._schema_name, self._provider.uuid, start_date, end_date)
             accessor.populate_cost_summary_table(cluster_id, start_date, end_date)
+            accessor.populate_cost_summary_rollup_tables(cluster_id, start_date, end_date)
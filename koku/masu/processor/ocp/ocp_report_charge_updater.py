@@ -16,8 +16,6 @@
 #
 """Updates report summary tables in the database with charge information."""
 
-import csv
-import io
 import logging
 from decimal import Decimal
 
@@ -156,80 +154,85 @@ class OCPReportChargeUpdater:
                                       'charge': usage_charge_value + request_charge_value}
         return charge_dictionary
 
-    @staticmethod
-    def _charge_dictionary_to_csv(charge_dictionary):
-        """Write charge dictionary to a csv file_obj."""
-        dictionary_data = []
-        for key, value in charge_dictionary.items():
-            line_item = (key, value.get('charge'))
-            dictionary_data.append(line_item)
-
-        file_obj = io.StringIO()
-        writer = csv.writer(file_obj, delimiter='\t',
-                            quoting=csv.QUOTE_NONE, quotechar='')
-        writer.writerows(dictionary_data)
-        file_obj.seek(0)
-
-        return file_obj
-
-    def _write_to_temp_table(self, report_accessor, charge_data):
-        """Create temporary table to store charge."""
-        columns = [{'lineid': 'bigint'}, {'charge': 'numeric(24,6)'}]
-        temp_table = report_accessor.create_new_temp_table('charge', columns)
-        csv_file = self._charge_dictionary_to_csv(charge_data)
-        report_accessor.bulk_insert_rows(csv_file, temp_table, ['lineid', 'charge'])
-        return temp_table
-
-    # pylint: disable=too-many-locals
-    def _update_pod_charge(self):
-        """Calculate and store total POD charges."""
-        try:
-            with OCPRateDBAccessor(self._schema, self._provider_uuid,
-                                   self._column_map) as rate_accessor:
-                cpu_usage_rates = rate_accessor.get_cpu_core_usage_per_hour_rates()
-                cpu_request_rates = rate_accessor.get_cpu_core_request_per_hour_rates()
-                mem_usage_rates = rate_accessor.get_memory_gb_usage_per_hour_rates()
-                mem_request_rates = rate_accessor.get_memory_gb_request_per_hour_rates()
+    def _tiered_charge_sql(self, usage_column, rates):
+        """Compile tiered rates into a SQL expression of a usage column's charge.
 
-            with OCPReportDBAccessor(self._schema, self._column_map) as report_accessor:
-                try:
-                    cpu_usage = report_accessor.get_pod_usage_cpu_core_hours(self._cluster_id)
-                    cpu_usage_charge = self._calculate_charge(cpu_usage_rates, cpu_usage)
+        Each tier charges the usage falling between the tiers before it and
+        its own size, as _calculate_variable_charge does for a single value.
 
-                    cpu_request = report_accessor.get_pod_request_cpu_core_hours(self._cluster_id)
-                    cpu_request_charge = self._calculate_charge(cpu_request_rates, cpu_request)
-
-                    total_cpu_charge = self._aggregate_charges(cpu_usage_charge, cpu_request_charge)
-                except OCPReportChargeUpdaterError as error:
-                    total_cpu_charge = {}
-                    LOG.error('Unable to calculate cpu charge. Error: %s', str(error))
+        Args:
+            usage_column (str): The summary table column holding the usage
+            rates (dict): The rate with its tiered_rates, or None
 
-                cpu_temp_table = self._write_to_temp_table(report_accessor,
-                                                           total_cpu_charge)
+        Returns:
+            (str): The SQL expression of the charge
 
-                try:
-                    mem_usage = report_accessor.\
-                        get_pod_usage_memory_gigabyte_hours(self._cluster_id)
-                    mem_usage_charge = self._calculate_charge(mem_usage_rates, mem_usage)
+        """
+        tier = []
+        if rates:
+            tier = self._normalize_tier(rates.get('tiered_rates', []))
 
-                    mem_request = report_accessor.\
-                        get_pod_request_memory_gigabyte_hours(self._cluster_id)
-                    mem_request_charge = self._calculate_charge(mem_request_rates, mem_request)
+        usage = f'COALESCE({usage_column}, 0)'
+        tier_start = Decimal(0)
+        terms = []
+        for bucket in tier:
+            usage_end = Decimal(bucket.get('usage', {}).get('usage_end')) \
+                if bucket.get('usage', {}).get('usage_end') else None
+            usage_start = Decimal(bucket.get('usage', {}).get('usage_start')) \
+                if bucket.get('usage', {}).get('usage_start') else 0
+            rate = Decimal(bucket.get('value'))
 
-                    total_memory_charge = self._aggregate_charges(mem_usage_charge,
-                                                                  mem_request_charge)
-                except OCPReportChargeUpdaterError as error:
-                    total_memory_charge = {}
-                    LOG.error('Unable to calculate memory charge. Error: %s', str(error))
+            usage_applied = f'({usage} - {tier_start}::numeric)' if tier_start else usage
+            if usage_end is None:
+                if tier_start:
+                    usage_applied = f'GREATEST({usage_applied}, 0)'
+                terms.append(f'{usage_applied} * {rate}::numeric')
+                # Nothing is left for any tier after an unbounded one
+                break
+            bucket_size = usage_end - usage_start
+            terms.append(f'LEAST(GREATEST({usage_applied}, 0), {bucket_size}::numeric) * {rate}::numeric')
+            tier_start += bucket_size
+
+        return ' + '.join(terms) if terms else '0'
+
+    def _total_charge_sql(self, usage_column, usage_rates, request_column, request_rates):
+        """Return the SQL expression of the summed usage and request charges."""
+        usage_charge = self._tiered_charge_sql(usage_column, usage_rates)
+        request_charge = self._tiered_charge_sql(request_column, request_rates)
+        return f'({usage_charge}) + ({request_charge})'
+
+    def _update_pod_charge(self, start_date=None, end_date=None):
+        """Calculate and store total POD charges."""
+        with OCPRateDBAccessor(self._schema, self._provider_uuid,
+                               self._column_map) as rate_accessor:
+            cpu_usage_rates = rate_accessor.get_cpu_core_usage_per_hour_rates()
+            cpu_request_rates = rate_accessor.get_cpu_core_request_per_hour_rates()
+            mem_usage_rates = rate_accessor.get_memory_gb_usage_per_hour_rates()
+            mem_request_rates = rate_accessor.get_memory_gb_request_per_hour_rates()
 
-                mem_temp_table = self._write_to_temp_table(report_accessor,
-                                                           total_memory_charge)
+        try:
+            cpu_charge = self._total_charge_sql('pod_usage_cpu_core_hours', cpu_usage_rates,
+                                                'pod_request_cpu_core_hours', cpu_request_rates)
+        except OCPReportChargeUpdaterError as error:
+            cpu_charge = None
+            LOG.error('Unable to calculate cpu charge. Error: %s', str(error))
 
-                report_accessor.populate_pod_charge(cpu_temp_table, mem_temp_table)
+        try:
+            mem_charge = self._total_charge_sql('pod_usage_memory_gigabyte_hours', mem_usage_rates,
+                                                'pod_request_memory_gigabyte_hours',
+                                                mem_request_rates)
         except OCPReportChargeUpdaterError as error:
-            LOG.error('Unable to calculate charge. Error: %s', str(error))
+            mem_charge = None
+            LOG.error('Unable to calculate memory charge. Error: %s', str(error))
+
+        if cpu_charge is None or mem_charge is None:
+            return
+
+        with OCPReportDBAccessor(self._schema, self._column_map) as report_accessor:
+            report_accessor.populate_pod_charge(cpu_charge, mem_charge, start_date,
+                                                end_date, self._cluster_id)
 
-    def _update_storage_charge(self):
+    def _update_storage_charge(self, start_date=None, end_date=None):
         """Calculate and store the storage charges."""
         try:
             with OCPRateDBAccessor(self._schema, self._provider_uuid,
@@ -237,28 +240,60 @@ class OCPReportChargeUpdater:
                 storage_usage_rates = rate_accessor.get_storage_gb_usage_per_month_rates()
                 storage_request_rates = rate_accessor.get_storage_gb_request_per_month_rates()
 
+            storage_charge = self._total_charge_sql('persistentvolumeclaim_usage_gigabyte_months',
+                                                    storage_usage_rates,
+                                                    'volume_request_storage_gigabyte_months',
+                                                    storage_request_rates)
             with OCPReportDBAccessor(self._schema, self._column_map) as report_accessor:
-                storage_usage = report_accessor.\
-                    get_persistentvolumeclaim_usage_gigabyte_months(self._cluster_id)
-                storage_usage_charge = self._calculate_charge(storage_usage_rates,
-                                                              storage_usage)
-
-                storage_request = report_accessor.\
-                    get_volume_request_storage_gigabyte_months(self._cluster_id)
-                storage_request_charge = self._calculate_charge(storage_request_rates,
-                                                                storage_request)
-                total_storage_charge = self._aggregate_charges(storage_usage_charge,
-                                                               storage_request_charge)
-                temp_table = self._write_to_temp_table(report_accessor,
-                                                       total_storage_charge)
-                report_accessor.populate_storage_charge(temp_table)
+                report_accessor.populate_storage_charge(storage_charge, start_date,
+                                                        end_date, self._cluster_id)
 
         except OCPReportChargeUpdaterError as error:
             LOG.error('Unable to calculate storage usage charge. Error: %s', str(error))
 
+    def get_charge_window(self, start_date=None, end_date=None):
+        """Return the dates to update charges for.
+
+        Charges follow the usage window unless the provider's cost model
+        changed since the charges were last derived, in which case every
+        charge is recomputed.
+
+        Args:
+            start_date (str, Optional) - Start date of range to update derived cost.
+            end_date (str, Optional) - End date of range to update derived cost.
+
+        Returns
+            (str, str) The window, or None and None for all dates
+
+        """
+        if start_date is None and end_date is None:
+            return None, None
+
+        with OCPRateDBAccessor(self._schema, self._provider_uuid,
+                               self._column_map) as rate_accessor:
+            cost_model_timestamp = rate_accessor.get_cost_model_timestamp()
+        if cost_model_timestamp is None:
+            return start_date, end_date
+
+        with OCPReportDBAccessor(self._schema, self._column_map) as accessor:
+            report_periods = accessor.report_periods_for_provider_id(self._provider_id)
+            with schema_context(self._schema):
+                derived_datetimes = [period.derived_cost_datetime for period in report_periods
+                                     if period.derived_cost_datetime]
+
+        if derived_datetimes and cost_model_timestamp <= min(derived_datetimes):
+            return start_date, end_date
+
+        LOG.info('Cost model for provider: %s changed since its charges were derived. '
+                 'Updating charges for all dates.', self._provider_uuid)
+        return None, None
+
     def update_summary_charge_info(self, start_date=None, end_date=None):
         """Update the OCP summary table with the charge information.
 
+        The window is the one returned by get_charge_window, which the
+        caller computes once for the charges and the cost summary.
+
         Args:
             start_date (str, Optional) - Start date of range to update derived cost.
             end_date (str, Optional) - End date of range to update derived cost.
@@ -271,8 +306,8 @@ class OCPReportChargeUpdater:
 
         LOG.info('Starting charge calculation updates for provider: %s. Cluster ID: %s.',
                  self._provider_uuid, self._cluster_id)
-        self._update_pod_charge()
-        self._update_storage_charge()
+        self._update_pod_charge(start_date, end_date)
+        self._update_storage_charge(start_date, end_date)
 
         with OCPReportDBAccessor(self._schema, self._column_map) as accessor:
             report_periods = accessor.report_periods_for_provider_id(self._provider_id, start_date)
@@ -20,6 +20,7 @@ import logging
 
 from tenant_schemas.utils import schema_context
 
+from masu.database import OCP_REPORT_TABLE_MAP
 from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
 
@@ -67,6 +68,14 @@ class OCPReportDBCleaner():
                 raise OCPReportDBCleanerError(err)
             removed_items = []
 
+            if expired_date is not None and not simulate:
+                for table_name in (OCP_REPORT_TABLE_MAP['line_item_daily'],
+                                   OCP_REPORT_TABLE_MAP['line_item_daily_summary'],
+                                   OCP_REPORT_TABLE_MAP['storage_line_item_daily'],
+                                   OCP_REPORT_TABLE_MAP['storage_line_item_daily_summary']):
+                    for partition in accessor.drop_month_partitions(table_name, expired_date):
+                        LOG.info('Dropped usage month table %s', partition)
+
             if expired_date is not None:
                 usage_period_objs = accessor.get_usage_period_before_date(expired_date)
             else:
@@ -94,6 +103,12 @@ class OCPReportDBCleaner():
                         LOG.info('Removing %s cost summary items for cluster id %s',
                                  qty, cluster_id)
 
+                        for rollup_query in \
+                                accessor.get_cost_summary_rollups_for_clusterid(cluster_id):
+                            qty = rollup_query.delete()
+                            LOG.info('Removing %s cost summary rollup items for cluster id %s',
+                                     qty, cluster_id)
+
                         qty = accessor.get_storage_item_query_report_period_id(report_period_id).\
                             delete()
                         LOG.info('Removing %s storage line items for usage period id %s',
@@ -122,6 +137,12 @@ class OCPReportDBCleaner():
                         LOG.info('Removing %s OCP-on-AWS project summary items for cluster id %s',
                                  qty, cluster_id)
 
+                        qty = accessor.get_ocp_aws_match_index_query_for_cluster_id(cluster_id).\
+                            delete()
+                        LOG.info('Removing %s OCP-on-AWS match index items for cluster id %s',
+                                 qty, cluster_id)
+                        accessor.get_ocp_aws_match_state_query_for_cluster_id(cluster_id).delete()
+
                     LOG.info('Report data removed for usage period ID: %s with interval start: %s',
                              report_period_id, removed_usage_start_period)
                     removed_items.append({'usage_period_id': report_period_id,
@@ -21,7 +21,6 @@
 # Disabling for now since there are overlaps with AWSReportProcessor.
 # Addressing all lint errors would impact both report processors.
 
-import csv
 import json
 import logging
 from datetime import datetime
@@ -33,7 +32,7 @@ from dateutil import parser
 from masu.config import Config
 from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
-from masu.processor.report_processor_base import ReportProcessorBase
+from masu.processor.report_processor_base import ReportFileScan, ReportProcessorBase
 from masu.util.common import clear_temp_directory
 from masu.util.ocp.common import month_date_range
 from reporting.provider.ocp.models import OCPStorageLineItem, OCPUsageLineItem, OCPUsageReport, OCPUsageReportPeriod
@@ -53,6 +52,47 @@ class OCPReportTypes(Enum):
     UNKNOWN = 3
 
 
+class LineItemKeys:
+    """The hashed keys of the line items seen per report interval.
+
+    The keys of every interval in the unsaved batch are kept, since a batch
+    can not upsert the same row twice. Once a batch is saved only the keys
+    of the interval still being read are kept, so the memory is bounded by
+    the intervals of one batch rather than the whole file.
+    """
+
+    def __init__(self):
+        """Initialize the key hashes."""
+        self._intervals = {}
+        self._current_report_id = None
+
+    def add(self, report_id, key):
+        """Record a line item key of a report.
+
+        Args:
+            report_id (int): The report (interval) of the line item
+            key (tuple): The line item's conflict column values
+
+        Returns:
+            (bool): False if the key had already been seen
+
+        """
+        self._current_report_id = report_id
+        key_hashes = self._intervals.setdefault(report_id, set())
+        key_hash = hash(key)
+        if key_hash in key_hashes:
+            return False
+        key_hashes.add(key_hash)
+        return True
+
+    def trim(self):
+        """Drop the keys of all but the current report interval."""
+        current = self._intervals.get(self._current_report_id)
+        self._intervals = {}
+        if current is not None:
+            self._intervals[self._current_report_id] = current
+
+
 class ProcessedOCPReport:
     """Usage report transcribed to our database models.
 
@@ -64,13 +104,14 @@ class ProcessedOCPReport:
         self.report_periods = {}
         self.reports = {}
         self.line_items = []
-        self.line_item_keys = {}
+        self.line_item_keys = LineItemKeys()
 
     def remove_processed_rows(self):
         """Clear a batch of rows from their containers."""
         self.report_periods = {}
         self.reports = {}
         self.line_items = []
+        self.line_item_keys.trim()
 
 
 class OCPReportProcessor():
@@ -104,7 +145,12 @@ class OCPReportProcessor():
 
         """
         self._processor = None
-        self.report_type = self._detect_report_type(report_path)
+        # Only the header is read here, the file is opened again to be
+        # processed so a processor that is never run holds no open file
+        opener, mode = ReportProcessorBase._get_file_opener(compression.upper())
+        with opener(report_path, mode) as report_file:
+            header = ReportFileScan(report_file).header
+        self.report_type = self._detect_report_type(header)
         if self.report_type == OCPReportTypes.CPU_MEM_USAGE:
             self._processor = OCPCpuMemReportProcessor(schema_name, report_path,
                                                        compression, provider_id)
@@ -114,16 +160,14 @@ class OCPReportProcessor():
         elif self.report_type == OCPReportTypes.UNKNOWN:
             raise OCPReportProcessorError('Unknown OCP report type.')
 
-    def _detect_report_type(self, report_path):
-        """Detect OCP report type."""
+    def _detect_report_type(self, column_names):
+        """Detect OCP report type from the header of the report file."""
         report_type = OCPReportTypes.UNKNOWN
-        with open(report_path) as report_file:
-            reader = csv.reader(report_file)
-            column_names = next(reader)
-            if sorted(column_names) == sorted(self.storage_columns):
-                report_type = OCPReportTypes.STORAGE
-            elif sorted(column_names) == sorted(self.cpu_mem_usage_columns):
-                report_type = OCPReportTypes.CPU_MEM_USAGE
+        column_names = column_names or []
+        if sorted(column_names) == sorted(self.storage_columns):
+            report_type = OCPReportTypes.STORAGE
+        elif sorted(column_names) == sorted(self.cpu_mem_usage_columns):
+            report_type = OCPReportTypes.CPU_MEM_USAGE
         return report_type
 
     def process(self):
@@ -289,6 +333,35 @@ class OCPReportProcessorBase(ReportProcessorBase):
 
         return json.dumps(label_dict)
 
+    def _save_batch(self, temp_table, report_db, row_count, staged=False):
+        """Copy the current batch of line items and merge it unless staged.
+
+        Args:
+            temp_table (str): The temp or staging table to copy into
+            report_db (OCPReportDBAccessor): The accessor to save with
+            row_count (int): The number of rows saved so far
+            staged (bool): Whether the merge is left until the whole file is staged
+
+        Returns:
+            (int): The number of rows saved including this batch
+
+        """
+        self._save_to_db(temp_table, report_db)
+        if not staged:
+            report_db.merge_temp_table(
+                self.table_name._meta.db_table,
+                temp_table,
+                self.line_item_columns,
+                self.line_item_conflict_columns
+            )
+        LOG.info('Saving report rows %d to %d for %s', row_count,
+                 row_count + len(self.processed_report.line_items),
+                 self._report_name)
+        row_count += len(self.processed_report.line_items)
+
+        self._update_mappings()
+        return row_count
+
     def _update_mappings(self):
         """Update cache of database objects for reference."""
         self.existing_report_periods_map.update(self.processed_report.report_periods)
@@ -299,53 +372,46 @@ class OCPReportProcessorBase(ReportProcessorBase):
     def process(self):
         """Process usage report file.
 
+        With OCP_PROCESSING_STAGED_MERGE set, every batch of the file is
+        copied into an unlogged staging table and merged into the line item
+        table once at the end, instead of merging each batch.
+
         Returns:
             (None)
 
         """
         row_count = 0
-        opener, mode = self._get_file_opener(self._compression)
-        with opener(self._report_path, mode) as f:
+        staged = Config.OCP_PROCESSING_STAGED_MERGE
+        line_item_table = self.table_name._meta.db_table
+        with self._open_report_scan() as scan:
             with OCPReportDBAccessor(self._schema_name, self.column_map) as report_db:
-                temp_table = report_db.create_temp_table(
-                    self.table_name._meta.db_table,
-                    drop_column='id'
-                )
-                LOG.info('File %s opened for processing', str(f))
-                reader = csv.DictReader(f)
-                for row in reader:
-                    report_period_id = self._create_report_period(row, self._cluster_id, report_db)
-                    report_id = self._create_report(row, report_period_id, report_db)
-
-                    self._create_usage_report_line_item(row, report_period_id, report_id, report_db)
-                    if len(self.processed_report.line_items) >= self._batch_size:
-                        self._save_to_db(temp_table, report_db)
-                        report_db.merge_temp_table(
-                            self.table_name._meta.db_table,
+                if staged:
+                    temp_table = report_db.create_staging_table(line_item_table, drop_column='id')
+                else:
+                    temp_table = report_db.create_temp_table(line_item_table, drop_column='id')
+                try:
+                    for row in self._read_report_rows(scan):
+                        report_period_id = self._create_report_period(row, self._cluster_id, report_db)
+                        report_id = self._create_report(row, report_period_id, report_db)
+
+                        self._create_usage_report_line_item(row, report_period_id, report_id, report_db)
+                        if len(self.processed_report.line_items) >= self._batch_size:
+                            row_count = self._save_batch(temp_table, report_db, row_count, staged)
+
+                    if self.processed_report.line_items:
+                        row_count = self._save_batch(temp_table, report_db, row_count, staged)
+
+                    if staged and self.line_item_columns:
+                        LOG.info('Merging %d staged report rows for %s', row_count, self._report_name)
+                        report_db.merge_staging_table(
+                            line_item_table,
                             temp_table,
                             self.line_item_columns,
                             self.line_item_conflict_columns
                         )
-                        LOG.info('Saving report rows %d to %d for %s', row_count,
-                                 row_count + len(self.processed_report.line_items),
-                                 self._report_name)
-                        row_count += len(self.processed_report.line_items)
-
-                        self._update_mappings()
-
-                if self.processed_report.line_items:
-                    self._save_to_db(temp_table, report_db)
-                    report_db.merge_temp_table(
-                        self.table_name._meta.db_table,
-                        temp_table,
-                        self.line_item_columns,
-                        self.line_item_conflict_columns
-                    )
-                    LOG.info('Saving report rows %d to %d for %s', row_count,
-                             row_count + len(self.processed_report.line_items),
-                             self._report_name)
-
-                    row_count += len(self.processed_report.line_items)
+                finally:
+                    if staged:
+                        report_db.drop_staging_table(temp_table)
 
         LOG.info('Completed report processing for file: %s and schema: %s',
                  self._report_path, self._schema_name)
@@ -390,27 +456,24 @@ class OCPCpuMemReportProcessor(OCPReportProcessorBase):
             (None)
 
         """
-        data = self._get_data_for_table(row, self.table_name._meta.db_table)
+        data = self._get_clean_data_for_table(row,
+                                              self.table_name._meta.db_table,
+                                              report_db_accessor,
+                                              raw_columns=('pod_labels',))
         pod_label_str = ''
         if 'pod_labels' in data:
             pod_label_str = data.pop('pod_labels')
 
-        data = report_db_accessor.clean_data(
-            data,
-            self.table_name._meta.db_table
-        )
-
         data['report_period_id'] = report_period_id
         data['report_id'] = report_id
         data['pod_labels'] = self._process_pod_labels(pod_label_str)
         # Deduplicate potential repeated rows in data
         key = tuple(data.get(column)
                     for column in self.line_item_conflict_columns)
-        if key in self.processed_report.line_item_keys:
+        if not self.processed_report.line_item_keys.add(report_id, key):
             return
 
         self.processed_report.line_items.append(data)
-        self.processed_report.line_item_keys[key] = True
 
         if self.line_item_columns is None:
             self.line_item_columns = list(data.keys())
@@ -460,7 +523,11 @@ class OCPStorageProcessor(OCPReportProcessorBase):
             (None)
 
         """
-        data = self._get_data_for_table(row, self.table_name._meta.db_table)
+        data = self._get_clean_data_for_table(row,
+                                              self.table_name._meta.db_table,
+                                              report_db_accessor,
+                                              raw_columns=('persistentvolume_labels',
+                                                           'persistentvolumeclaim_labels'))
 
         persistentvolume_labels_str = ''
         if 'persistentvolume_labels' in data:
@@ -470,11 +537,6 @@ class OCPStorageProcessor(OCPReportProcessorBase):
         if 'persistentvolumeclaim_labels' in data:
             persistentvolumeclaim_labels_str = data.pop('persistentvolumeclaim_labels')
 
-        data = report_db_accessor.clean_data(
-            data,
-            self.table_name._meta.db_table
-        )
-
         data['report_period_id'] = report_period_id
         data['report_id'] = report_id
         data['persistentvolume_labels'] = self._process_pod_labels(persistentvolume_labels_str)
@@ -483,11 +545,10 @@ class OCPStorageProcessor(OCPReportProcessorBase):
         # Deduplicate potential repeated rows in data
         key = tuple(data.get(column)
                     for column in self.line_item_conflict_columns)
-        if key in self.processed_report.line_item_keys:
+        if not self.processed_report.line_item_keys.add(report_id, key):
             return
 
         self.processed_report.line_items.append(data)
-        self.processed_report.line_item_keys[key] = True
 
         if self.line_item_columns is None:
             self.line_item_columns = list(data.keys())
@@ -98,10 +98,10 @@ class OCPReportSummaryUpdater:
         with OCPReportDBAccessor(self._schema_name, self._column_map) as accessor:
             report_periods = accessor.report_periods_for_provider_id(self._provider.id, start_date)
             accessor.populate_line_item_daily_summary_table(start_date, end_date, self._cluster_id)
-            accessor.populate_pod_label_summary_table()
+            accessor.populate_pod_label_summary_table(start_date, end_date, self._cluster_id)
             accessor.populate_storage_line_item_daily_summary_table(start_date, end_date, self._cluster_id)
-            accessor.populate_volume_claim_label_summary_table()
-            accessor.populate_volume_label_summary_table()
+            accessor.populate_volume_claim_label_summary_table(start_date, end_date, self._cluster_id)
+            accessor.populate_volume_label_summary_table(start_date, end_date, self._cluster_id)
 
             for period in report_periods:
                 if period.summary_data_creation_datetime is None:
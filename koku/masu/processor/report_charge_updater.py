@@ -83,17 +83,39 @@ class ReportChargeUpdater:
 
         return None
 
-    def update_charge_info(self, start_date=None, end_date=None):
+    def get_charge_window(self, start_date=None, end_date=None, force_full=False):
+        """
+        Get the dates charges need updating for.
+
+        Args:
+            start_date (String) - Start date of the usage that changed.
+            end_date (String) - End date of the usage that changed.
+            force_full (Boolean) - Update the charges of all dates.
+
+        Returns:
+            (String, String) The window, or None and None for all dates
+
+        """
+        if force_full:
+            return None, None
+        if self._updater:
+            return self._updater.get_charge_window(start_date, end_date)
+        return start_date, end_date
+
+    def update_charge_info(self, start_date=None, end_date=None, force_full=False):
         """
         Update usage charge information.
 
         Args:
             start_date (String) - Start date of range to update derived cost.
             end_date (String) - End date of range to update derived cost.
+            force_full (Boolean) - Update the charges of all dates, e.g. after rates are edited.
 
         Returns:
             None
 
         """
+        if force_full:
+            start_date, end_date = None, None
         if self._updater:
             self._updater.update_summary_charge_info(start_date, end_date)
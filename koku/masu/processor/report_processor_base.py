@@ -20,6 +20,10 @@ import gzip
 import io
 import json
 import logging
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from itertools import chain, islice
 from os import listdir
 
 from masu.exceptions import MasuProcessingError
@@ -27,9 +31,365 @@ from masu.external import GZIP_COMPRESSED
 from masu.processor import ALLOWED_COMPRESSIONS
 from masu.util.common import clear_temp_directory
 
+try:
+    # The ISA-L gzip implementation decompresses several times faster
+    from isal import igzip as gzip_backend
+except ImportError:
+    gzip_backend = gzip
+
 LOG = logging.getLogger(__name__)
 
 
+class RowStreamFile:
+    """A read-only file-like object that serializes rows on demand.
+
+    Rows are pulled from the iterable only as the reader asks for more
+    data, so a COPY can consume an arbitrarily large report while only
+    one read buffer is held in memory.
+    """
+
+    def __init__(self, rows, sep='\t'):
+        r"""Initialize the stream.
+
+        Args:
+            rows (iterable): An iterable of row value sequences
+            sep (str): The column separator to write. Default: '\t'
+
+        """
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(
+            self._buffer,
+            delimiter=sep,
+            quoting=csv.QUOTE_NONE,
+            quotechar=''
+        )
+        self.row_count = 0
+
+    def _fill(self, size):
+        """Serialize rows until the buffer holds at least size characters."""
+        while size < 0 or self._buffer.tell() < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.row_count += 1
+
+    def read(self, size=-1):
+        """Return up to size characters of serialized rows."""
+        self._fill(size)
+        data = self._buffer.getvalue()
+        if size < 0 or len(data) <= size:
+            chunk, remainder = data, ''
+        else:
+            chunk, remainder = data[:size], data[size:]
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffer.write(remainder)
+        return chunk
+
+
+class ReportFileScan:
+    """A single read of a report file with its header and first row sniffed.
+
+    Checks that only need the header or the first row use the scan, and
+    the rows then continue from the same reader rather than reopening and
+    decompressing the file again.
+    """
+
+    def __init__(self, report_file):
+        """Read the header and first row of an open report file."""
+        self._reader = csv.reader(report_file)
+        self.header = next(self._reader, None)
+        self.first_row = None
+        if self.header is not None:
+            self.first_row = next((row for row in self._reader if row), None)
+        self._positions = {name: index for index, name in enumerate(self.header or [])}
+        self._started = False
+
+    def get_first(self, name, default=None):
+        """Return a named field of the first row."""
+        index = self._positions.get(name)
+        if self.first_row is None or index is None or index >= len(self.first_row):
+            return default
+        return self.first_row[index]
+
+    def rows(self):
+        """Yield the rows after the header as lists; the scan is read once."""
+        if self._started:
+            raise MasuProcessingError('The rows of a report file scan can only be read once.')
+        self._started = True
+        if self.first_row is not None:
+            yield self.first_row
+        yield from self._reader
+
+
+class LookupCache(MutableMapping):
+    """An LRU-bounded mapping of keys to database ids.
+
+    Keys that are not held are fetched through a loader, when one is set.
+    Keys the loader does not find are remembered as missing until they are
+    set, in a bounded set of their own so they never evict held ids.
+    """
+
+    def __init__(self, loader, max_size, initial=None):
+        """Initialize the cache.
+
+        Args:
+            loader (function): Takes a list of keys and returns a dict
+                of the ids found for them, or None to only hold ids
+            max_size (int): The most keys to hold, and to remember as missing
+            initial (dict): Ids to start the cache with
+
+        """
+        self.loader = loader
+        self._max_size = max_size
+        self._data = OrderedDict()
+        self._missing = OrderedDict()
+        if initial:
+            self.update(initial)
+
+    def prefetch(self, keys):
+        """Fetch the keys not yet held with a single call to the loader."""
+        if self.loader is None:
+            return
+        missing = [key for key in dict.fromkeys(keys)
+                   if key not in self._data and key not in self._missing]
+        if not missing:
+            return
+        found = self.loader(missing)
+        for key in missing:
+            if key in found:
+                self._store(key, found[key])
+            else:
+                self._store_missing(key)
+
+    @staticmethod
+    def _bound(data, max_size):
+        """Evict the least recently used keys beyond max_size."""
+        while len(data) > max_size:
+            data.popitem(last=False)
+
+    def _store(self, key, value):
+        """Hold a value, evicting the least recently used keys."""
+        self._missing.pop(key, None)
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._bound(self._data, self._max_size)
+
+    def _store_missing(self, key):
+        """Remember a key the loader did not find."""
+        self._missing[key] = None
+        self._missing.move_to_end(key)
+        self._bound(self._missing, self._max_size)
+
+    def __getitem__(self, key):
+        """Return the id of a key, fetching it if it is not held."""
+        if key in self._missing:
+            raise KeyError(key)
+        if key not in self._data:
+            self.prefetch([key])
+            if key not in self._data:
+                raise KeyError(key)
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        """Hold the id of a key."""
+        self._store(key, value)
+
+    def __delitem__(self, key):
+        """Forget a key."""
+        del self._data[key]
+
+    def __iter__(self):
+        """Iterate over the held keys."""
+        return iter(list(self._data))
+
+    def __len__(self):
+        """Return the number of held keys."""
+        return len(self._data)
+
+
+def _keep_value(value):
+    """Return a value unchanged."""
+    return value
+
+
+class ReportRow(list):
+    """A row of a report file read as a list of values.
+
+    Fields are reached by name through the projection plan of the file,
+    so the helpers written for csv.DictReader rows accept either.
+    """
+
+    __slots__ = ('plan',)
+
+    def __init__(self, values, plan):
+        """Initialize the row with its values and the plan of its file."""
+        super().__init__(values)
+        self.plan = plan
+
+    def get(self, name, default=None):
+        """Return the value of a named field."""
+        index = self.plan.positions.get(name)
+        if index is None:
+            return default
+        return self[index]
+
+
+class ProjectionPlan:
+    """The column projection of a report file, compiled once from its header.
+
+    Holds the source indexes of each table's columns, the tag columns with
+    their keys already split out and, once requested, the value converters
+    of a table's columns, so rows can be read as lists instead of testing
+    every header of every row against the column map.
+    """
+
+    def __init__(self, header, column_map, tag_prefix=None):
+        """Compile the plan.
+
+        Args:
+            header (list): The column names of the CSV file
+            column_map (dict): A mapping of report columns to database
+                columns for each table
+            tag_prefix (str): A specifier used to identify a column as a tag
+
+        """
+        self.width = len(header)
+        # Like csv.DictReader, a repeated header keeps its first position
+        # and its last value.
+        self.positions = {name: index for index, name in enumerate(header)}
+        self.tag_prefix = tag_prefix
+        self.converters = {}
+
+        self.tables = {}
+        for table_name, table_map in column_map.items():
+            targets = {}
+            for name, index in self.positions.items():
+                if name in table_map:
+                    targets[table_map[name]] = index
+            self.tables[table_name] = (list(targets), list(targets.values()))
+
+        self.tag_columns = []
+        if tag_prefix:
+            for name, index in self.positions.items():
+                key_value = name.split(':')
+                if tag_prefix in name and len(key_value) > 1:
+                    self.tag_columns.append((index, key_value[-1]))
+
+    def read_rows(self, reader):
+        """Yield the rows of a csv.reader as ReportRow lists.
+
+        Blank lines are skipped and short rows padded with None, as
+        csv.DictReader does.
+        """
+        width = self.width
+        for values in reader:
+            if not values:
+                continue
+            if len(values) < width:
+                values += [None] * (width - len(values))
+            yield ReportRow(values, self)
+
+    def project(self, row, table_name, converters=None):
+        """Return the data of a table from a row.
+
+        Args:
+            row (list): A row of the file as a list
+            table_name (str): The DB table fields are required for
+            converters (list): An optional converter per table column
+
+        Returns:
+            (dict): The data from the row keyed on the DB table's column names
+
+        """
+        columns, indexes = self.tables[table_name]
+        if converters is None:
+            values = [row[index] for index in indexes]
+        else:
+            values = [convert(row[index]) for convert, index in zip(converters, indexes)]
+        return dict(zip(columns, values))
+
+    def tags(self, row):
+        """Return the non-empty tags of a row keyed on their tag keys."""
+        return {key: row[index] for index, key in self.tag_columns if row[index]}
+
+
+class ColumnarTransform:
+    """Transform chunks of rows for one table a column at a time.
+
+    Each chunk is transposed and converted with one map() per column of the
+    projection plan rather than dictionary operations for every value of
+    every row.
+    """
+
+    def __init__(self, plan, table_name):
+        """Initialize the transform.
+
+        Args:
+            plan (ProjectionPlan): The compiled plan of the file
+            table_name (str): The DB table to transform rows for
+
+        """
+        self.plan = plan
+        self.columns, self._indexes = plan.tables[table_name]
+        self._converters = None
+
+    def set_converters(self, converters):
+        """Set the value converter of each table column, in column order."""
+        self._converters = converters
+
+    def read_chunks(self, reader, chunk_size):
+        """Yield the rows of each chunk_size lines of a csv.reader as a list.
+
+        Chunks are cut on the lines read, so blank lines still count
+        towards the chunk they are read in.
+        """
+        lines = iter(reader)
+        while True:
+            chunk_lines = list(islice(lines, chunk_size))
+            if not chunk_lines:
+                return
+            chunk = list(self.plan.read_rows(chunk_lines))
+            if chunk:
+                yield chunk
+
+    def transform(self, chunk):
+        """Convert a chunk of rows.
+
+        Args:
+            chunk (list): Rows of the CSV file as lists
+
+        Returns:
+            (list, list): A tuple of converted values for each row, followed
+                by a JSON tag string when the plan has a tag prefix, and the
+                chunk's source columns
+
+        """
+        if not chunk:
+            return [], []
+        source_columns = list(zip(*chunk))
+        converters = self._converters or [None] * len(self._indexes)
+        values = [list(map(converter, source_columns[index])) if converter
+                  else source_columns[index]
+                  for index, converter in zip(self._indexes, converters)]
+        if self.plan.tag_prefix:
+            values.append(self._build_tags(source_columns, len(chunk)))
+        return list(zip(*values)), source_columns
+
+    def _build_tags(self, source_columns, row_count):
+        """Return the JSON tag string of each row."""
+        tag_columns = self.plan.tag_columns
+        if not tag_columns:
+            return [json.dumps({})] * row_count
+        keys = [key for _, key in tag_columns]
+        values = [source_columns[index] for index, _ in tag_columns]
+        return [json.dumps({key: value for key, value in zip(keys, tag_values) if value})
+                for tag_values in zip(*values)]
+
+
 # pylint: disable=too-few-public-methods
 class ReportProcessorBase():
     """
@@ -62,19 +422,90 @@ class ReportProcessorBase():
         """Extract the data from a row for a specific table.
 
         Args:
-            row (dict): A dictionary representation of a CSV file row
+            row (dict|ReportRow): A CSV file row
             table_name (str): The DB table fields are required for
 
         Returns:
             (dict): The data from the row keyed on the DB table's column names
 
         """
+        if isinstance(row, ReportRow):
+            return row.plan.project(row, table_name)
+
         column_map = self.column_map[table_name]
 
         return {column_map[key]: value
                 for key, value in row.items()
                 if key in column_map}
 
+    def _get_clean_data_for_table(self, row, table_name, report_db_accessor,
+                                  raw_columns=()):
+        """Extract the data for a table from a row with its values cleaned.
+
+        Args:
+            row (dict|ReportRow): A CSV file row
+            table_name (str): The DB table fields are required for
+            report_db_accessor (ReportDBAccessorBase): The accessor to clean with
+            raw_columns (tuple): Columns to leave as they are in the file
+
+        Returns:
+            (dict): The cleaned data keyed on the DB table's column names
+
+        """
+        if isinstance(row, ReportRow):
+            plan = row.plan
+            converters = plan.converters.get(table_name)
+            if converters is None:
+                columns, _ = plan.tables[table_name]
+                converters = report_db_accessor.get_column_converters(table_name, columns)
+                converters = [_keep_value if column in raw_columns else converter
+                              for column, converter in zip(columns, converters)]
+                plan.converters[table_name] = converters
+            return plan.project(row, table_name, converters)
+
+        data = self._get_data_for_table(row, table_name)
+        raw_data = {column: data.pop(column) for column in raw_columns if column in data}
+        data = report_db_accessor.clean_data(data, table_name)
+        data.update(raw_data)
+        return data
+
+    def _compile_projection_plan(self, header, tag_prefix=None):
+        """Compile the projection plan of a report file from its header."""
+        return ProjectionPlan(header, self.column_map, tag_prefix=tag_prefix)
+
+    def _read_report_rows(self, scan, tag_prefix=None):
+        """Yield the rows of a report file scan as ReportRow lists.
+
+        Args:
+            scan (ReportFileScan): The scan of the open report file
+            tag_prefix (str): A specifier used to identify a column as a tag
+
+        Returns:
+            (generator): The rows of the file
+
+        """
+        if scan.header is None:
+            return
+        plan = self._compile_projection_plan(scan.header, tag_prefix=tag_prefix)
+        yield from plan.read_rows(scan.rows())
+
+    @contextmanager
+    def _open_report_scan(self, **kwargs):
+        """Open the report file for a single scan.
+
+        Args:
+            kwargs: Extra arguments for the file opener, e.g. the encoding
+
+        Returns:
+            (ReportFileScan): The scan of the open file
+
+        """
+        opener, mode = self._get_file_opener(self._compression)
+        # pylint: disable=invalid-name
+        with opener(self._report_path, mode, **kwargs) as f:
+            LOG.info('File %s opened for processing', str(f))
+            yield ReportFileScan(f)
+
     @staticmethod
     def _get_file_opener(compression):
         """Get the file opener for the file's compression.
@@ -88,7 +519,7 @@ class ReportProcessorBase():
 
         """
         if compression == GZIP_COMPRESSED:
-            return gzip.open, 'rt'
+            return gzip_backend.open, 'rt'
         return open, 'r'    # assume uncompressed by default
 
     def _write_processed_rows_to_csv(self):
@@ -120,6 +551,34 @@ class ReportProcessorBase():
             temp_table,
             columns)
 
+    # pylint: disable=no-self-use
+    def _save_stream_to_db(self, table, report_db_accessor, line_items):
+        """Stream line items into the database without staging a batch.
+
+        Args:
+            table (str): The table to copy the line items into
+            report_db_accessor (ReportDBAccessorBase): The accessor to copy with
+            line_items (iterable): Line item dictionaries with consistent keys
+
+        Returns:
+            (int): The number of rows copied
+
+        """
+        line_items = iter(line_items)
+        first_item = next(line_items, None)
+        if first_item is None:
+            return 0
+
+        columns = tuple(first_item.keys())
+        rows = (tuple(item.values())
+                for item in chain((first_item,), line_items))
+        stream = RowStreamFile(rows)
+
+        report_db_accessor.commit()
+        report_db_accessor.copy_rows_from_stream(stream, table, columns)
+
+        return stream.row_count
+
     @staticmethod
     def remove_temp_cur_files(report_path):
         """Remove temporary report files."""
@@ -22,19 +22,27 @@
 import datetime
 import os
 
+from celery import group
 from celery.utils.log import get_task_logger
+from django.core.cache import cache
+from django.db.utils import ProgrammingError
 
 import masu.prometheus_stats as worker_stats
+from api.report.cache import bump_data_generation
 from koku.celery import CELERY as celery
+from masu.config import Config
+from masu.database.report_db_accessor_base import ReportDBAccessorBase, VACUUM_CACHE_KEY
 from masu.database.report_stats_db_accessor import ReportStatsDBAccessor
+from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
 from masu.external.accounts_accessor import (AccountsAccessor, AccountsAccessorError)
 from masu.external.date_accessor import DateAccessor
 from masu.processor._tasks.download import _get_report_files
-from masu.processor._tasks.process import _process_report_file
+from masu.processor._tasks.process import _count_processed_file, _process_report_file
 from masu.processor._tasks.remove_expired import _remove_expired_data
 from masu.processor.report_charge_updater import ReportChargeUpdater
 from masu.processor.report_processor import ReportProcessorError
 from masu.processor.report_summary_updater import ReportSummaryUpdater
+from masu.util.ocp import common as ocp_utils
 
 LOG = get_task_logger(__name__)
 
@@ -54,6 +62,11 @@ def get_report_files(customer_name,
     Once we know a realistic processing time for the largest CUR file in production
     this value can be adjusted or made configurable.
 
+    When REPORT_PROCESSING_PARALLEL_FILES is set, only the first file of each
+    manifest is processed here. The remaining files are fanned out as
+    process_report_file tasks and the last of them to finish summarizes the
+    manifest, so those manifests are not returned for summarization.
+
     Args:
         customer_name     (String): Name of the customer owning the cost usage report.
         authentication    (String): Credential needed to access cost usage report
@@ -76,6 +89,9 @@ def get_report_files(customer_name,
     try:
         LOG.info('Reports to be processed: %s', str(reports))
         reports_to_summarize = []
+        fanned_out_tasks = []
+        fanned_out_manifest_ids = set()
+        processed_manifest_ids = set()
         for report_dict in reports:
             manifest_id = report_dict.get('manifest_id')
             file_name = os.path.basename(report_dict.get('file'))
@@ -97,6 +113,15 @@ def get_report_files(customer_name,
                          file_name, str(started_date), str(completed_date))
                 continue
 
+            if Config.REPORT_PROCESSING_PARALLEL_FILES and manifest_id in processed_manifest_ids:
+                LOG.info('Queueing processing task for %s.', file_name)
+                fanned_out_tasks.append(
+                    process_report_file.s(schema_name, provider_type, provider_uuid, report_dict)
+                )
+                fanned_out_manifest_ids.add(manifest_id)
+                continue
+            processed_manifest_ids.add(manifest_id)
+
             LOG.info('Processing starting - schema_name: %s, provider_uuid: %s, File: %s',
                      schema_name, provider_uuid, report_dict.get('file'))
             worker_stats.PROCESS_REPORT_ATTEMPTS_COUNTER.labels(provider_type=provider_type).inc()
@@ -116,9 +141,104 @@ def get_report_files(customer_name,
         worker_stats.PROCESS_REPORT_ERROR_COUNTER.labels(provider_type=provider_type).inc()
         LOG.error(str(processing_error))
 
+    if fanned_out_tasks:
+        group(fanned_out_tasks).apply_async()
+        reports_to_summarize = [report for report in reports_to_summarize
+                                if report.get('manifest_id') not in fanned_out_manifest_ids]
+
     return reports_to_summarize
 
 
+@celery.task(name='masu.processor.tasks.process_report_file', queue_name='process')
+def process_report_file(schema_name, provider_type, provider_uuid, report_dict):
+    """
+    Task to process one report file of a manifest.
+
+    The task that processes the last remaining file of the manifest queues
+    the manifest for summarization. A file that fails to process is still
+    counted as done.
+
+    Args:
+        schema_name   (String): Name of the DB schema
+        provider_type (String): Koku defined provider type string.  Example: Amazon = 'AWS'
+        provider_uuid (String): Provider uuid
+        report_dict   (dict): The report data dict from get_report_files
+
+    Returns:
+        None
+
+    """
+    LOG.info('Processing starting - schema_name: %s, provider_uuid: %s, File: %s',
+             schema_name, provider_uuid, report_dict.get('file'))
+    worker_stats.PROCESS_REPORT_ATTEMPTS_COUNTER.labels(provider_type=provider_type).inc()
+    try:
+        manifest_complete = _process_report_file(schema_name,
+                                                 provider_type,
+                                                 provider_uuid,
+                                                 report_dict)
+    except ReportProcessorError as processing_error:
+        worker_stats.PROCESS_REPORT_ERROR_COUNTER.labels(provider_type=provider_type).inc()
+        LOG.error(str(processing_error))
+        # The failed file still counts towards the manifest so the files
+        # that were processed are summarized
+        manifest_complete = _count_processed_file(report_dict.get('manifest_id'),
+                                                  os.path.basename(report_dict.get('file')))
+
+    if manifest_complete:
+        report_meta = {
+            'schema_name': schema_name,
+            'provider_type': provider_type,
+            'provider_uuid': provider_uuid,
+            'manifest_id': report_dict.get('manifest_id')
+        }
+        summarize_reports.delay([report_meta])
+
+
+@celery.task(name='masu.processor.tasks.process_cluster_reports', queue_name='process',
+             bind=True, max_retries=None)
+def process_cluster_reports(self, cluster_id):
+    """
+    Task to process the extracted OCP reports of a cluster.
+
+    Only one of these tasks processes a cluster at a time. A task that
+    finds the cluster locked is retried later, so the reports of a
+    cluster are processed in order while different clusters are processed
+    across workers.
+
+    Args:
+        cluster_id (String): The OCP cluster ID of the uploaded reports
+
+    Returns:
+        None
+
+    """
+    lock_key = f'ocp-cluster-processing-{cluster_id}'
+    # add returns None rather than False when the cache can not be reached,
+    # in which case processing goes ahead unlocked
+    if cache.add(lock_key, True, Config.OCP_CLUSTER_LOCK_TIMEOUT) is False:
+        LOG.info('Reports for cluster_id: %s are already being processed. Retrying later.',
+                 cluster_id)
+        raise self.retry(countdown=Config.OCP_CLUSTER_LOCK_RETRY_DELAY)
+
+    try:
+        provider_uuid = ocp_utils.get_provider_uuid_from_cluster_id(cluster_id)
+        if not provider_uuid:
+            LOG.error('Could not find provider_uuid for cluster_id: %s', str(cluster_id))
+            return
+        try:
+            accounts = AccountsAccessor().get_accounts(provider_uuid)
+        except AccountsAccessorError as error:
+            LOG.info('Unable to get accounts. Error: %s', str(error))
+            return
+        account = accounts.pop()
+        LOG.info('Processing report for account %s', account)
+        reports_to_summarize = get_report_files(**account)
+        LOG.info('Processing complete for account %s', account)
+        summarize_reports.delay(reports_to_summarize)
+    finally:
+        cache.delete(lock_key)
+
+
 @celery.task(name='masu.processor.tasks.remove_expired_data', queue_name='remove_expired')
 def remove_expired_data(schema_name, provider, simulate, provider_id=None):
     """
@@ -140,6 +260,8 @@ def remove_expired_data(schema_name, provider, simulate, provider_id=None):
             f' provider_id: {provider_id}')
     LOG.info(stmt)
     _remove_expired_data(schema_name, provider, simulate, provider_id)
+    if not simulate:
+        bump_data_generation(schema_name)
 
 
 @celery.task(name='masu.processor.tasks.summarize_reports',
@@ -208,8 +330,13 @@ def update_summary_tables(schema_name, provider, provider_uuid, start_date, end_
     if updater.manifest_is_ready():
         start_date, end_date = updater.update_daily_tables(start_date, end_date)
         updater.update_summary_tables(start_date, end_date)
+        bump_data_generation(schema_name)
 
     if provider_uuid:
+        # Charges and costs may need a wider window than the usage when the
+        # provider's cost model changed since they were last derived
+        start_date, end_date = ReportChargeUpdater(schema_name, provider_uuid)\
+            .get_charge_window(start_date, end_date)
         update_charge_info.apply_async(
             args=(
                 schema_name,
@@ -254,7 +381,8 @@ def update_all_summary_tables(start_date, end_date=None):
 
 @celery.task(name='masu.processor.tasks.update_charge_info',
              queue_name='reporting')
-def update_charge_info(schema_name, provider_uuid, start_date=None, end_date=None):
+def update_charge_info(schema_name, provider_uuid, start_date=None, end_date=None,
+                       force_full=False):
     """Update usage charge information.
 
     Args:
@@ -262,6 +390,7 @@ def update_charge_info(schema_name, provider_uuid, start_date=None, end_date=Non
         provider_uuid (str) The provider uuid.
         start_date (str, Optional) - Start date of range to update derived cost.
         end_date (str, Optional) - End date of range to update derived cost.
+        force_full (bool, Optional) - Update the charges of all dates.
 
     Returns
         None
@@ -271,11 +400,15 @@ def update_charge_info(schema_name, provider_uuid, start_date=None, end_date=Non
 
     stmt = (f'update_charge_info called with args:\n'
             f' schema_name: {schema_name},\n'
-            f' provider_uuid: {provider_uuid}')
+            f' provider_uuid: {provider_uuid},\n'
+            f' start_date: {start_date},\n'
+            f' end_date: {end_date},\n'
+            f' force_full: {force_full}')
     LOG.info(stmt)
 
     updater = ReportChargeUpdater(schema_name, provider_uuid)
-    updater.update_charge_info(start_date, end_date)
+    updater.update_charge_info(start_date, end_date, force_full)
+    bump_data_generation(schema_name)
 
 
 @celery.task(name='masu.processor.tasks.update_cost_summary_table',
@@ -305,3 +438,34 @@ def update_cost_summary_table(schema_name, provider_uuid, manifest_id=None,
 
     updater = ReportSummaryUpdater(schema_name, provider_uuid, manifest_id)
     updater.update_cost_summary_table(start_date, end_date)
+    bump_data_generation(schema_name)
+
+
+@celery.task(name='masu.processor.tasks.vacuum_schema_table',
+             queue_name='reporting')
+def vacuum_schema_table(schema_name, table_name):
+    """Vacuum a reporting table whose rows changed.
+
+    Args:
+        schema_name (str) The DB schema name.
+        table_name (str) The table to vacuum.
+
+    Returns:
+        None
+
+    """
+    stmt = (f'vacuum_schema_table called with args:\n'
+            f' schema_name: {schema_name},\n'
+            f' table_name: {table_name}')
+    LOG.info(stmt)
+    # Changes made from here on queue another vacuum
+    cache.delete(VACUUM_CACHE_KEY.format(schema=schema_name, table=table_name))
+
+    with ReportingCommonDBAccessor() as reporting_common:
+        column_map = reporting_common.column_map
+    with ReportDBAccessorBase(schema_name, column_map) as accessor:
+        try:
+            accessor.vacuum_table(table_name)
+        except ProgrammingError as err:
+            # The table was dropped, e.g. an expired usage month
+            LOG.warning('Unable to vacuum %s: %s', table_name, str(err))
@@ -43,7 +43,8 @@ class UpdateChargeTest(TestCase, MasuTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertIn(expected_key, body)
-        mock_update.delay.assert_called_with(params['schema'], params['provider_uuid'])
+        mock_update.delay.assert_called_with(params['schema'], params['provider_uuid'],
+                                            force_full=True)
 
     @patch('masu.api.update_charge.update_charge_info')
     def test_get_update_charge_schema_missing(self, mock_update):
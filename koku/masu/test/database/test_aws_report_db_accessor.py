@@ -21,21 +21,23 @@ import random
 import string
 import uuid
 from decimal import Decimal
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 import django.apps
 from dateutil import relativedelta
 from dateutil import parser
+from django.core.cache import cache
 from django.db import connection
-from django.db.models import Max, Min, Sum
+from django.db.models import Count, Max, Min, Sum
 from django.db.models.query import QuerySet
 from tenant_schemas.utils import schema_context
 
+from masu.config import Config
 from masu.database import AWS_CUR_TABLE_MAP, OCP_REPORT_TABLE_MAP
 from masu.database.aws_report_db_accessor import AWSReportDBAccessor
 from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
 from masu.database.provider_db_accessor import ProviderDBAccessor
-from masu.database.report_db_accessor_base import ReportSchema
+from masu.database.report_db_accessor_base import ReportSchema, VACUUM_CACHE_KEY
 from masu.database.report_manifest_db_accessor import ReportManifestDBAccessor
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
 from masu.external.date_accessor import DateAccessor
@@ -45,7 +47,9 @@ from masu.test.database.helpers import (
     map_django_field_type_to_python_type,
 )
 
-from reporting.provider.aws.models import AWSCostEntryProduct, AWSCostEntryReservation
+from reporting.provider.aws.models import (AWSCostEntry,
+                                           AWSCostEntryProduct,
+                                           AWSCostEntryReservation)
 
 
 class ReportSchemaTest(MasuTestCase):
@@ -435,6 +439,65 @@ class ReportDBAccessorTest(MasuTestCase):
             self.assertEqual(insert_count, query.count())
             self.assertEqual(row_id, row_id_2)
 
+    def test_bulk_insert_on_conflict(self):
+        """Test that a multi-row INSERT returns ids for new and existing rows."""
+        table_name = AWS_CUR_TABLE_MAP['product']
+        table = AWSCostEntryProduct
+        conflict_columns = ['sku', 'product_name', 'region']
+        with schema_context(self.schema):
+            existing = self.creator.create_columns_for_table(table_name)
+            existing_id = self.accessor.insert_on_conflict_do_nothing(
+                table, existing, conflict_columns=conflict_columns
+            )
+            new = self.creator.create_columns_for_table(table_name)
+            query = self.accessor._get_db_obj_query(table_name)
+            initial_count = query.count()
+
+            row_ids = self.accessor.bulk_insert_on_conflict(
+                table, [new, existing], conflict_columns=conflict_columns
+            )
+
+            self.assertEqual(query.count(), initial_count + 1)
+            self.assertEqual(row_ids[1], existing_id)
+            self.assertEqual(query.get(id=row_ids[0]).sku, new['sku'])
+            self.assertEqual(self.accessor.bulk_insert_on_conflict(table, []), [])
+
+    def test_bulk_insert_on_conflict_maps_ids_by_key(self):
+        """Test that each returned id belongs to the row with its key."""
+        table_name = AWS_CUR_TABLE_MAP['product']
+        table = AWSCostEntryProduct
+        conflict_columns = ['sku', 'product_name', 'region']
+        with schema_context(self.schema):
+            rows = [self.creator.create_columns_for_table(table_name) for _ in range(5)]
+            self.accessor.bulk_insert_on_conflict(
+                table, rows[2:], conflict_columns=conflict_columns
+            )
+
+            row_ids = self.accessor.bulk_insert_on_conflict(
+                table, rows, conflict_columns=conflict_columns
+            )
+
+            query = self.accessor._get_db_obj_query(table_name)
+            for row, row_id in zip(rows, row_ids):
+                self.assertEqual(query.get(id=row_id).sku, row['sku'])
+
+            bill = self.creator.create_cost_entry_bill(provider_id=self.aws_provider.id)
+            start = parser.parse('2018-08-01T00:00:00Z')
+            entries = [
+                {'bill_id': bill.id,
+                 'interval_start': start + datetime.timedelta(hours=hour),
+                 'interval_end': start + datetime.timedelta(hours=hour + 1)}
+                for hour in range(3)
+            ]
+            entry_ids = self.accessor.bulk_insert_on_conflict(
+                AWSCostEntry, entries, key_columns=['bill_id', 'interval_start']
+            )
+
+            query = self.accessor._get_db_obj_query(AWS_CUR_TABLE_MAP['cost_entry'])
+            for entry, entry_id in zip(entries, entry_ids):
+                self.assertEqual(query.get(id=entry_id).interval_start,
+                                 entry['interval_start'])
+
     def test_insert_on_conflict_do_nothing_without_conflict(self):
         """Test that an INSERT succeeds inserting all non-conflicting rows."""
         #table_name = random.choice(self.foreign_key_tables)
@@ -558,6 +621,34 @@ class ReportDBAccessorTest(MasuTestCase):
             type = map_django_field_type_to_python_type(column_type)
             self.assertIsInstance(value, type)
 
+    def test_clean_data_converts_report_strings(self):
+        """Test that values read from a report file are typed for their columns."""
+        table_name = AWS_CUR_TABLE_MAP['line_item']
+        data = {
+            'usage_amount': '1.23456789012',
+            'normalization_factor': '0.5',
+            'usage_type': 'BoxUsage',
+            'unblended_cost': '',
+        }
+        cleaned_data = self.accessor.clean_data(data, table_name)
+
+        self.assertEqual(cleaned_data['usage_amount'], Decimal('1.234567890'))
+        self.assertEqual(cleaned_data['normalization_factor'], 0.5)
+        self.assertEqual(cleaned_data['usage_type'], 'BoxUsage')
+        self.assertIsNone(cleaned_data['unblended_cost'])
+
+    def test_get_column_converters(self):
+        """Test that column converters clean values as clean_data does."""
+        table_name = AWS_CUR_TABLE_MAP['line_item']
+        columns = ['usage_amount', 'normalization_factor', 'usage_type']
+        values = ['1.5', 'Not a Number', '']
+        converters = self.accessor.get_column_converters(table_name, columns)
+
+        converted = [convert(value) for convert, value in zip(converters, values)]
+        expected = self.accessor.clean_data(dict(zip(columns, values)), table_name)
+        self.assertEqual(converted, list(expected.values()))
+        self.assertEqual(converted, [Decimal('1.5'), None, None])
+
     def test_convert_value_decimal_invalid_operation(self):
         """Test that an InvalidOperation is raised and None is returned."""
         dec = Decimal('123342348239472398472309847230984723098427309')
@@ -712,6 +803,31 @@ class ReportDBAccessorTest(MasuTestCase):
             self.assertEqual(len(reservations.keys()), count)
             self.assertIn(first_entry.reservation_arn, reservations)
 
+    def test_get_dimensions_for_keys(self):
+        """Test that only the requested cost entries, products and reservations are returned."""
+        with schema_context(self.schema):
+            cost_entry = self.accessor._get_db_obj_query(AWS_CUR_TABLE_MAP['cost_entry']).first()
+            product = self.accessor._get_db_obj_query(AWS_CUR_TABLE_MAP['product']).first()
+            reservation = self.accessor._get_db_obj_query(AWS_CUR_TABLE_MAP['reservation']).first()
+
+            start = cost_entry.interval_start.strftime(Config.AWS_DATETIME_STR_FORMAT)
+            cost_entries = self.accessor.get_cost_entries_for_keys(
+                [(cost_entry.bill_id, start)]
+            )
+            self.assertEqual(cost_entries, {(cost_entry.bill_id, start): cost_entry.id})
+
+            product_key = (product.sku, product.product_name, product.region)
+            products = self.accessor.get_products_for_keys([product_key, ('nope', None, None)])
+            self.assertEqual(products.get(product_key), product.id)
+            self.assertNotIn(('nope', None, None), products)
+
+            reservations = self.accessor.get_reservations_for_keys([reservation.reservation_arn])
+            self.assertEqual(reservations, {reservation.reservation_arn: reservation.id})
+
+            cost_entries = self.accessor.get_cost_entries(bill_ids=[cost_entry.bill_id])
+            self.assertIn(cost_entry.id, cost_entries.values())
+            self.assertEqual(self.accessor.get_cost_entries(bill_ids=[]), {})
+
     @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
     def test_populate_line_item_daily_table(self, mock_vacuum):
         """Test that the daily table is populated."""
@@ -794,6 +910,99 @@ class ReportDBAccessorTest(MasuTestCase):
 
             self.assertNotEqual(getattr(entry, 'tags'), {})
 
+    @patch('masu.database.report_db_accessor_base.celery')
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.analyze_table')
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
+    def test_populate_tables_deferred_vacuum(self, mock_vacuum, mock_analyze, mock_celery):
+        """Test that changed tables are analyzed once and their vacuum is queued."""
+        summary_table_name = AWS_CUR_TABLE_MAP['line_item_daily_summary']
+        bill = self.creator.create_cost_entry_bill(provider_id=self.aws_provider.id)
+        start_date = bill.billing_period_start.date()
+        end_date = start_date + datetime.timedelta(days=1)
+        cache_key = VACUUM_CACHE_KEY.format(schema=self.schema, table=summary_table_name)
+        cache.delete(cache_key)
+
+        with patch.object(Config, 'REPORTING_DEFERRED_VACUUM', True):
+            with AWSReportDBAccessor(self.schema, self.column_map) as accessor:
+                accessor.populate_line_item_daily_summary_table(
+                    start_date, end_date, [str(bill.id)]
+                )
+                accessor.populate_line_item_daily_summary_table(
+                    start_date, end_date, [str(bill.id)]
+                )
+                mock_analyze.assert_not_called()
+            with AWSReportDBAccessor(self.schema, self.column_map) as accessor:
+                accessor.populate_line_item_daily_summary_table(
+                    start_date, end_date, [str(bill.id)]
+                )
+        cache.delete(cache_key)
+
+        mock_vacuum.assert_not_called()
+        self.assertEqual(mock_analyze.call_count, 2)
+        mock_analyze.assert_called_with(summary_table_name)
+        mock_celery.send_task.assert_called_once_with(
+            'masu.processor.tasks.vacuum_schema_table',
+            args=[self.schema, summary_table_name],
+            countdown=Config.REPORTING_VACUUM_DELAY
+        )
+
+    def test_table_changed_month_partitions(self):
+        """Test that the usage month children of a changed range are recorded."""
+        daily_table_name = AWS_CUR_TABLE_MAP['line_item_daily']
+        start_date = datetime.date(2019, 8, 25)
+        end_date = datetime.date(2019, 9, 5)
+
+        with patch.object(Config, 'REPORTING_DEFERRED_VACUUM', True), \
+                patch.object(Config, 'REPORTING_MONTHLY_PARTITIONS', True):
+            self.accessor.table_changed(daily_table_name, start_date, end_date)
+            self.accessor.table_changed(AWS_CUR_TABLE_MAP['line_item'])
+
+        self.assertEqual(self.accessor._changed_tables, {
+            f'{daily_table_name}_2019_08': [(start_date, end_date)],
+            f'{daily_table_name}_2019_09': [(start_date, end_date)],
+            AWS_CUR_TABLE_MAP['line_item']: [(None, None)],
+        })
+        self.accessor._changed_tables = {}
+
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
+    def test_populate_line_item_daily_table_month_partitions(self, mock_vacuum):
+        """Test that daily rows are kept in the table of their usage month."""
+        daily_table_name = AWS_CUR_TABLE_MAP['line_item_daily']
+        bill = self.creator.create_cost_entry_bill(provider_id=self.aws_provider.id)
+        cost_entry = self.creator.create_cost_entry(bill)
+        product = self.creator.create_cost_entry_product()
+        pricing = self.creator.create_cost_entry_pricing()
+        reservation = self.creator.create_cost_entry_reservation()
+        self.creator.create_cost_entry_line_item(
+            bill, cost_entry, product, pricing, reservation
+        )
+        start_date = cost_entry.interval_start.date()
+        end_date = cost_entry.interval_end.date()
+
+        with patch.object(Config, 'REPORTING_MONTHLY_PARTITIONS', True):
+            self.accessor.populate_line_item_daily_table(
+                start_date, end_date, [str(bill.id)]
+            )
+
+        partition = f'{daily_table_name}_{start_date:%Y_%m}'
+        mock_vacuum.assert_any_call(partition)
+        self.assertNotIn(call(daily_table_name), mock_vacuum.call_args_list)
+        with schema_context(self.schema):
+            count = self.accessor._get_db_obj_query(daily_table_name).count()
+            self.assertNotEqual(count, 0)
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {partition}')
+                self.assertEqual(cursor.fetchone()[0], count)
+                cursor.execute(f'SELECT count(*) FROM ONLY {daily_table_name}')
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+        dropped = self.accessor.drop_month_partitions(daily_table_name, end_date)
+        self.assertIn(partition, dropped)
+        with schema_context(self.schema):
+            self.assertEqual(self.accessor._get_db_obj_query(daily_table_name).count(), 0)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TRIGGER usage_month_insert ON {daily_table_name}')
+
     @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
     def test_populate_line_item_daily_summary_table(self, mock_vaccum):
         """Test that the daily summary table is populated."""
@@ -957,21 +1166,10 @@ class ReportDBAccessorTest(MasuTestCase):
 
             self.assertEqual(sorted(tag_keys), sorted(expected_tag_keys))
 
-    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
-    @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
-    def test_populate_ocp_on_aws_cost_daily_summary(
-        self, mock_ocp_vacuum, mock_aws_vacuum
-    ):
-        """Test that the OCP on AWS cost summary table is populated."""
-        summary_table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
-        project_summary_table_name = AWS_CUR_TABLE_MAP[
-            'ocp_on_aws_project_daily_summary'
-        ]
+    def _populate_ocp_on_aws_daily_data(self):
+        """Populate matching AWS and OCP daily data for OCP on AWS tests."""
         bill_ids = []
 
-        summary_table = getattr(self.accessor.report_schema, summary_table_name)
-        project_table = getattr(self.accessor.report_schema, project_summary_table_name)
-
         today = DateAccessor().today_with_timezone('UTC')
         last_month = today - relativedelta.relativedelta(months=1)
         resource_id = 'i-12345'
@@ -1032,6 +1230,23 @@ class ReportDBAccessorTest(MasuTestCase):
             ocp_accessor.populate_line_item_daily_summary_table(
                 start_date, end_date, cluster_id
             )
+        return cluster_id, bill_ids, last_month, today, sum_aws_cost
+
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
+    @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
+    def test_populate_ocp_on_aws_cost_daily_summary(
+        self, mock_ocp_vacuum, mock_aws_vacuum
+    ):
+        """Test that the OCP on AWS cost summary table is populated."""
+        summary_table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
+        project_summary_table_name = AWS_CUR_TABLE_MAP[
+            'ocp_on_aws_project_daily_summary'
+        ]
+        summary_table = getattr(self.accessor.report_schema, summary_table_name)
+        project_table = getattr(self.accessor.report_schema, project_summary_table_name)
+
+        cluster_id, bill_ids, last_month, today, sum_aws_cost = self._populate_ocp_on_aws_daily_data()
+
         with schema_context(self.schema):
             query = self.accessor._get_db_obj_query(summary_table_name)
             initial_count = query.count()
@@ -1055,6 +1270,64 @@ class ReportDBAccessorTest(MasuTestCase):
             self.assertEqual(sum_cost, sum_project_cost)
             self.assertLessEqual(sum_cost, sum_aws_cost)
 
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.vacuum_table')
+    @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
+    def test_populate_ocp_on_aws_cost_daily_summary_match_index(
+        self, mock_ocp_vacuum, mock_aws_vacuum
+    ):
+        """Test that the OCP on AWS summary from the match index is unchanged."""
+        summary_table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
+        index_table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_match_index']
+        summary_table = getattr(self.accessor.report_schema, summary_table_name)
+        index_table = getattr(self.accessor.report_schema, index_table_name)
+
+        cluster_id, bill_ids, last_month, today, _ = self._populate_ocp_on_aws_daily_data()
+
+        # Reconnect as the OCP accessor closed the connection.
+        self.accessor._conn.connect()
+        self.accessor.populate_ocp_on_aws_cost_daily_summary(last_month, today,
+                                                            cluster_id, bill_ids)
+        with schema_context(self.schema):
+            expected = summary_table.objects.aggregate(Sum('unblended_cost'), Count('id'))
+
+        with patch.object(Config, 'OCP_AWS_MATCH_INDEX', True):
+            self.accessor.populate_ocp_on_aws_cost_daily_summary(last_month, today,
+                                                                cluster_id, bill_ids)
+            with schema_context(self.schema):
+                self.assertEqual(
+                    summary_table.objects.aggregate(Sum('unblended_cost'), Count('id')),
+                    expected
+                )
+                index_ids = set(index_table.objects.values_list('id', flat=True))
+                self.assertNotEqual(index_ids, set())
+
+            # Nothing changed in the daily data so the stored matches are reused
+            self.accessor.populate_ocp_on_aws_cost_daily_summary(last_month, today,
+                                                                cluster_id, bill_ids)
+            with schema_context(self.schema):
+                self.assertEqual(
+                    set(index_table.objects.values_list('id', flat=True)),
+                    index_ids
+                )
+                self.assertEqual(
+                    summary_table.objects.aggregate(Sum('unblended_cost'), Count('id')),
+                    expected
+                )
+
+            # Rebuilding the daily data gives it new ids but the same matches
+            self.accessor.populate_line_item_daily_table(last_month, today, bill_ids)
+            self.accessor.populate_ocp_on_aws_cost_daily_summary(last_month, today,
+                                                                cluster_id, bill_ids)
+            with schema_context(self.schema):
+                self.assertEqual(
+                    set(index_table.objects.values_list('id', flat=True)),
+                    index_ids
+                )
+                self.assertEqual(
+                    summary_table.objects.aggregate(Sum('unblended_cost'), Count('id')),
+                    expected
+                )
+
     def test_bills_for_provider_id(self):
         """Test that bills_for_provider_id returns the right bills."""
         bill1_date = datetime.datetime(2018, 1, 6, 0, 0, 0)
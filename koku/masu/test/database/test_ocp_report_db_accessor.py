@@ -16,11 +16,13 @@
 #
 
 """Test the OCPReportDBAccessor utility object."""
+import io
 import random
 from unittest.mock import patch
 
 from dateutil import relativedelta
-from django.db.models import Max, Min
+from django.db import connection
+from django.db.models import Max, Min, Sum
 from django.db.models.query import QuerySet
 from tenant_schemas.utils import schema_context
 
@@ -414,6 +416,48 @@ class OCPReportDBAccessorTest(MasuTestCase):
 
             self.assertEqual(sorted(tag_keys), sorted(expected_tag_keys))
 
+    @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
+    def test_populate_pod_label_summary_table_updates_dictionary(self, mock_vacuum):
+        """Test that the label dictionary holds the pod labels of the window."""
+        report_table_name = OCP_REPORT_TABLE_MAP['report']
+        report_table = getattr(self.accessor.report_schema, report_table_name)
+
+        today = DateAccessor().today_with_timezone('UTC')
+        period = self.creator.create_ocp_report_period(today)
+        report = self.creator.create_ocp_report(period, today)
+        self.creator.create_ocp_usage_line_item(period, report)
+
+        with schema_context(self.schema):
+            report_entry = report_table.objects.all().aggregate(
+                Min('interval_start'), Max('interval_start')
+            )
+            start_date = report_entry['interval_start__min']
+            end_date = report_entry['interval_start__max']
+
+        self.accessor.populate_line_item_daily_table(
+            start_date, end_date, self.cluster_id
+        )
+        self.accessor.populate_pod_label_summary_table(
+            start_date, end_date, self.cluster_id
+        )
+
+        query = self.accessor._get_db_obj_query(OCP_REPORT_TABLE_MAP['labels_dictionary'])
+        with schema_context(self.schema):
+            entries = query.filter(report_period_id=period.id, data_source='pod')
+            keys = [entry.key for entry in entries]
+            self.assertTrue(keys)
+            for entry in entries:
+                self.assertEqual(entry.usage_month, period.report_period_start.date())
+
+            with self.accessor._conn.cursor() as cursor:
+                cursor.execute(
+                    """SELECT DISTINCT jsonb_object_keys(pod_labels)
+                        FROM reporting_ocpusagelineitem_daily"""
+                )
+                expected_keys = [row[0] for row in cursor.fetchall()]
+
+        self.assertEqual(sorted(keys), sorted(expected_keys))
+
     @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
     def test_populate_volume_claim_label_summary_table(self, mock_vacuum):
         """Test that the volume claim summary table is populated."""
@@ -868,6 +912,118 @@ class OCPReportDBAccessorTest(MasuTestCase):
         with schema_context(self.schema):
             self.assertEquals(cost_summary.count(), 26)
 
+    @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
+    def test_populate_cost_summary_rollup_tables(self, mock_vacuum):
+        """Test that the cost summary rollups sum up the cost summary."""
+        report_table_name = OCP_REPORT_TABLE_MAP['report']
+        report_table = getattr(self.accessor.report_schema, report_table_name)
+        for _ in range(25):
+            self.creator.create_ocp_storage_line_item(
+                self.reporting_period, self.report
+            )
+
+        with schema_context(self.schema):
+            report_entry = report_table.objects.all().aggregate(
+                Min('interval_start'), Max('interval_start')
+            )
+            start_date = report_entry['interval_start__min']
+            end_date = report_entry['interval_start__max']
+
+        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        self.accessor.populate_storage_line_item_daily_table(
+            start_date, end_date, self.cluster_id
+        )
+        self.accessor.populate_storage_line_item_daily_summary_table(
+            start_date, end_date, self.cluster_id
+        )
+        self.accessor.populate_cost_summary_table(
+            self.cluster_id, start_date=start_date, end_date=end_date
+        )
+        self.accessor.populate_cost_summary_rollup_tables(
+            self.cluster_id, start_date, end_date
+        )
+
+        cost_summary = self.accessor.get_cost_summary_for_clusterid(self.cluster_id)
+        rollups = self.accessor.get_cost_summary_rollups_for_clusterid(self.cluster_id)
+        charge = 'persistentvolumeclaim_charge_gb_month'
+        with schema_context(self.schema):
+            expected = cost_summary.aggregate(Sum(charge))[f'{charge}__sum']
+            namespaces = cost_summary.values('usage_start', 'namespace').distinct().count()
+            self.assertNotEqual(cost_summary.count(), 0)
+            for rollup in rollups:
+                self.assertNotEqual(rollup.count(), 0)
+                self.assertEqual(rollup.aggregate(Sum(charge))[f'{charge}__sum'], expected)
+
+            project_rollup = self.accessor._get_db_obj_query(
+                OCP_REPORT_TABLE_MAP['cost_summary_by_project']
+            )
+            self.assertEqual(project_rollup.count(), namespaces)
+
+    @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.vacuum_table')
+    def test_populate_cost_summary_rollup_tables_no_dates(self, mock_vacuum):
+        """Test that the cost summary rollups take the dates from the cost summary."""
+        for _ in range(25):
+            self.creator.create_ocp_storage_line_item(
+                self.reporting_period, self.report
+            )
+        report_table_name = OCP_REPORT_TABLE_MAP['report']
+        report_table = getattr(self.accessor.report_schema, report_table_name)
+        with schema_context(self.schema):
+            report_entry = report_table.objects.all().aggregate(
+                Min('interval_start'), Max('interval_start')
+            )
+            start_date = report_entry['interval_start__min']
+            end_date = report_entry['interval_start__max']
+
+        rollups = self.accessor.get_cost_summary_rollups_for_clusterid(self.cluster_id)
+        # Nothing to roll up without a cost summary
+        self.accessor.populate_cost_summary_rollup_tables(self.cluster_id, None, None)
+        with schema_context(self.schema):
+            for rollup in rollups:
+                self.assertEqual(rollup.count(), 0)
+
+        self.accessor.populate_storage_line_item_daily_table(
+            start_date, end_date, self.cluster_id
+        )
+        self.accessor.populate_storage_line_item_daily_summary_table(
+            start_date, end_date, self.cluster_id
+        )
+        self.accessor.populate_cost_summary_table(self.cluster_id)
+        self.accessor.populate_cost_summary_rollup_tables(self.cluster_id, None, None)
+
+        cost_summary = self.accessor.get_cost_summary_for_clusterid(self.cluster_id)
+        charge = 'persistentvolumeclaim_charge_gb_month'
+        with schema_context(self.schema):
+            expected = cost_summary.aggregate(Sum(charge))[f'{charge}__sum']
+            for rollup in rollups:
+                self.assertEqual(rollup.aggregate(Sum(charge))[f'{charge}__sum'], expected)
+
+    def test_merge_staging_table(self):
+        """Test that the last staged row of a conflict key is merged."""
+        with schema_context(self.schema):
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE TABLE merge_test (id integer PRIMARY KEY, amount integer)')
+        staging_table = self.accessor.create_staging_table('merge_test')
+        try:
+            rows = ''.join(f'{key}\t{value}\n'
+                           for key, value in ((1, 1), (2, 1), (1, 3), (1, 2)))
+            self.accessor.bulk_insert_rows(io.StringIO(rows), staging_table, ('id', 'amount'))
+            self.accessor.merge_staging_table('merge_test', staging_table,
+                                              ['id', 'amount'], ['id'])
+            with schema_context(self.schema):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT id, amount FROM merge_test ORDER BY id')
+                    self.assertEqual(cursor.fetchall(), [(1, 2), (2, 1)])
+        finally:
+            self.accessor.drop_staging_table(staging_table)
+            with schema_context(self.schema):
+                with connection.cursor() as cursor:
+                    cursor.execute('DROP TABLE merge_test')
+                    cursor.execute('SELECT to_regclass(%s)', [staging_table])
+                    self.assertIsNone(cursor.fetchone()[0])
+
     def test_get_report_periods(self):
         """Test that report_periods getter is correct."""
         periods = self.accessor.get_report_periods()
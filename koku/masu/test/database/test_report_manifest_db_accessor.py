@@ -86,3 +86,15 @@ class ReportManifestDBAccessorTest(IamTestCase):
             now = DateAccessor().today_with_timezone('UTC')
             self.manifest_accessor.mark_manifest_as_updated(manifest)
             self.assertGreater(manifest.manifest_updated_datetime, now)
+
+    def test_increment_num_processed_files(self):
+        """Test that a processed file is counted on the manifest."""
+        with schema_context(self.schema):
+            manifest = self.manifest_accessor.add(**self.manifest_dict)
+            with ReportManifestDBAccessor() as accessor:
+                updated = accessor.increment_num_processed_files(manifest.id)
+                self.assertEqual(updated.num_processed_files, 1)
+                updated = accessor.increment_num_processed_files(manifest.id)
+            self.assertEqual(updated.num_processed_files, 2)
+            manifest = self.manifest_accessor.get_manifest_by_id(manifest.id)
+            self.assertEqual(manifest.num_processed_files, 2)
@@ -19,10 +19,15 @@
 import copy
 from unittest.mock import Mock
 
+from django.core.cache import caches
 
 from masu.database import AWS_CUR_TABLE_MAP
-from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
+from masu.database.aws_report_db_accessor import AWSReportDBAccessor
+from masu.database.reporting_common_db_accessor import (REPORT_METADATA_CACHE,
+                                                        REPORT_METADATA_VERSION_KEY,
+                                                        ReportingCommonDBAccessor)
 from masu.test import MasuTestCase
+from reporting_common.models import ReportColumnMap
 
 
 class ReportingCommonDBAccessorTest(MasuTestCase):
@@ -62,3 +67,32 @@ class ReportingCommonDBAccessorTest(MasuTestCase):
         with ReportingCommonDBAccessor() as accessor:
             accessor._test = Mock()
             accessor.add('test', {'foo': 'bar'})
+
+    def test_column_map_cached(self):
+        """Test that accessors share the column map and report schema."""
+        accessor = ReportingCommonDBAccessor()
+        self.assertIs(accessor.column_map, self.accessor.column_map)
+
+        first = AWSReportDBAccessor('acct10001', accessor.column_map)
+        second = AWSReportDBAccessor('acct10001', accessor.column_map)
+        self.assertIs(first.report_schema, second.report_schema)
+
+    def test_column_map_cache_invalidated(self):
+        """Test that changing a mapping row drops the cached column map."""
+        version = REPORT_METADATA_CACHE.get_shared_version()
+        column_map = self.accessor.column_map
+
+        row = ReportColumnMap.objects.first()
+        row.save()
+
+        self.assertNotEqual(REPORT_METADATA_CACHE.get_shared_version(), version)
+        self.assertIsNot(ReportingCommonDBAccessor().column_map, column_map)
+
+    def test_column_map_cache_invalidated_by_other_process(self):
+        """Test that a version set by another process drops the cached column map."""
+        column_map = ReportingCommonDBAccessor().column_map
+        self.assertIs(ReportingCommonDBAccessor().column_map, column_map)
+
+        caches['default'].set(REPORT_METADATA_VERSION_KEY, 'other-process', None)
+
+        self.assertIsNot(ReportingCommonDBAccessor().column_map, column_map)
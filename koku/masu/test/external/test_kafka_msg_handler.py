@@ -19,8 +19,10 @@
 
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
 from unittest.mock import patch
+import asyncio
 import os
 import json
+import threading
 import tempfile
 import shutil
 import requests
@@ -37,7 +39,7 @@ from masu.test import MasuTestCase
 class KafkaMsg:
     def __init__(self, topic, url):
         self.topic = topic
-        value_dict = {'url': url}
+        value_dict = {'url': url, 'request_id': '1'}
         value_str = json.dumps(value_dict)
         self.value = value_str.encode('utf-8')
 
@@ -78,6 +80,27 @@ class KafkaMsgHandlerTest(MasuTestCase):
                     shutil.rmtree(fake_dir)
                     shutil.rmtree(fake_pvc_dir)
 
+    def test_extract_payload_moves_files(self):
+        """Test that extracted files are moved into place and staging is removed."""
+        payload_url = 'http://insights-upload.com/quarnantine/file_to_validate'
+        with requests_mock.mock() as m:
+            m.get(payload_url, content=self.tarball_file)
+
+            fake_dir = tempfile.mkdtemp()
+            fake_tmp_dir = tempfile.mkdtemp()
+            with patch.object(Config, 'INSIGHTS_LOCAL_REPORT_DIR', fake_dir):
+                with patch.object(Config, 'TMP_DIR', fake_tmp_dir):
+                    report_meta = msg_handler.extract_payload(payload_url)
+            expected_path = '{}/{}/{}'.format(fake_dir, self.cluster_id, self.date_range)
+            for report_file in report_meta.get('files'):
+                self.assertTrue(os.path.isfile('{}/{}'.format(expected_path, report_file)))
+            self.assertEqual(report_meta.get('manifest_path'),
+                             '{}/manifest.json'.format(expected_path))
+            self.assertTrue(os.path.isfile(report_meta.get('manifest_path')))
+            self.assertEqual(os.listdir(fake_tmp_dir), [])
+            shutil.rmtree(fake_dir)
+            shutil.rmtree(fake_tmp_dir)
+
     def test_extract_bad_payload(self):
         """Test to verify extracting payload missing report files is not successful."""
         payload_url = 'http://insights-upload.com/quarnantine/file_to_validate'
@@ -161,6 +184,98 @@ class KafkaMsgHandlerTest(MasuTestCase):
         # Verify that when None status is returned for non-hccm messages (we don't confirm these)
         self.assertEqual(msg_handler.handle_message(advisor_msg), (None, None))
 
+    def test_handle_payload(self):
+        """Test that a payload is confirmed and then processed."""
+        hccm_msg = KafkaMsg(
+            msg_handler.HCCM_TOPIC,
+            'http://insights-upload.com/quarnantine/file_to_validate',
+        )
+        report_meta = {'cluster_id': self.cluster_id}
+        confirmations = []
+
+        async def confirm(request_id, status):
+            confirmations.append(status)
+
+        with patch('masu.external.kafka_msg_handler.extract_payload', return_value=report_meta), \
+                patch('masu.external.kafka_msg_handler.send_confirmation', side_effect=confirm), \
+                patch('masu.external.kafka_msg_handler.process_report') as mock_process:
+            msg_handler.EVENT_LOOP.run_until_complete(msg_handler.PAYLOAD_SEMAPHORE.acquire())
+            msg_handler.EVENT_LOOP.run_until_complete(msg_handler.handle_payload(hccm_msg))
+
+        self.assertEqual(confirmations, [msg_handler.SUCCESS_CONFIRM_STATUS])
+        mock_process.assert_called_with(report_meta)
+        self.assertFalse(msg_handler.PAYLOAD_SEMAPHORE.locked())
+
+    def test_handle_payload_publishes_before_processing(self):
+        """Test that a payload is moved into place only once it is processed."""
+        payload_url = 'http://insights-upload.com/quarnantine/file_to_validate'
+        hccm_msg = KafkaMsg(msg_handler.HCCM_TOPIC, payload_url)
+        published = []
+
+        async def confirm(request_id, status):
+            self.assertFalse(os.path.isdir(os.path.join(fake_dir, self.cluster_id)))
+
+        def process(report_meta):
+            published.append(os.path.isfile(report_meta.get('manifest_path')))
+
+        fake_dir = tempfile.mkdtemp()
+        fake_tmp_dir = tempfile.mkdtemp()
+        with requests_mock.mock() as m:
+            m.get(payload_url, content=self.tarball_file)
+            with patch.object(Config, 'INSIGHTS_LOCAL_REPORT_DIR', fake_dir), \
+                    patch.object(Config, 'TMP_DIR', fake_tmp_dir), \
+                    patch('masu.external.kafka_msg_handler.send_confirmation', side_effect=confirm), \
+                    patch('masu.external.kafka_msg_handler.process_report', side_effect=process):
+                msg_handler.EVENT_LOOP.run_until_complete(msg_handler.PAYLOAD_SEMAPHORE.acquire())
+                msg_handler.EVENT_LOOP.run_until_complete(msg_handler.handle_payload(hccm_msg))
+
+        self.assertEqual(published, [True])
+        self.assertEqual(os.listdir(fake_tmp_dir), [])
+        self.assertEqual(msg_handler.PAYLOAD_SLOTS, [])
+        shutil.rmtree(fake_dir)
+        shutil.rmtree(fake_tmp_dir)
+
+    def test_handle_payload_processes_cluster_in_message_order(self):
+        """Test that payloads of a cluster are processed in the order their messages arrived."""
+        first_url = 'http://insights-upload.com/quarnantine/first'
+        second_url = 'http://insights-upload.com/quarnantine/second'
+        other_url = 'http://insights-upload.com/quarnantine/other'
+        second_extracted = threading.Event()
+        processed = []
+
+        def extract(msg, publish):
+            url = json.loads(msg.value.decode('utf-8'))['url']
+            if url == first_url:
+                # The older payload finishes extracting last
+                second_extracted.wait(5)
+            elif url == second_url:
+                second_extracted.set()
+            cluster_id = 'other-cluster' if url == other_url else self.cluster_id
+            return msg_handler.SUCCESS_CONFIRM_STATUS, {'cluster_id': cluster_id, 'url': url}
+
+        async def confirm(request_id, status):
+            pass
+
+        def process(report_meta):
+            processed.append(report_meta.get('url'))
+
+        async def handle_all():
+            await asyncio.gather(
+                msg_handler.handle_payload(KafkaMsg(msg_handler.HCCM_TOPIC, first_url)),
+                msg_handler.handle_payload(KafkaMsg(msg_handler.HCCM_TOPIC, second_url)),
+                msg_handler.handle_payload(KafkaMsg(msg_handler.HCCM_TOPIC, other_url)),
+            )
+
+        with patch('masu.external.kafka_msg_handler.handle_message', side_effect=extract), \
+                patch('masu.external.kafka_msg_handler.send_confirmation', side_effect=confirm), \
+                patch('masu.external.kafka_msg_handler.process_report', side_effect=process), \
+                patch('masu.external.kafka_msg_handler.PAYLOAD_SEMAPHORE'):
+            msg_handler.EVENT_LOOP.run_until_complete(handle_all())
+
+        self.assertLess(processed.index(first_url), processed.index(second_url))
+        self.assertEqual(sorted(processed), sorted([first_url, second_url, other_url]))
+        self.assertEqual(msg_handler.PAYLOAD_SLOTS, [])
+
     def test_get_account(self):
         """Test that the account details are returned given a provider uuid."""
         ocp_account = msg_handler.get_account(self.ocp_test_provider_uuid)
@@ -212,3 +327,15 @@ class KafkaMsgHandlerTest(MasuTestCase):
         msg_handler.process_report(sample_report)
 
         mock_summarize.delay.assert_called_with(mock_download_process_value)
+
+    @patch('masu.external.kafka_msg_handler.process_cluster_reports')
+    @patch('masu.external.kafka_msg_handler.get_report_files')
+    def test_process_report_celery_dispatch(self, mock_get_reports, mock_process_cluster):
+        """Test that processing is queued as a task in dispatch mode."""
+        sample_report = {'cluster_id': self.ocp_provider_resource_name}
+
+        with patch.object(Config, 'OCP_PROCESSING_CELERY_DISPATCH', True):
+            msg_handler.process_report(sample_report)
+
+        mock_process_cluster.delay.assert_called_with(self.ocp_provider_resource_name)
+        mock_get_reports.assert_not_called()
@@ -19,6 +19,7 @@
 import datetime
 from dateutil import relativedelta
 
+from django.db import connection
 from tenant_schemas.utils import schema_context
 
 from masu.database import AWS_CUR_TABLE_MAP
@@ -108,6 +109,26 @@ class AWSReportDBCleanerTest(MasuTestCase):
                 self.accessor._get_db_obj_query(cost_entry_table_name).first()
             )
 
+    def test_purge_expired_report_data_drops_line_item_table(self):
+        """Test that the line item child table of a removed bill is dropped."""
+        bill_table_name = AWS_CUR_TABLE_MAP['bill']
+        line_item_table_name = AWS_CUR_TABLE_MAP['line_item']
+
+        with schema_context(self.schema):
+            bill = self.accessor._get_db_obj_query(bill_table_name).first()
+        partition = self.accessor.create_partition(line_item_table_name,
+                                                   'cost_entry_bill_id',
+                                                   bill.id)
+
+        cleaner = AWSReportDBCleaner(self.schema)
+        cleaner.purge_expired_report_data(provider_id=self.aws_provider.id)
+
+        with schema_context(self.schema):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT to_regclass(%s)', [partition])
+                self.assertIsNone(cursor.fetchone()[0])
+            self.assertIsNone(self.accessor._get_db_obj_query(line_item_table_name).first())
+
     def test_purge_expired_report_data_before_date(self):
         """Test to remove report data before a provided date."""
         bill_table_name = AWS_CUR_TABLE_MAP['bill']
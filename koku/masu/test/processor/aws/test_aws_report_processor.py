@@ -28,8 +28,10 @@ import logging
 import random
 import shutil
 import tempfile
+from unittest.mock import patch
 import psycopg2
 
+from django.db import connection
 from tenant_schemas.utils import schema_context
 
 from masu.config import Config
@@ -43,6 +45,12 @@ from masu.exceptions import MasuProcessingError
 from masu.external import GZIP_COMPRESSED, UNCOMPRESSED
 from masu.external.date_accessor import DateAccessor
 from masu.processor.aws.aws_report_processor import AWSReportProcessor, ProcessedReport
+from masu.processor.report_processor_base import (ColumnarTransform,
+                                                  LookupCache,
+                                                  ProjectionPlan,
+                                                  ReportFileScan,
+                                                  RowStreamFile,
+                                                  gzip_backend)
 import masu.util.common as common_util
 from masu.test import MasuTestCase
 
@@ -230,6 +238,54 @@ class AWSReportProcessorTest(MasuTestCase):
             else:
                 self.assertTrue(count > counts[table_name])
 
+    def test_process_partition_swap(self):
+        """Test that reprocessing swaps the bill's line item table."""
+        table_name = AWS_CUR_TABLE_MAP['line_item']
+        table = getattr(self.report_schema, table_name)
+
+        def process(columnar=False):
+            processor = AWSReportProcessor(
+                schema_name=self.schema,
+                report_path=self.test_report,
+                compression=UNCOMPRESSED,
+                provider_id=self.aws_provider.id,
+                manifest_id=self.manifest.id,
+            )
+            processor._partition_swap = True
+            processor._columnar_transform = columnar
+            processor._batch_size = 100
+            processor.process()
+            return processor
+
+        processor = process()
+        partition = processor._line_item_table
+        self.assertNotEqual(partition, table_name)
+        with schema_context(self.schema):
+            count = table.objects.count()
+            self.assertNotEqual(count, 0)
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {partition}')
+                self.assertEqual(cursor.fetchone()[0], count)
+
+        # The bill now exists, its rows are loaded over several batches into
+        # a staged table which is swapped in for the bill's table
+        processor = process(columnar=True)
+        self.assertEqual(processor._line_item_table, partition)
+        with schema_context(self.schema):
+            self.assertEqual(table.objects.count(), count)
+            self.assertFalse(table.objects.filter(cost_entry_id__isnull=True).exists())
+
+        # A failed load leaves the bill's rows as they were
+        with patch.object(AWSReportProcessor, '_save_to_db', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                process()
+        with schema_context(self.schema):
+            self.assertEqual(table.objects.count(), count)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT to_regclass(%s)', [f'{partition}_staged'])
+                self.assertIsNone(cursor.fetchone()[0])
+                cursor.execute(f'DROP TABLE {partition}')
+
     def test_process_duplicates(self):
         """Test that row duplicates are not inserted into the DB."""
         counts = {}
@@ -270,6 +326,167 @@ class AWSReportProcessorTest(MasuTestCase):
                 count = table.objects.count()
             self.assertTrue(count == counts[table_name])
 
+    def test_process_stream_copy(self):
+        """Test that streaming line items matches the batched processing."""
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        processor.process()
+        table = getattr(self.report_schema, AWS_CUR_TABLE_MAP['line_item'])
+        with schema_context(self.schema):
+            expected_count = table.objects.count()
+            expected_cost = sum(table.objects.values_list('unblended_cost', flat=True))
+            table.objects.all().delete()
+
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        processor._stream_copy = True
+        processor.process()
+
+        with schema_context(self.schema):
+            self.assertEqual(table.objects.count(), expected_count)
+            self.assertEqual(
+                sum(table.objects.values_list('unblended_cost', flat=True)),
+                expected_cost
+            )
+            self.assertFalse(table.objects.filter(cost_entry_id__isnull=True).exists())
+        self.assertEqual(processor.processed_report.line_items, [])
+
+    def test_process_bulk_dimensions(self):
+        """Test that set-based dimension inserts match per-row processing."""
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        processor._bulk_dimensions = True
+        processor.process()
+
+        line_item_table = getattr(self.report_schema, AWS_CUR_TABLE_MAP['line_item'])
+        product_table = getattr(self.report_schema, AWS_CUR_TABLE_MAP['product'])
+        with schema_context(self.schema):
+            product_count = product_table.objects.count()
+            line_item_count = line_item_table.objects.count()
+            self.assertNotEqual(line_item_count, 0)
+            self.assertFalse(
+                line_item_table.objects.filter(cost_entry_id__isnull=True).exists()
+            )
+            line_item = line_item_table.objects.first()
+            self.assertEqual(line_item.cost_entry.bill_id, line_item.cost_entry_bill_id)
+            line_item_table.objects.all().delete()
+
+        # A second pass finds every object in memory or in the database
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        processor._bulk_dimensions = True
+        processor._batch_size = 2
+        processor.process()
+
+        with schema_context(self.schema):
+            self.assertEqual(product_table.objects.count(), product_count)
+            self.assertEqual(line_item_table.objects.count(), line_item_count)
+            self.assertFalse(
+                line_item_table.objects.filter(cost_entry_id__isnull=True).exists()
+            )
+
+    def test_bill_key_matches_stored_bills(self):
+        """Test that the bill key of a row finds the bill read from the database."""
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        processor.process()
+
+        with open(self.test_report, 'r') as report_file:
+            row = next(csv.DictReader(report_file))
+        with schema_context(self.schema):
+            bill_map = self.accessor.get_cost_entry_bills(provider_id=self.aws_provider.id)
+        self.assertIn(processor._get_cost_entry_bill_key(row), bill_map)
+
+    def test_row_stream_file_read(self):
+        """Test that the row stream serializes rows only as they are read."""
+        rows = iter([('a', 1, None), ('b', 2, 'c'), ('d', 3, '')])
+        stream = RowStreamFile(rows)
+
+        first = stream.read(4)
+        self.assertEqual(first, 'a\t1\t')
+        self.assertEqual(stream.row_count, 1)
+
+        remainder = stream.read()
+        self.assertEqual(first + remainder, 'a\t1\t\r\nb\t2\tc\r\nd\t3\t\r\n')
+        self.assertEqual(stream.row_count, 3)
+        self.assertEqual(stream.read(10), '')
+
+    def test_columnar_line_item_data_matches_rows(self):
+        """Test that the columnar transform yields the row path's line items."""
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        with AWSReportDBAccessor(self.schema, self.column_map) as report_db:
+            processor._create_cost_entry_dimensions_for_file(report_db)
+            with processor._open_report_scan() as scan:
+                expected = list(processor._iter_line_item_data(scan, report_db))
+            processor._columnar_transform = True
+            with processor._open_report_scan() as scan:
+                result = list(processor._iter_columnar_line_item_data(scan, report_db))
+
+        self.assertNotEqual(result, [])
+        self.assertEqual([list(data.items()) for data in result],
+                         [list(data.items()) for data in expected])
+
+    def test_process_columnar_transform(self):
+        """Test that the file is processed with the columnar transform."""
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+        )
+        processor._columnar_transform = True
+        processor._batch_size = 100
+        processor.process()
+
+        table = getattr(self.report_schema, AWS_CUR_TABLE_MAP['line_item'])
+        with schema_context(self.schema):
+            self.assertNotEqual(table.objects.count(), 0)
+            self.assertFalse(table.objects.filter(cost_entry_id__isnull=True).exists())
+
+    def test_columnar_transform(self):
+        """Test that chunks are converted a column at a time."""
+        header = ['a', 'b', 'tags:env', 'c', 'tags:app']
+        column_map = {'table': {'a': 'col_a', 'c': 'col_c'}}
+        plan = ProjectionPlan(header, column_map, tag_prefix='tags')
+        transform = ColumnarTransform(plan, 'table')
+        transform.set_converters([int, lambda value: value or None])
+        self.assertEqual(transform.columns, ['col_a', 'col_c'])
+
+        reader = iter([['1', 'x', 'prod', '', 'web'], [], ['2', 'y']])
+        chunks = list(transform.read_chunks(reader, 2))
+        self.assertEqual(len(chunks), 2)
+
+        rows, _ = transform.transform(chunks[0])
+        self.assertEqual(rows, [(1, None, json.dumps({'env': 'prod', 'app': 'web'}))])
+        rows, _ = transform.transform(chunks[1])
+        self.assertEqual(rows, [(2, None, json.dumps({}))])
+        self.assertEqual(transform.transform([]), ([], []))
+
     def test_process_finalized_rows(self):
         """Test that a finalized bill is processed properly."""
         data = []
@@ -471,7 +688,7 @@ class AWSReportProcessorTest(MasuTestCase):
         """Test that the gzip file opener is returned."""
         opener, mode = self.processor._get_file_opener(GZIP_COMPRESSED)
 
-        self.assertEqual(opener, gzip.open)
+        self.assertEqual(opener, gzip_backend.open)
         self.assertEqual(mode, 'rt')
 
     def test_update_mappings(self):
@@ -547,6 +764,129 @@ class AWSReportProcessorTest(MasuTestCase):
             for key in data:
                 self.assertIn(key, expected_columns)
 
+    def test_report_file_scan(self):
+        """Test that a scan reads the first row once and still yields it."""
+        with open(self.test_report, 'r') as f:
+            dict_rows = list(csv.DictReader(f))
+        with open(self.test_report, 'r') as f:
+            scan = ReportFileScan(f)
+            self.assertEqual(scan.get_first('product/sku'), dict_rows[0]['product/sku'])
+            self.assertIsNone(scan.get_first('not/a/column'))
+            rows = list(scan.rows())
+            with self.assertRaises(MasuProcessingError):
+                list(scan.rows())
+
+        self.assertEqual(len(rows), len(dict_rows))
+        self.assertEqual(rows[0], list(dict_rows[0].values()))
+
+    def test_check_for_finalized_bill_from_scan(self):
+        """Test that the finalization check is taken from the processing scan."""
+        self.assertFalse(self.processor._is_finalized_data)
+        with self.processor._open_report_scan() as scan:
+            invoice_id = scan.get_first('bill/InvoiceId')
+        self.assertEqual(self.processor._is_finalized_data, bool(invoice_id))
+
+    def test_projection_plan_matches_dict_rows(self):
+        """Test that rows read as lists project like csv.DictReader rows."""
+        with open(self.test_report, 'r') as f:
+            dict_rows = list(csv.DictReader(f))
+        with self.processor._open_report_scan() as scan:
+            list_rows = list(self.processor._read_report_rows(scan, tag_prefix='resourceTags'))
+
+        self.assertEqual(len(list_rows), len(dict_rows))
+        for list_row, dict_row in zip(list_rows, dict_rows):
+            self.assertEqual(list_row.get('product/sku'), dict_row.get('product/sku'))
+            self.assertEqual(self.processor._process_tags(list_row),
+                             self.processor._process_tags(dict_row))
+            for table_name in self.report_tables:
+                self.assertEqual(self.processor._get_data_for_table(list_row, table_name),
+                                 self.processor._get_data_for_table(dict_row, table_name))
+
+    def test_projection_plan(self):
+        """Test that a plan is compiled once from the header."""
+        header = ['a', 'b', 'tags:env', 'a', 'tags']
+        column_map = {'table': {'a': 'col_a', 'b': 'col_b'}}
+        plan = ProjectionPlan(header, column_map, tag_prefix='tags')
+
+        self.assertEqual(plan.tables['table'], (['col_a', 'col_b'], [3, 1]))
+        self.assertEqual(plan.tag_columns, [(2, 'env')])
+
+        rows = list(plan.read_rows(iter([['1', '2', 'prod', '3'], []])))
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row.get('tags'), None)
+        self.assertEqual(row.get('missing', 'default'), 'default')
+        self.assertEqual(plan.project(row, 'table'), {'col_a': '3', 'col_b': '2'})
+        self.assertEqual(plan.project(row, 'table', [int, str]), {'col_a': 3, 'col_b': '2'})
+        self.assertEqual(plan.tags(row), {'env': 'prod'})
+
+    def test_lookup_cache(self):
+        """Test that missing keys are fetched in sets and the cache stays bounded."""
+        stored = {'a': 1, 'b': 2, 'c': 3}
+        calls = []
+
+        def loader(keys):
+            calls.append(sorted(keys))
+            return {key: stored[key] for key in keys if key in stored}
+
+        cache = LookupCache(loader, 2)
+        cache.prefetch(['a', 'b', 'z'])
+        self.assertEqual(calls, [['a', 'b', 'z']])
+        self.assertNotIn('z', cache)
+        self.assertEqual(calls, [['a', 'b', 'z']])
+
+        # Missing keys do not take the place of held ids
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache['a'], 1)
+        self.assertEqual(calls[-1], ['a'])
+
+        cache['z'] = 26
+        self.assertEqual(cache['z'], 26)
+        self.assertEqual(dict(cache), {'a': 1, 'z': 26})
+
+        # Without a loader only the held ids are found
+        cache.loader = None
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache['z'], 26)
+        cache.loader = loader
+        self.assertEqual(cache['b'], 2)
+
+    def test_dimension_preload_scoped_to_billing_period(self):
+        """Test that only the manifest's billing period is preloaded."""
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+            manifest_id=self.manifest.id
+        )
+        self.assertIsInstance(processor.existing_product_map, LookupCache)
+        self.assertEqual(len(processor.existing_cost_entry_map), 0)
+        # Missing keys are only fetched while the file is processed
+        self.assertIsNone(processor.existing_product_map.loader)
+        with patch.object(AWSReportProcessor, '_process_file',
+                          side_effect=lambda: self.assertIsNotNone(
+                              processor.existing_product_map.loader)) as mock_process:
+            processor.process()
+        mock_process.assert_called()
+        self.assertIsNone(processor.existing_product_map.loader)
+        processor.process()
+
+        processor = AWSReportProcessor(
+            schema_name=self.schema,
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=self.aws_provider.id,
+            manifest_id=self.manifest.id
+        )
+        bill_ids = processor._get_billing_period_bill_ids(self.accessor)
+        self.assertNotEqual(bill_ids, [])
+        table = getattr(self.report_schema, AWS_CUR_TABLE_MAP['cost_entry'])
+        with schema_context(self.schema):
+            count = table.objects.filter(bill_id__in=bill_ids).count()
+        self.assertEqual(len(processor.existing_cost_entry_map), count)
+
     def test_process_tags(self):
         """Test that tags are properly packaged in a JSON string."""
         row = {
@@ -567,6 +567,65 @@ class OCPReportChargeUpdaterTest(MasuTestCase):
             self.assertEqual(usage, usage_dictionary[key])
             self.assertEqual(round(float(calculated_charge), 1), entry.get('expected_charge'))
 
+    def test_tiered_charge_sql(self):
+        """Test that tiered rates compile to a SQL charge expression."""
+        rate_json = {'tiered_rates': [
+            {'usage': {'usage_start': None, 'usage_end': '10'}, 'value': '0.10', 'unit': 'USD'},
+            {'usage': {'usage_start': '10', 'usage_end': None}, 'value': '0.20', 'unit': 'USD'},
+        ]}
+        expected = ('LEAST(GREATEST(COALESCE(usage, 0), 0), 10::numeric) * 0.10::numeric + '
+                    'GREATEST((COALESCE(usage, 0) - 10::numeric), 0) * 0.20::numeric')
+        self.assertEqual(self.updater._tiered_charge_sql('usage', rate_json), expected)
+
+        single_rate = {'tiered_rates': [{'value': '1.5', 'unit': 'USD'}]}
+        self.assertEqual(self.updater._tiered_charge_sql('usage', single_rate),
+                         'COALESCE(usage, 0) * 1.5::numeric')
+        self.assertEqual(self.updater._tiered_charge_sql('usage', None), '0')
+
+    @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_cost_model_timestamp')
+    def test_get_charge_window(self, mock_cost_model_timestamp):
+        """Test that a changed cost model widens the charge window."""
+        window = ('2019-06-01', '2019-06-03')
+        mock_cost_model_timestamp.return_value = None
+        self.assertEqual(self.updater.get_charge_window(*window), window)
+
+        now = DateAccessor().today_with_timezone('UTC')
+        with schema_context(self.schema):
+            for period in self.accessor.report_periods_for_provider_id(self.updater._provider_id):
+                period.derived_cost_datetime = now
+                period.save()
+
+        mock_cost_model_timestamp.return_value = now - relativedelta(days=1)
+        self.assertEqual(self.updater.get_charge_window(*window), window)
+
+        mock_cost_model_timestamp.return_value = now + relativedelta(days=1)
+        self.assertEqual(self.updater.get_charge_window(*window), (None, None))
+
+    @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_cpu_core_usage_per_hour_rates')
+    @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_memory_gb_usage_per_hour_rates')
+    @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_cost_model_timestamp',
+           return_value=None)
+    def test_update_summary_charge_info_date_window(self, mock_timestamp, mock_db_mem_usage_rate,
+                                                    mock_db_cpu_usage_rate):
+        """Test that only summary rows in the date window are charged."""
+        mock_db_mem_usage_rate.return_value = None
+        mock_db_cpu_usage_rate.return_value = {'tiered_rates': [{'value': '200', 'unit': 'USD'}]}
+
+        usage_period = self.accessor.get_current_usage_period()
+        start_date = usage_period.report_period_start.date() + relativedelta(days=-1)
+        end_date = usage_period.report_period_end.date() + relativedelta(days=+1)
+
+        self.accessor.populate_line_item_daily_table(start_date, end_date, self.cluster_id)
+        self.accessor.populate_line_item_daily_summary_table(start_date, end_date, self.cluster_id)
+        window_date = end_date.strftime('%Y-%m-%d')
+        self.updater.update_summary_charge_info(start_date=window_date, end_date=window_date)
+
+        table_name = OCP_REPORT_TABLE_MAP['line_item_daily_summary']
+        with schema_context(self.schema):
+            items = self.accessor._get_db_obj_query(table_name).all()
+            for item in items:
+                self.assertIsNone(item.pod_charge_cpu_core_hours)
+
     @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_cpu_core_request_per_hour_rates')
     @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_cpu_core_usage_per_hour_rates')
     @patch('masu.database.ocp_rate_db_accessor.OCPRateDBAccessor.get_memory_gb_request_per_hour_rates')
@@ -38,11 +38,13 @@ from masu.exceptions import MasuProcessingError
 from masu.external import GZIP_COMPRESSED, UNCOMPRESSED
 from masu.external.date_accessor import DateAccessor
 from masu.processor.ocp.ocp_report_processor import (
+    LineItemKeys,
     OCPReportProcessor,
     OCPReportProcessorError,
     OCPReportTypes,
     ProcessedOCPReport,
 )
+from masu.processor.report_processor_base import ReportProcessorBase, gzip_backend
 from masu.test import MasuTestCase
 from unittest.mock import patch
 from masu.util.ocp.common import month_date_range
@@ -67,6 +69,18 @@ class ProcessedOCPReportTest(MasuTestCase):
         self.assertEqual(self.report.line_items, [])
         self.assertEqual(self.report.reports, {})
 
+    def test_line_item_keys(self):
+        """Test that line item keys are deduplicated per report interval."""
+        keys = LineItemKeys()
+        self.assertTrue(keys.add(1, (1, 'namespace', 'pod', 'node')))
+        self.assertFalse(keys.add(1, (1, 'namespace', 'pod', 'node')))
+        self.assertTrue(keys.add(2, (2, 'namespace', 'pod', 'node')))
+
+        # A saved batch keeps only the interval still being read
+        keys.trim()
+        self.assertFalse(keys.add(2, (2, 'namespace', 'pod', 'node')))
+        self.assertTrue(keys.add(1, (1, 'namespace', 'pod', 'node')))
+
 
 class OCPReportProcessorTest(MasuTestCase):
     """Test Cases for the OCPReportProcessor object."""
@@ -180,6 +194,22 @@ class OCPReportProcessorTest(MasuTestCase):
                 provider_id=1,
             )
 
+    def test_detect_report_type_gzip(self):
+        """Test that the report type of a compressed report is detected."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            gzip_report = os.path.join(tmp_dir, 'storage.csv.gz')
+            with open(self.storage_report, 'rb') as report_file:
+                with gzip.open(gzip_report, 'wb') as gzip_file:
+                    shutil.copyfileobj(report_file, gzip_file)
+
+            processor = OCPReportProcessor(
+                schema_name='acct10001',
+                report_path=gzip_report,
+                compression=GZIP_COMPRESSED,
+                provider_id=1,
+            )
+        self.assertEqual(processor.report_type, OCPReportTypes.STORAGE)
+
     def test_process_default(self):
         """Test the processing of an uncompressed file."""
         counts = {}
@@ -208,6 +238,25 @@ class OCPReportProcessorTest(MasuTestCase):
             ):
                 self.assertTrue(count >= counts[table_name])
 
+    def test_process_opens_file_once(self):
+        """Test that the report file is only held open while it is processed."""
+        processor = OCPReportProcessor(
+            schema_name='acct10001',
+            report_path=self.test_report,
+            compression=UNCOMPRESSED,
+            provider_id=1,
+        )
+        line_item_table = getattr(self.accessor.report_schema, OCP_REPORT_TABLE_MAP['line_item'])
+
+        open_report_scan = ReportProcessorBase._open_report_scan
+        with patch.object(ReportProcessorBase, '_open_report_scan', autospec=True,
+                          side_effect=open_report_scan) as mock_open:
+            processor.process()
+            mock_open.assert_called_once()
+
+        with schema_context(self.schema):
+            self.assertNotEqual(line_item_table.objects.count(), 0)
+
     def test_process_default_small_batches(self):
         """Test the processing of an uncompressed file in small batches."""
         with patch.object(Config, 'REPORT_PROCESSING_BATCH_SIZE', 5):
@@ -237,6 +286,35 @@ class OCPReportProcessorTest(MasuTestCase):
                 ):
                     self.assertTrue(count >= counts[table_name])
 
+    def test_process_staged_merge(self):
+        """Test that a staged file merges the same rows as batched merges."""
+        line_item_table = OCP_REPORT_TABLE_MAP['line_item']
+        table = getattr(self.accessor.report_schema, line_item_table)
+        with patch.object(Config, 'REPORT_PROCESSING_BATCH_SIZE', 5):
+            processor = OCPReportProcessor(
+                schema_name='acct10001',
+                report_path=self.test_report,
+                compression=UNCOMPRESSED,
+                provider_id=1,
+            )
+            processor.process()
+        with schema_context(self.schema):
+            expected = table.objects.count()
+            table.objects.all().delete()
+
+        with patch.object(Config, 'OCP_PROCESSING_STAGED_MERGE', True):
+            with patch.object(Config, 'REPORT_PROCESSING_BATCH_SIZE', 5):
+                processor = OCPReportProcessor(
+                    schema_name='acct10001',
+                    report_path=self.test_report,
+                    compression=UNCOMPRESSED,
+                    provider_id=1,
+                )
+                processor.process()
+        with schema_context(self.schema):
+            self.assertEqual(table.objects.count(), expected)
+        self.assertNotEqual(expected, 0)
+
     def test_process_duplicates(self):
         """Test that row duplicates are not inserted into the DB."""
         counts = {}
@@ -320,7 +398,7 @@ class OCPReportProcessorTest(MasuTestCase):
         """Test that the gzip file opener is returned."""
         opener, mode = self.ocp_processor._processor._get_file_opener(GZIP_COMPRESSED)
 
-        self.assertEqual(opener, gzip.open)
+        self.assertEqual(opener, gzip_backend.open)
         self.assertEqual(mode, 'rt')
 
     def test_update_mappings(self):
@@ -42,6 +42,17 @@ class ReportChargeUpdaterTest(MasuTestCase):
         updater.update_charge_info()
         mock_update.assert_called()
 
+    @patch(
+        'masu.processor.report_charge_updater.OCPReportChargeUpdater.update_summary_charge_info'
+    )
+    def test_force_full(self, mock_update):
+        """Test that a forced update ignores the date window."""
+        updater = ReportChargeUpdater(self.schema, self.ocp_test_provider_uuid)
+        updater.update_charge_info('2019-06-01', '2019-06-03', force_full=True)
+        mock_update.assert_called_with(None, None)
+        self.assertEqual(updater.get_charge_window('2019-06-01', '2019-06-03', force_full=True),
+                         (None, None))
+
     @patch(
         'masu.processor.report_charge_updater.AzureReportChargeUpdater.update_summary_charge_info'
     )
@@ -25,7 +25,9 @@ from datetime import date, datetime, timedelta
 from unittest.mock import call, patch, Mock, ANY
 
 import faker
+from celery.exceptions import Retry
 from dateutil import relativedelta
+from django.core.cache import cache
 from django.db.models import Max, Min
 from tenant_schemas.utils import schema_context
 
@@ -35,21 +37,25 @@ from masu.database.aws_report_db_accessor import AWSReportDBAccessor
 from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
 from masu.database.provider_db_accessor import ProviderDBAccessor
 from masu.database.provider_status_accessor import ProviderStatusCode
+from masu.database.report_db_accessor_base import VACUUM_CACHE_KEY
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
 from masu.external.date_accessor import DateAccessor
 from masu.external.report_downloader import ReportDownloader, ReportDownloaderError
 from masu.processor.expired_data_remover import ExpiredDataRemover
 from masu.processor.report_processor import ReportProcessorError
 from masu.processor._tasks.download import _get_report_files
-from masu.processor._tasks.process import _process_report_file
+from masu.processor._tasks.process import _count_processed_file, _process_report_file
 from masu.processor.tasks import (
     get_report_files,
+    process_cluster_reports,
+    process_report_file,
     summarize_reports,
     remove_expired_data,
     update_charge_info,
     update_all_summary_tables,
     update_summary_tables,
     update_cost_summary_table,
+    vacuum_schema_table,
 )
 from masu.test import MasuTestCase
 from masu.test.database.helpers import ReportObjectCreator
@@ -277,15 +283,32 @@ class ProcessReportFileTests(MasuTestCase):
         mock_proc = mock_processor()
         mock_stats_acc = mock_stats_accessor().__enter__()
         mock_manifest_acc = mock_manifest_accessor().__enter__()
+        manifest = mock_manifest_acc.increment_num_processed_files.return_value
+        manifest.num_processed_files = 2
+        manifest.num_total_files = 2
 
-        _process_report_file(schema_name, provider, provider_uuid, report_dict)
+        manifest_complete = _process_report_file(schema_name, provider, provider_uuid,
+                                                 report_dict)
 
+        self.assertTrue(manifest_complete)
         mock_proc.process.assert_called()
         mock_stats_acc.log_last_started_datetime.assert_called()
         mock_stats_acc.log_last_completed_datetime.assert_called()
         mock_manifest_acc.mark_manifest_as_updated.assert_called()
         shutil.rmtree(report_dir)
 
+    @patch('masu.processor._tasks.process.ReportManifestDBAccessor')
+    def test_count_processed_file(self, mock_manifest_accessor):
+        """Test that a manifest counted past its total files is complete."""
+        mock_manifest_acc = mock_manifest_accessor().__enter__()
+        manifest = mock_manifest_acc.increment_num_processed_files.return_value
+        manifest.num_total_files = 2
+
+        manifest.num_processed_files = 1
+        self.assertFalse(_count_processed_file(1, 'file1.csv'))
+        manifest.num_processed_files = 3
+        self.assertTrue(_count_processed_file(1, 'file1.csv'))
+
     @patch('masu.processor._tasks.process.ReportProcessor')
     @patch('masu.processor._tasks.process.ReportStatsDBAccessor')
     def test_process_file_exception(self, mock_stats_accessor, mock_processor):
@@ -546,6 +569,110 @@ class TestProcessorTasks(MasuTestCase):
         reports = get_report_files(**self.fake_get_report_args)
         self.assertIsNotNone(reports)
 
+    @patch('masu.processor.tasks.group')
+    @patch('masu.processor.tasks.ReportStatsDBAccessor')
+    @patch('masu.processor.tasks._get_report_files')
+    @patch('masu.processor.tasks._process_report_file')
+    def test_get_report_files_parallel_files(
+        self, mock_process_file, mock_get_files, mock_stats_accessor, mock_group
+    ):
+        """Test that all but the first file of a manifest are fanned out."""
+        reports = [
+            {'file': self.fake.word(), 'compression': 'GZIP', 'manifest_id': 1},
+            {'file': self.fake.word(), 'compression': 'GZIP', 'manifest_id': 1},
+            {'file': self.fake.word(), 'compression': 'GZIP', 'manifest_id': 1},
+            {'file': self.fake.word(), 'compression': 'GZIP', 'manifest_id': 2},
+        ]
+        mock_get_files.return_value = reports
+        mock_stats = mock_stats_accessor.return_value.__enter__.return_value
+        mock_stats.get_last_started_datetime.return_value = None
+        mock_stats.get_last_completed_datetime.return_value = None
+
+        with patch.object(Config, 'REPORT_PROCESSING_PARALLEL_FILES', True):
+            reports_to_summarize = get_report_files(**self.fake_get_report_args)
+
+        self.assertEqual(mock_process_file.call_count, 2)
+        fanned_out = mock_group.call_args[0][0]
+        self.assertEqual([task.args[3] for task in fanned_out], reports[1:3])
+        mock_group.return_value.apply_async.assert_called()
+        self.assertEqual([report.get('manifest_id') for report in reports_to_summarize], [2])
+
+    @patch('masu.processor.tasks.summarize_reports')
+    @patch('masu.processor.tasks._process_report_file')
+    def test_process_report_file_summarizes_complete_manifest(
+        self, mock_process_file, mock_summarize
+    ):
+        """Test that the last file of a manifest triggers summarization."""
+        report_dict = {'file': self.fake.word(), 'compression': 'GZIP', 'manifest_id': 1}
+        args = (self.schema, 'AWS', self.aws_test_provider_uuid, report_dict)
+
+        mock_process_file.return_value = False
+        process_report_file(*args)
+        mock_summarize.delay.assert_not_called()
+
+        mock_process_file.return_value = True
+        process_report_file(*args)
+        mock_summarize.delay.assert_called_once()
+        report_meta = mock_summarize.delay.call_args[0][0][0]
+        self.assertEqual(report_meta.get('manifest_id'), 1)
+
+        mock_summarize.reset_mock()
+        mock_process_file.side_effect = ReportProcessorError('mock error')
+        with patch('masu.processor.tasks._count_processed_file',
+                   return_value=False) as mock_count:
+            process_report_file(*args)
+            mock_count.assert_called_with(1, report_dict['file'])
+            mock_summarize.delay.assert_not_called()
+
+            # The failed file was the last one of the manifest
+            mock_count.return_value = True
+            process_report_file(*args)
+            mock_summarize.delay.assert_called_once()
+
+
+    @patch('masu.processor.tasks.summarize_reports')
+    @patch('masu.processor.tasks.get_report_files')
+    def test_process_cluster_reports(self, mock_get_files, mock_summarize):
+        """Test that a cluster's reports are processed and summarized."""
+        mock_get_files.return_value = [{'manifest_id': 1}]
+
+        process_cluster_reports(self.ocp_provider_resource_name)
+
+        account = mock_get_files.call_args[1]
+        self.assertEqual(account.get('provider_uuid'), self.ocp_test_provider_uuid)
+        mock_summarize.delay.assert_called_with([{'manifest_id': 1}])
+        lock_key = f'ocp-cluster-processing-{self.ocp_provider_resource_name}'
+        self.assertIsNone(cache.get(lock_key))
+
+    @patch('masu.processor.tasks.summarize_reports')
+    @patch('masu.processor.tasks.get_report_files')
+    def test_process_cluster_reports_locked(self, mock_get_files, mock_summarize):
+        """Test that a locked cluster's processing is retried."""
+        lock_key = f'ocp-cluster-processing-{self.ocp_provider_resource_name}'
+        cache.add(lock_key, 'other-task')
+        try:
+            with patch.object(process_cluster_reports, 'retry', side_effect=Retry) as mock_retry:
+                with self.assertRaises(Retry):
+                    process_cluster_reports(self.ocp_provider_resource_name)
+        finally:
+            cache.delete(lock_key)
+
+        mock_retry.assert_called_with(countdown=Config.OCP_CLUSTER_LOCK_RETRY_DELAY)
+        mock_get_files.assert_not_called()
+        mock_summarize.delay.assert_not_called()
+
+    @patch('masu.processor.tasks.ReportDBAccessorBase.vacuum_table')
+    def test_vacuum_schema_table(self, mock_vacuum):
+        """Test that a queued vacuum runs and releases the table."""
+        table_name = AWS_CUR_TABLE_MAP['line_item_daily_summary']
+        cache_key = VACUUM_CACHE_KEY.format(schema=self.schema, table=table_name)
+        cache.add(cache_key, True)
+
+        vacuum_schema_table(self.schema, table_name)
+
+        mock_vacuum.assert_called_with(table_name)
+        self.assertIsNone(cache.get(cache_key))
+
 
 class TestRemoveExpiredDataTasks(MasuTestCase):
     """Test cases for Processor Celery tasks."""
@@ -875,8 +1002,9 @@ class TestUpdateSummaryTablesTask(MasuTestCase):
 
         mock_update.delay.assert_called_with(ANY, ANY, ANY, str(start_date), ANY)
 
+    @patch('masu.processor.tasks.bump_data_generation')
     @patch('masu.database.ocp_report_db_accessor.OCPReportDBAccessor.populate_cost_summary_table')
-    def test_update_cost_summary_table(self, mock_update):
+    def test_update_cost_summary_table(self, mock_update, mock_bump):
         """Tests that the updater updates the cost summary table."""
         provider = 'OCP'
         provider_aws_uuid = self.ocp_test_provider_uuid
@@ -887,4 +1015,5 @@ class TestUpdateSummaryTablesTask(MasuTestCase):
 
         update_cost_summary_table(self.schema, provider_aws_uuid, None)
 
-        mock_update.assert_called()
\ No newline at end of file
+        mock_update.assert_called()
+        mock_bump.assert_called_with(self.schema)
\ No newline at end of file
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.4 on 2019-09-10 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0063_auto_20190826_1750'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCPAWSMatchIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usage_start', models.DateField()),
+                ('cost_entry_bill_id', models.IntegerField()),
+                ('cluster_id', models.CharField(max_length=50)),
+                ('aws_key', models.CharField(max_length=32)),
+                ('ocp_key', models.CharField(max_length=32)),
+                ('data_source', models.CharField(max_length=64)),
+                ('match_type', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'db_table': 'reporting_ocpawsmatchindex',
+            },
+        ),
+        migrations.CreateModel(
+            name='OCPAWSMatchState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usage_start', models.DateField()),
+                ('cost_entry_bill_id', models.IntegerField()),
+                ('cluster_id', models.CharField(max_length=50)),
+                ('fingerprint', models.CharField(max_length=256)),
+            ],
+            options={
+                'db_table': 'reporting_ocpawsmatchstate',
+                'unique_together': {('usage_start', 'cost_entry_bill_id', 'cluster_id')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ocpawsmatchindex',
+            index=models.Index(fields=['usage_start', 'cluster_id'], name='ocp_aws_match_usage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpawsmatchindex',
+            index=models.Index(fields=['aws_key'], name='ocp_aws_match_aws_key_idx'),
+        ),
+    ]
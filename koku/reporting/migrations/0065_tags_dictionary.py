@@ -0,0 +1,101 @@
+# Generated by Django 2.2.4 on 2019-09-16 13:41
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0064_ocpawsmatchindex_ocpawsmatchstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AWSTagsDictionary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usage_month', models.DateField()),
+                ('key', models.CharField(max_length=253)),
+                ('values', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=253), size=None)),
+                ('cost_entry_bill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reporting.AWSCostEntryBill')),
+            ],
+            options={
+                'db_table': 'reporting_awstags_dictionary',
+                'unique_together': {('cost_entry_bill', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OCPLabelsDictionary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usage_month', models.DateField()),
+                ('data_source', models.CharField(max_length=16)),
+                ('key', models.CharField(max_length=253)),
+                ('values', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=253), size=None)),
+                ('report_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reporting.OCPUsageReportPeriod')),
+            ],
+            options={
+                'db_table': 'reporting_ocplabels_dictionary',
+                'unique_together': {('report_period', 'data_source', 'key')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='awstagsdictionary',
+            index=models.Index(fields=['usage_month'], name='aws_tags_dict_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocplabelsdictionary',
+            index=models.Index(fields=['usage_month'], name='ocp_labels_dict_month_idx'),
+        ),
+        # Fill the dictionaries from the daily line items already summarized
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_awstags_dictionary (cost_entry_bill_id, usage_month, key, values)
+            SELECT l.cost_entry_bill_id,
+                date(b.billing_period_start),
+                l.key,
+                array_agg(DISTINCT l.value)
+            FROM (
+                SELECT li.cost_entry_bill_id, key, value
+                FROM reporting_awscostentrylineitem_daily AS li,
+                    jsonb_each_text(li.tags) labels
+            ) l
+            JOIN reporting_awscostentrybill AS b
+                ON b.id = l.cost_entry_bill_id
+            GROUP BY l.cost_entry_bill_id, b.billing_period_start, l.key
+            ;
+
+            INSERT INTO reporting_ocplabels_dictionary (report_period_id, usage_month, data_source, key, values)
+            SELECT rp.id,
+                date(rp.report_period_start),
+                l.data_source,
+                l.key,
+                array_agg(DISTINCT l.value)
+            FROM (
+                SELECT li.cluster_id, li.usage_start, 'pod' as data_source, key, value
+                FROM reporting_ocpusagelineitem_daily AS li,
+                    jsonb_each_text(li.pod_labels) labels
+
+                UNION ALL
+
+                SELECT li.cluster_id, li.usage_start, 'volume' as data_source, key, value
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolume_labels) labels
+
+                UNION ALL
+
+                SELECT li.cluster_id, li.usage_start, 'volume_claim' as data_source, key, value
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolumeclaim_labels) labels
+            ) l
+            JOIN reporting_ocpusagereportperiod AS rp
+                ON rp.cluster_id = l.cluster_id
+                    AND date_trunc('month', rp.report_period_start) = date_trunc('month', l.usage_start)
+            GROUP BY rp.id, rp.report_period_start, l.data_source, l.key
+            ;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.4 on 2019-09-18 10:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0065_tags_dictionary'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION reporting_usage_month_insert()
+            RETURNS trigger AS $$
+            DECLARE
+                partition text := TG_TABLE_NAME || '_' ||
+                    to_char(NEW.usage_start AT TIME ZONE 'UTC', 'YYYY_MM');
+            BEGIN
+                -- Routed rows are not returned to the insert, so only the
+                -- inserts of summarization, which turn routing on, are routed.
+                -- Other inserts, like the INSERT ... RETURNING of the ORM, keep
+                -- their rows in the parent.
+                IF current_setting('koku.usage_month_routing', true) IS DISTINCT FROM 'on'
+                        OR to_regclass(quote_ident(TG_TABLE_SCHEMA) || '.' || quote_ident(partition)) IS NULL THEN
+                    RETURN NEW;
+                END IF;
+                EXECUTE format('INSERT INTO %I.%I SELECT ($1).*', TG_TABLE_SCHEMA, partition)
+                    USING NEW;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            reverse_sql='DROP FUNCTION IF EXISTS reporting_usage_month_insert() CASCADE;',
+        ),
+    ]
@@ -0,0 +1,217 @@
+# Generated by Django 2.2.4 on 2019-09-20 09:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0066_usage_month_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AWSCostSummaryByAccount',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField(null=True)),
+                ('usage_account_id', models.CharField(max_length=50)),
+                ('currency_code', models.CharField(max_length=10)),
+                ('unblended_cost', models.DecimalField(decimal_places=9, max_digits=24, null=True)),
+                ('account_alias', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSAccountAlias')),
+                ('cost_entry_bill', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSCostEntryBill')),
+            ],
+            options={
+                'db_table': 'reporting_aws_cost_summary_by_account',
+            },
+        ),
+        migrations.CreateModel(
+            name='AWSCostSummaryByService',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField(null=True)),
+                ('usage_account_id', models.CharField(max_length=50)),
+                ('product_code', models.CharField(max_length=50)),
+                ('product_family', models.CharField(max_length=150, null=True)),
+                ('currency_code', models.CharField(max_length=10)),
+                ('unblended_cost', models.DecimalField(decimal_places=9, max_digits=24, null=True)),
+                ('account_alias', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSAccountAlias')),
+                ('cost_entry_bill', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSCostEntryBill')),
+            ],
+            options={
+                'db_table': 'reporting_aws_cost_summary_by_service',
+            },
+        ),
+        migrations.CreateModel(
+            name='AWSCostSummaryByRegion',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField(null=True)),
+                ('usage_account_id', models.CharField(max_length=50)),
+                ('region', models.CharField(max_length=50, null=True)),
+                ('availability_zone', models.CharField(max_length=50, null=True)),
+                ('currency_code', models.CharField(max_length=10)),
+                ('unblended_cost', models.DecimalField(decimal_places=9, max_digits=24, null=True)),
+                ('account_alias', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSAccountAlias')),
+                ('cost_entry_bill', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSCostEntryBill')),
+            ],
+            options={
+                'db_table': 'reporting_aws_cost_summary_by_region',
+            },
+        ),
+        migrations.CreateModel(
+            name='CostSummaryByCluster',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_id', models.CharField(max_length=50, null=True)),
+                ('cluster_alias', models.CharField(max_length=256, null=True)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('pod_charge_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_charge_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('persistentvolumeclaim_charge_gb_month', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('project_infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+            ],
+            options={
+                'db_table': 'reporting_ocpcosts_summary_by_cluster',
+            },
+        ),
+        migrations.CreateModel(
+            name='CostSummaryByNode',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_id', models.CharField(max_length=50, null=True)),
+                ('cluster_alias', models.CharField(max_length=256, null=True)),
+                ('node', models.CharField(max_length=253, null=True)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('pod_charge_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_charge_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('persistentvolumeclaim_charge_gb_month', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('project_infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+            ],
+            options={
+                'db_table': 'reporting_ocpcosts_summary_by_node',
+            },
+        ),
+        migrations.CreateModel(
+            name='CostSummaryByProject',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_id', models.CharField(max_length=50, null=True)),
+                ('cluster_alias', models.CharField(max_length=256, null=True)),
+                ('namespace', models.CharField(max_length=253)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('pod_charge_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_charge_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('persistentvolumeclaim_charge_gb_month', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('project_infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+            ],
+            options={
+                'db_table': 'reporting_ocpcosts_summary_by_project',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='awscostsummarybyaccount',
+            index=models.Index(fields=['usage_start'], name='aws_summ_acct_usage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='awscostsummarybyservice',
+            index=models.Index(fields=['usage_start'], name='aws_summ_svc_usage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='awscostsummarybyregion',
+            index=models.Index(fields=['usage_start'], name='aws_summ_reg_usage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costsummarybycluster',
+            index=models.Index(fields=['usage_start'], name='ocpcosts_clust_usage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costsummarybynode',
+            index=models.Index(fields=['usage_start'], name='ocpcosts_node_usage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costsummarybyproject',
+            index=models.Index(fields=['usage_start'], name='ocpcosts_proj_usage_start_idx'),
+        ),
+        # Fill the rollups from the summaries already populated
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_aws_cost_summary_by_account (cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, currency_code, unblended_cost)
+            SELECT cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, currency_code, sum(unblended_cost)
+            FROM reporting_awscostentrylineitem_daily_summary
+            GROUP BY cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, currency_code
+            ;
+
+            INSERT INTO reporting_aws_cost_summary_by_service (cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, product_code, product_family, currency_code, unblended_cost)
+            SELECT cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, product_code, product_family, currency_code, sum(unblended_cost)
+            FROM reporting_awscostentrylineitem_daily_summary
+            GROUP BY cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, product_code, product_family, currency_code
+            ;
+
+            INSERT INTO reporting_aws_cost_summary_by_region (cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, region, availability_zone, currency_code, unblended_cost)
+            SELECT cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, region, availability_zone, currency_code, sum(unblended_cost)
+            FROM reporting_awscostentrylineitem_daily_summary
+            GROUP BY cost_entry_bill_id, usage_start, usage_end, usage_account_id,
+                account_alias_id, region, availability_zone, currency_code
+            ;
+
+            INSERT INTO reporting_ocpcosts_summary_by_cluster (cluster_id, cluster_alias, usage_start, usage_end,
+                pod_charge_cpu_core_hours, pod_charge_memory_gigabyte_hours,
+                persistentvolumeclaim_charge_gb_month, infra_cost, project_infra_cost)
+            SELECT cluster_id, cluster_alias, usage_start, usage_end,
+                sum(pod_charge_cpu_core_hours),
+                sum(pod_charge_memory_gigabyte_hours),
+                sum(persistentvolumeclaim_charge_gb_month),
+                sum(infra_cost),
+                sum(project_infra_cost)
+            FROM reporting_ocpcosts_summary
+            GROUP BY cluster_id, cluster_alias, usage_start, usage_end
+            ;
+
+            INSERT INTO reporting_ocpcosts_summary_by_project (cluster_id, cluster_alias, namespace, usage_start, usage_end,
+                pod_charge_cpu_core_hours, pod_charge_memory_gigabyte_hours,
+                persistentvolumeclaim_charge_gb_month, infra_cost, project_infra_cost)
+            SELECT cluster_id, cluster_alias, namespace, usage_start, usage_end,
+                sum(pod_charge_cpu_core_hours),
+                sum(pod_charge_memory_gigabyte_hours),
+                sum(persistentvolumeclaim_charge_gb_month),
+                sum(infra_cost),
+                sum(project_infra_cost)
+            FROM reporting_ocpcosts_summary
+            GROUP BY cluster_id, cluster_alias, namespace, usage_start, usage_end
+            ;
+
+            INSERT INTO reporting_ocpcosts_summary_by_node (cluster_id, cluster_alias, node, usage_start, usage_end,
+                pod_charge_cpu_core_hours, pod_charge_memory_gigabyte_hours,
+                persistentvolumeclaim_charge_gb_month, infra_cost, project_infra_cost)
+            SELECT cluster_id, cluster_alias, node, usage_start, usage_end,
+                sum(pod_charge_cpu_core_hours),
+                sum(pod_charge_memory_gigabyte_hours),
+                sum(persistentvolumeclaim_charge_gb_month),
+                sum(infra_cost),
+                sum(project_infra_cost)
+            FROM reporting_ocpcosts_summary
+            GROUP BY cluster_id, cluster_alias, node, usage_start, usage_end
+            ;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -26,15 +26,23 @@ from reporting.provider.aws.models import (AWSAccountAlias,
                                            AWSCostEntryLineItemDailySummary,      # noqa: F401
                                            AWSCostEntryPricing,                   # noqa: F401
                                            AWSCostEntryProduct,                   # noqa: F401
-                                           AWSCostEntryReservation)               # noqa: F401
+                                           AWSCostEntryReservation,               # noqa: F401
+                                           AWSCostSummaryByAccount,               # noqa: F401
+                                           AWSCostSummaryByRegion,                # noqa: F401
+                                           AWSCostSummaryByService,               # noqa: F401
+                                           AWSTagsDictionary)                     # noqa: F401
 from reporting.provider.azure.models import (AzureCostEntryBill,                  # noqa: F401
                                              AzureCostEntryLineItemDaily,         # noqa: F401
                                              AzureCostEntryLineItemDailySummary,  # noqa: F401
                                              AzureCostEntryProduct,               # noqa: F401
                                              AzureMeter,                          # noqa: F401
                                              AzureService)                        # noqa: F401
-from reporting.provider.ocp.costs.models import CostSummary                       # noqa: F401
-from reporting.provider.ocp.models import (OCPStorageLineItem,                    # noqa: F401
+from reporting.provider.ocp.costs.models import (CostSummary,                     # noqa: F401
+                                                 CostSummaryByCluster,            # noqa: F401
+                                                 CostSummaryByNode,               # noqa: F401
+                                                 CostSummaryByProject)            # noqa: F401
+from reporting.provider.ocp.models import (OCPLabelsDictionary,                   # noqa: F401
+                                           OCPStorageLineItem,                    # noqa: F401
                                            OCPStorageLineItemDaily,               # noqa: F401
                                            OCPStorageLineItemDailySummary,        # noqa: F401
                                            OCPUsageLineItem,                      # noqa: F401
@@ -44,4 +52,6 @@ from reporting.provider.ocp.models import (OCPStorageLineItem,
                                            OCPUsageReport,                        # noqa: F401
                                            OCPUsageReportPeriod)                  # noqa: F401
 from reporting.provider.ocp_aws.models import (OCPAWSCostLineItemDailySummary,    # noqa: F401
-                                               OCPAWSCostLineItemProjectDailySummary)  # noqa: F401
+                                               OCPAWSCostLineItemProjectDailySummary,  # noqa: F401
+                                               OCPAWSMatchIndex,                  # noqa: F401
+                                               OCPAWSMatchState)                  # noqa: F401
@@ -387,3 +387,131 @@ class AWSTagsSummary(models.Model):
 
     key = models.CharField(primary_key=True, max_length=253)
     values = ArrayField(models.CharField(max_length=253))
+
+
+class AWSTagsDictionary(models.Model):
+    """The tag keys and values of each bill.
+
+    Kept up to date for the summarized window only, the tags summary
+    and tag key lookups are built from it instead of the line items.
+    """
+
+    class Meta:
+        """Meta for AWSTagsDictionary."""
+
+        db_table = 'reporting_awstags_dictionary'
+        unique_together = ('cost_entry_bill', 'key')
+
+        indexes = [
+            models.Index(
+                fields=['usage_month'],
+                name='aws_tags_dict_month_idx',
+            ),
+        ]
+
+    cost_entry_bill = models.ForeignKey('AWSCostEntryBill',
+                                        on_delete=models.CASCADE)
+    usage_month = models.DateField(null=False)
+    key = models.CharField(max_length=253)
+    values = ArrayField(models.CharField(max_length=253))
+
+
+class AWSCostSummaryByAccount(models.Model):
+    """A rollup of the daily summary costs by account.
+
+    Refreshed from the daily summary after it is summarized, so cost
+    reports by account read it instead of the daily summary.
+    """
+
+    class Meta:
+        """Meta for AWSCostSummaryByAccount."""
+
+        db_table = 'reporting_aws_cost_summary_by_account'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='aws_summ_acct_usage_start_idx',
+            ),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    cost_entry_bill = models.ForeignKey('AWSCostEntryBill',
+                                        on_delete=models.PROTECT,
+                                        null=True)
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=True)
+    usage_account_id = models.CharField(max_length=50, null=False)
+    account_alias = models.ForeignKey('AWSAccountAlias',
+                                      on_delete=models.PROTECT,
+                                      null=True)
+    currency_code = models.CharField(max_length=10)
+    unblended_cost = models.DecimalField(max_digits=24, decimal_places=9,
+                                         null=True)
+
+
+class AWSCostSummaryByService(models.Model):
+    """A rollup of the daily summary costs by account and service."""
+
+    class Meta:
+        """Meta for AWSCostSummaryByService."""
+
+        db_table = 'reporting_aws_cost_summary_by_service'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='aws_summ_svc_usage_start_idx',
+            ),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    cost_entry_bill = models.ForeignKey('AWSCostEntryBill',
+                                        on_delete=models.PROTECT,
+                                        null=True)
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=True)
+    usage_account_id = models.CharField(max_length=50, null=False)
+    account_alias = models.ForeignKey('AWSAccountAlias',
+                                      on_delete=models.PROTECT,
+                                      null=True)
+    product_code = models.CharField(max_length=50, null=False)
+    product_family = models.CharField(max_length=150, null=True)
+    currency_code = models.CharField(max_length=10)
+    unblended_cost = models.DecimalField(max_digits=24, decimal_places=9,
+                                         null=True)
+
+
+class AWSCostSummaryByRegion(models.Model):
+    """A rollup of the daily summary costs by account and region."""
+
+    class Meta:
+        """Meta for AWSCostSummaryByRegion."""
+
+        db_table = 'reporting_aws_cost_summary_by_region'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='aws_summ_reg_usage_start_idx',
+            ),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    cost_entry_bill = models.ForeignKey('AWSCostEntryBill',
+                                        on_delete=models.PROTECT,
+                                        null=True)
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=True)
+    usage_account_id = models.CharField(max_length=50, null=False)
+    account_alias = models.ForeignKey('AWSAccountAlias',
+                                      on_delete=models.PROTECT,
+                                      null=True)
+    region = models.CharField(max_length=50, null=True)
+    availability_zone = models.CharField(max_length=50, null=True)
+    currency_code = models.CharField(max_length=10)
+    unblended_cost = models.DecimalField(max_digits=24, decimal_places=9,
+                                         null=True)
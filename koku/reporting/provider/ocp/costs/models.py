@@ -76,3 +76,170 @@ class CostSummary(models.Model):
     )
 
     pod_labels = JSONField(null=True)
+
+
+class CostSummaryByCluster(models.Model):
+    """A rollup of the OCP cost summary by cluster.
+
+    Refreshed from the cost summary after it is populated, so cost
+    reports by cluster read it instead of the pod level summary.
+    """
+
+    class Meta:
+        """Meta for CostSummaryByCluster."""
+
+        db_table = 'reporting_ocpcosts_summary_by_cluster'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='ocpcosts_clust_usage_start_idx',
+            ),
+        ]
+
+    cluster_id = models.CharField(max_length=50, null=True)
+
+    cluster_alias = models.CharField(max_length=256, null=True)
+
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+
+    pod_charge_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_charge_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    persistentvolumeclaim_charge_gb_month = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    project_infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+
+class CostSummaryByProject(models.Model):
+    """A rollup of the OCP cost summary by cluster and project."""
+
+    class Meta:
+        """Meta for CostSummaryByProject."""
+
+        db_table = 'reporting_ocpcosts_summary_by_project'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='ocpcosts_proj_usage_start_idx',
+            ),
+        ]
+
+    cluster_id = models.CharField(max_length=50, null=True)
+
+    cluster_alias = models.CharField(max_length=256, null=True)
+
+    namespace = models.CharField(max_length=253, null=False)
+
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+
+    pod_charge_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_charge_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    persistentvolumeclaim_charge_gb_month = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    project_infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+
+class CostSummaryByNode(models.Model):
+    """A rollup of the OCP cost summary by cluster and node."""
+
+    class Meta:
+        """Meta for CostSummaryByNode."""
+
+        db_table = 'reporting_ocpcosts_summary_by_node'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='ocpcosts_node_usage_start_idx',
+            ),
+        ]
+
+    cluster_id = models.CharField(max_length=50, null=True)
+
+    cluster_alias = models.CharField(max_length=256, null=True)
+
+    node = models.CharField(max_length=253, null=True)
+
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+
+    pod_charge_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_charge_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    persistentvolumeclaim_charge_gb_month = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    project_infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
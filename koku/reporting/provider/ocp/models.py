@@ -690,3 +690,32 @@ class OCPStorageVolumeClaimLabelSummary(models.Model):
 
     key = models.CharField(primary_key=True, max_length=253)
     values = ArrayField(models.CharField(max_length=253))
+
+
+class OCPLabelsDictionary(models.Model):
+    """The pod, volume and volume claim label keys and values of each report period.
+
+    Kept up to date for the summarized window only, the label summaries
+    and tag key lookups are built from it instead of the line items.
+    """
+
+    class Meta:
+        """Meta for OCPLabelsDictionary."""
+
+        db_table = 'reporting_ocplabels_dictionary'
+        unique_together = ('report_period', 'data_source', 'key')
+
+        indexes = [
+            models.Index(
+                fields=['usage_month'],
+                name='ocp_labels_dict_month_idx',
+            ),
+        ]
+
+    report_period = models.ForeignKey('OCPUsageReportPeriod',
+                                      on_delete=models.CASCADE)
+    usage_month = models.DateField(null=False)
+    # One of pod, volume or volume_claim
+    data_source = models.CharField(max_length=16)
+    key = models.CharField(max_length=253)
+    values = ArrayField(models.CharField(max_length=253))
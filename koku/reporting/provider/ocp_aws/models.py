@@ -225,3 +225,70 @@ class OCPAWSCostLineItemProjectDailySummary(models.Model):
         decimal_places=6,
         null=True
     )
+
+
+class OCPAWSMatchIndex(models.Model):
+    """The OpenShift line items matched to each AWS daily line item.
+
+    Matching is done once per day, bill and cluster when the matched
+    columns of the daily line items change, and summarization joins on
+    the stored matches.
+    """
+
+    class Meta:
+        """Meta for OCPAWSMatchIndex."""
+
+        db_table = 'reporting_ocpawsmatchindex'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start', 'cluster_id'],
+                name='ocp_aws_match_usage_idx',
+            ),
+            models.Index(
+                fields=['aws_key'],
+                name='ocp_aws_match_aws_key_idx',
+            ),
+        ]
+
+    usage_start = models.DateField(null=False)
+
+    cost_entry_bill_id = models.IntegerField(null=False)
+
+    cluster_id = models.CharField(max_length=50, null=False)
+
+    # The md5 of the resource id and tags of the
+    # reporting_awscostentrylineitem_daily line items
+    aws_key = models.CharField(max_length=32, null=False)
+
+    # The md5 of the matched columns of the reporting_ocpusagelineitem_daily
+    # line items for Pod matches or the reporting_ocpstoragelineitem_daily
+    # line items for Storage matches
+    ocp_key = models.CharField(max_length=32, null=False)
+
+    data_source = models.CharField(max_length=64, null=False)
+
+    # The order the match is applied in, an AWS line item only keeps its
+    # matches of the lowest type: 1 resource id, 2 tag, 3 openshift_project
+    # tag, 4 openshift_node tag, 5 openshift_cluster tag
+    match_type = models.PositiveSmallIntegerField(null=False)
+
+
+class OCPAWSMatchState(models.Model):
+    """The daily line items an OCPAWSMatchIndex day was matched from."""
+
+    class Meta:
+        """Meta for OCPAWSMatchState."""
+
+        db_table = 'reporting_ocpawsmatchstate'
+        unique_together = ('usage_start', 'cost_entry_bill_id', 'cluster_id')
+
+    usage_start = models.DateField(null=False)
+
+    cost_entry_bill_id = models.IntegerField(null=False)
+
+    cluster_id = models.CharField(max_length=50, null=False)
+
+    # The md5 of the distinct AWS, pod and storage match keys of the day,
+    # the day only has to be matched again when either set of keys changes
+    fingerprint = models.CharField(max_length=256, null=False)